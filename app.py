@@ -1,32 +1,45 @@
 import sys
+import atexit
 import importlib
 import os
 import time
 import io
 import threading
 import traceback
-import RPi.GPIO as GPIO
-import board
-import neopixel
-from adafruit_servokit import ServoKit 
-from hx711 import HX711 
 
 # --- COMPATIBILITY PATCH ---
 if "imp" not in sys.modules:
     sys.modules["imp"] = importlib
 
 os.environ["OPENCV_LOG_LEVEL"] = "OFF"
-import cv2
-import numpy as np
-import requests
-import qrcode
-from flask import Flask, render_template, jsonify, send_file
+import metrics
+from flask import Flask, Response, render_template, jsonify, request, send_file
 from dotenv import load_dotenv
-import tensorflow as tf
+from inference import BURST_FUSIONS, Classifier, CascadeClassifier, fuse_burst, label_for
+from inference_worker import RemoteClassifier
+from model_registry import DEFAULT_META, ModelManager, ModelRegistry
+from fusion import DecisionEngine
+from intake import IntakeDetector
+from outbox import Outbox
+from state_stream import StateStream
+from scan_pipeline import ScanPipeline
+from scan_jobs import ScanScheduler
+from recorder import ScanRecorder
+from motion import MotionPlanner
+from calibration import CalibrationStore
+from hardware.weight_sampler import WeightSampler
+from hardware.metal_detector import MetalDetector
+from hardware.camera import CameraStream
+from hardware.backend import load_backend
 
 load_dotenv()
 app = Flask(__name__)
 
+# "pi" = the real machine, "sim" = simulated devices for running off the Pi (hardware/sim_backend.py)
+HW_BACKEND = os.getenv("HW_BACKEND", "pi")
+hw = load_backend(HW_BACKEND)
+GPIO = hw.GPIO
+
 # ==========================================
 # 🌐 CONFIGURATION
 # ==========================================
@@ -34,19 +47,56 @@ BASE_URL = os.getenv("BASE_URL", "http://localhost:3000")
 API_URL = f"{BASE_URL}/api/machine/kiosk"
 PI_SECRET = os.getenv("PI_SECRET", "default")
 BIN_ID = os.getenv("BIN_ID", "BIN_01")
-
-MODEL_PATH = "model/ai-model-fp32-v2.tflite"
+PORT = int(os.getenv("PORT", "5000"))
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.db")  # local journal of START/STOP/ITEM events
+CALIBRATION_PATH = os.getenv("CALIBRATION_PATH", "calibration.json")  # written by the hardware/ calibration tools
+
+# fp32 = original export, dr = dynamic-range weights, int8 = full integer (see ai-model.ipynb)
+MODEL_PATHS = {
+    "fp32": "model/ai-model-fp32-v2.tflite",
+    "dr": "model/ai-model-dr-v2.tflite",
+    "int8": "model/ai-model-int8-v2.tflite",
+}
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", "fp32")
+MODEL_PATH = os.getenv("MODEL_PATH", MODEL_PATHS.get(MODEL_VARIANT, ""))
+AI_NUM_THREADS = int(os.getenv("AI_NUM_THREADS", "4"))  # Pi 3B has 4 cores
+
+# Versioned models (see model_registry.py); MODEL_PATH is used while the registry is empty
+MODEL_REGISTRY = os.getenv("MODEL_REGISTRY", "model/registry")
+MODEL_REGISTRY_POLL_S = 5.0
+
+# Optional small first-stage model (see ai-model.ipynb); MobileNet only runs when it is unsure
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH", "")
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.9"))
+
+# Load + warm the model on a thread so the kiosk is served at once (MODEL_LOAD_BACKGROUND=0 to load before serving);
+# a scan tapped meanwhile waits up to MODEL_READY_WAIT_S for it. TFLITE_RUNTIME picks the runtime (see inference.py)
+MODEL_LOAD_BACKGROUND = os.getenv("MODEL_LOAD_BACKGROUND", "1") != "0"
+MODEL_READY_WAIT_S = 30.0
+
+# Run the model in its own process so inference never stalls the web UI or the camera thread
+INFERENCE_WORKER = os.getenv("INFERENCE_WORKER", "0") == "1"
+
+# Overlap sorting of one item with capture + inference of the next (PIPELINE=0 to disable)
+PIPELINE_ENABLED = os.getenv("PIPELINE", "1") != "0"
 
 # --- Pins (BCM Numbering) ---
-PIXEL_PIN = board.D18    
+PIXEL_PIN = "D18"    
 NUM_PIXELS = 8
 LED_BRIGHTNESS = 1.0
 
 WEIGHT_DT_PIN = 5      # Physical 29
 WEIGHT_SCK_PIN = 6     # Physical 31
-CALIBRATION_FACTOR = -1068.74  
+CALIBRATION_FACTOR = -1068.74  # used until hardware/scale.py has stored a measured one
+SCALE_DRIFT_TOLERANCE = 0.3    # grams the empty scale may read at session start before it is re-tared
+SCALE_MAX_DRIFT = 5.0          # more than this is an item left on the platform, not drift
+WEIGHT_SETTLE_TOLERANCE = 0.5  # grams; spread allowed across the settle window
+WEIGHT_SETTLE_TIMEOUT = 1.0    # seconds before we give up waiting for the scale
+WEIGHT_FIRST_SAMPLE_S = 0.3    # right after a tare, wait this long for the sampler's first reading
 
 METAL_SENSOR_PIN = 26  # Physical 37
+METAL_DEBOUNCE_MS = 10
+METAL_LOOKBACK_S = 5.0   # how far back a latched detection still counts for the current item
 
 SERVO_SORTER_CH = 15     
 SERVO_SLAPPER_CH = 0       
@@ -59,6 +109,44 @@ ANGLE_SORTER_CAN = ANGLE_SORTER_IDLE - 35
 ANGLE_SLAP_REST = 65       
 ANGLE_SLAP_HIT = 160      
 
+# --- Decision Fusion ---
+MAX_ITEM_WEIGHT = 50.0   # grams; heavier items are rejected without running the model
+EMPTY_WEIGHT = float(os.getenv("EMPTY_WEIGHT", "0.5"))     # below this the chamber counts as empty
+EMPTY_FRAME_CHECK = os.getenv("EMPTY_FRAME_CHECK", "1") != "0"  # also require the camera to see an empty chamber
+CAN_MIN_PROB = float(os.getenv("CAN_MIN_PROB", "0.4"))          # with metal present
+PLASTIC_MIN_PROB = float(os.getenv("PLASTIC_MIN_PROB", "0.5"))  # with no metal present
+
+# --- Auto Scan ---
+# Scan as soon as an inserted item comes to rest in front of the camera, no tap needed
+AUTO_SCAN = os.getenv("AUTO_SCAN", "0") == "1"
+AUTO_SCAN_POLL_HZ = 5.0
+
+# --- Scan Jobs ---
+SCAN_WAIT_MAX_S = 10.0   # longest a scan request may be held open with ?wait=
+
+# --- Burst Capture ---
+# Classify K consecutive lit frames in one batched invoke and fuse them, so one
+# blurred or glared frame no longer turns a can into "Other" (BURST_FRAMES=1: single frame)
+BURST_FRAMES = max(1, int(os.getenv("BURST_FRAMES", "1")))
+BURST_FUSION = os.getenv("BURST_FUSION", "mean")    # mean | vote
+
+# --- Scan Recorder ---
+# Every scan's frames (JPEG), probabilities, weight, metal latch and decision, written off the
+# scan path for retraining and debugging (see recorder.py); RECORDER_DIR= (empty) turns it off
+RECORDER_DIR = os.getenv("RECORDER_DIR", "recordings")
+RECORDER_BUDGET_MB = float(os.getenv("RECORDER_BUDGET_MB", "256"))   # oldest scans are deleted past this
+RECORDER_SEGMENT_MB = 8.0
+RECORDER_JPEG_QUALITY = int(os.getenv("RECORDER_JPEG_QUALITY", "85"))
+
+# --- Camera ---
+CAMERA_RING_SLOTS = max(4, BURST_FRAMES + 2)       # a burst stays pinned while the camera keeps writing
+CAMERA_FLASH_MARGIN_S = 0.02   # on top of one frame interval, so the whole exposure sees the flash
+CAMERA_FRAME_TIMEOUT_S = 1.0
+# Nearest driver mode above the 224x224 model input; 640x480 decodes 4x the pixels for nothing
+CAMERA_CAPTURE_SIZE = tuple(int(v) for v in os.getenv("CAMERA_CAPTURE_SIZE", "320x240").split("x"))
+CAMERA_IDLE_INTERVAL_S = 1.0     # between sessions: one frame a second keeps auto-exposure settled
+CAMERA_RELEASE_AFTER_S = float(os.getenv("CAMERA_RELEASE_AFTER_S", "300"))  # then close the device
+
 # 🎨 COLORS
 COLOR_OFF = (0, 0, 0)
 COLOR_FLASH_WHITE = (255, 150, 255) 
@@ -68,201 +156,378 @@ COLOR_FLASH_WHITE = (255, 150, 255)
 # ==========================================
 pixels = None
 kit = None
+motion = None
+calibration = CalibrationStore(CALIBRATION_PATH)
 hx = None
+weight_sampler = None
+metal_detector = None
 
 def setup_hardware():
-    global pixels, kit, hx
-    GPIO.setmode(GPIO.BCM)
+    global pixels, kit, motion, hx, weight_sampler, metal_detector
+    hw.setup()
 
     # 1. LED
     try:
-        pixels = neopixel.NeoPixel(PIXEL_PIN, NUM_PIXELS, brightness=LED_BRIGHTNESS, auto_write=False, pixel_order=neopixel.RGB)
+        pixels = hw.led_strip(PIXEL_PIN, NUM_PIXELS, LED_BRIGHTNESS)
         set_lights(COLOR_OFF)
     except Exception as e:
         print(f"⚠️ LED Error: {e}")
 
     # 2. Servos
     try:
-        kit = ServoKit(channels=16)
+        kit = hw.servo_kit(16, pusher=(SERVO_SLAPPER_CH, ANGLE_SLAP_HIT))
         kit.servo[SERVO_SORTER_CH].set_pulse_width_range(500, 2500)
         kit.servo[SERVO_SLAPPER_CH].set_pulse_width_range(500, 2500)
+        rates = calibration.section("servos").get("deg_per_s", {})
+        motion = MotionPlanner(kit, rates=rates)
         reset_motors()
-        print("✅ Motor Driver Connected")
+        print(f"✅ Motor Driver Connected ({'calibrated' if rates else 'default'} servo speeds)")
     except Exception as e:
         print(f"⚠️ Motor Driver Error: {e}")
 
     # 3. Metal Sensor
     try:
-        GPIO.setup(METAL_SENSOR_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        metal_detector = MetalDetector(hw.metal_sensor(METAL_SENSOR_PIN), METAL_SENSOR_PIN, debounce_ms=METAL_DEBOUNCE_MS)
+        metal_detector.start()
         print("✅ Metal Sensor Ready")
     except Exception as e:
         print(f"⚠️ Metal Sensor Error: {e}")
 
     # 4. Weight Sensor
     try:
-        hx = HX711(WEIGHT_DT_PIN, WEIGHT_SCK_PIN)
+        hx = hw.load_cell(WEIGHT_DT_PIN, WEIGHT_SCK_PIN)
         hx.set_reading_format("MSB", "MSB")
-        hx.set_reference_unit(CALIBRATION_FACTOR)
-        hx.reset()
-        hx.tare()
-        print("✅ Weight Sensor Ready")
+        scale = calibration.section("scale")
+        hx.set_reference_unit(scale.get("reference_unit", CALIBRATION_FACTOR))
+        weight_sampler = WeightSampler(hx)
+        if "offset" in scale:
+            # Zero from the last tare; checked for drift when a session starts
+            hx.set_offset(scale["offset"])
+        else:
+            tare_scale()
+        weight_sampler.start()
+        print(f"✅ Weight Sensor Ready ({'stored' if 'offset' in scale else 'new'} zero)")
     except Exception as e:
         print(f"⚠️ Weight Sensor Error: {e}")
 
+scale_drift = None   # grams the empty scale read at the last session start
+
+def tare_scale():
+    weight_sampler.tare()
+    calibration.save("scale", {"offset": hx.get_offset()})
+
+# Session start: the stored zero is kept while the empty scale still reads ~0 g,
+# a full tare (~1.5 s of HX711 samples) only happens when it has drifted
+def check_scale_zero():
+    global scale_drift
+    if not weight_sampler:
+        if hx:
+            hx.reset()
+            hx.tare()
+        return
+    # Samples from the last half second count, so normally this returns at once
+    drift, _ = weight_sampler.wait_stable(since=time.monotonic() - 0.5, tolerance=SCALE_DRIFT_TOLERANCE, window=5, timeout=1.0)
+    if not weight_sampler.count: drift = None
+    scale_drift = drift
+    if drift is not None and abs(drift) <= SCALE_DRIFT_TOLERANCE:
+        return
+    if drift is not None and abs(drift) > SCALE_MAX_DRIFT:
+        print(f"⚠️ Scale reads {drift:.1f}g at session start, is something on the platform? Keeping the zero")
+        return
+    print(f"⚖️ Scale drifted {drift:.2f}g, re-taring" if drift is not None else "⚖️ No recent scale samples, re-taring")
+    with metrics.stage("tare"):
+        tare_scale()
+
 def set_lights(color):
     if pixels:
-        pixels.fill(color)
-        pixels.show()
+        with metrics.stage("lights"):
+            pixels.fill(color)
+            pixels.show()
 
 def reset_motors():
-    if not kit: return
+    if not motion: return
     try:
-        kit.servo[SERVO_SORTER_CH].angle = ANGLE_SORTER_IDLE
-        kit.servo[SERVO_SLAPPER_CH].angle = ANGLE_SLAP_REST
-        time.sleep(0.5)
-        kit.servo[SERVO_SORTER_CH].angle = None
-        kit.servo[SERVO_SLAPPER_CH].angle = None
+        motion.move_together({SERVO_SORTER_CH: ANGLE_SORTER_IDLE, SERVO_SLAPPER_CH: ANGLE_SLAP_REST})
+        motion.release()
     except: pass
 
 def get_weight():
+    with metrics.stage("weight_read"):
+        return _read_weight()
+
+def _read_weight():
+    if weight_sampler and (weight_sampler.count or weight_sampler.wait_first(WEIGHT_FIRST_SAMPLE_S)):
+        val = weight_sampler.current
+        return val if val > 0.5 else 0.0
     if hx:
         try:
-            val = hx.get_weight(5)
+            # The sampler thread may be clocking the HX711 too
+            if weight_sampler:
+                with weight_sampler.hx_lock: val = hx.get_weight(5)
+            else:
+                val = hx.get_weight(5)
             return val if val > 0.5 else 0.0 
         except: return 0.0
     return 0.0
 
-def is_metal_detected():
+def is_metal_detected(since=None):
+    if metal_detector:
+        return metal_detector.seen_since(time.monotonic() if since is None else since)
     return GPIO.input(METAL_SENSOR_PIN) == 0
 
-def run_motor_sequence(label):
-    if label == "Other" or not kit: return
+def clear_chute(label):
+    if label == "Other" or not motion: return
     
     target_angle = ANGLE_SORTER_PLASTIC if label == "Plastic" else ANGLE_SORTER_CAN
     
-    kit.servo[SERVO_SORTER_CH].angle = target_angle
-    time.sleep(0.5) 
-    kit.servo[SERVO_SLAPPER_CH].angle = ANGLE_SLAP_HIT
-    time.sleep(0.6) 
-    kit.servo[SERVO_SLAPPER_CH].angle = ANGLE_SLAP_REST
-    time.sleep(0.4) 
-    kit.servo[SERVO_SORTER_CH].angle = ANGLE_SORTER_IDLE
-    time.sleep(0.5)
-    kit.servo[SERVO_SORTER_CH].angle = None
-    kit.servo[SERVO_SLAPPER_CH].angle = None
+    with metrics.stage("motor_sort"):
+        # No wait at all when the gate is already on this side
+        motion.move(SERVO_SORTER_CH, target_angle)
+        motion.move(SERVO_SLAPPER_CH, ANGLE_SLAP_HIT)
+        motion.move(SERVO_SLAPPER_CH, ANGLE_SLAP_REST)
+
+# The gate stays on the side it last sorted to, the next item is likely the
+# same kind; it goes back to idle with reset_motors() when the session ends
+def park_sorter(label):
+    if label == "Other" or not motion: return
+
+    with metrics.stage("motor_park"):
+        motion.release(SERVO_SORTER_CH, SERVO_SLAPPER_CH)
+
+def run_motor_sequence(label):
+    clear_chute(label)
+    park_sorter(label)
+
+# The item alone on the scale, once the readings taken after `since` agree
+def get_settled_weight(since):
+    if not (weight_sampler and weight_sampler.running):
+        return get_weight()
+    with metrics.stage("weight_settle"):
+        val, settled = weight_sampler.wait_stable(since=since, tolerance=WEIGHT_SETTLE_TOLERANCE, timeout=WEIGHT_SETTLE_TIMEOUT)
+    if not settled: print(f"   ⚠️ Scale did not settle, using {val:.2f}g")
+    return val if val > 0.5 else 0.0
+
+scan_pipeline = ScanPipeline(clear_chute, park_sorter, pipelined=PIPELINE_ENABLED)
 
 # ==========================================
 # 🧠 AI ENGINE
 # ==========================================
-try:
-    interpreter = tf.lite.Interpreter(model_path=MODEL_PATH)
-    interpreter.allocate_tensors()
-    input_details = interpreter.get_input_details()
-    output_details = interpreter.get_output_details()
-    model_h, model_w = input_details[0]['shape'][1], input_details[0]['shape'][2]
-    input_index = input_details[0]['index']
-    ai_lock = threading.Lock()
-    print(f"✅ AI Model Loaded")
-except Exception as e:
-    print(f"❌ AI Error: {e}")
+def build_classifier(model_path, meta):
+    options = {"classes": meta["classes"], "color": meta["color"], "input_range": meta["input_range"]}
+    if INFERENCE_WORKER:
+        return RemoteClassifier(model_path, num_threads=AI_NUM_THREADS, backend=HW_BACKEND,
+                                cascade_path=CASCADE_MODEL_PATH, cascade_threshold=CASCADE_THRESHOLD,
+                                frame_size=CAMERA_CAPTURE_SIZE, slots=max(2, BURST_FRAMES), **options)
+    classifier = Classifier(model_path, num_threads=AI_NUM_THREADS, make_interpreter=hw.interpreter, **options)
+    if CASCADE_MODEL_PATH:
+        fast = Classifier(CASCADE_MODEL_PATH, num_threads=AI_NUM_THREADS, make_interpreter=hw.interpreter)
+        classifier = CascadeClassifier(fast, classifier, threshold=CASCADE_THRESHOLD)
+    return classifier
+
+if MODEL_VARIANT not in MODEL_PATHS:
+    print(f"❌ AI Error: MODEL_VARIANT must be one of {', '.join(MODEL_PATHS)}")
     sys.exit(1)
 
-global_cap = None
-latest_frame = None
-camera_running = False
-camera_lock = threading.Lock()
+# Hot-swappable: a new registry version replaces the model between two scans
+classifier = ModelManager(ModelRegistry(MODEL_REGISTRY), build_classifier,
+                          fallback=(MODEL_PATH, dict(DEFAULT_META, version=os.path.basename(MODEL_PATH))),
+                          frame_size=CAMERA_CAPTURE_SIZE, poll_s=MODEL_REGISTRY_POLL_S, burst=BURST_FRAMES)
+if BURST_FUSION not in BURST_FUSIONS:
+    print(f"❌ AI Error: BURST_FUSION must be one of {', '.join(BURST_FUSIONS)}")
+    sys.exit(1)
+atexit.register(classifier.close)
+
+def load_model():
+    try:
+        classifier.start()
+    except Exception as e:
+        print(f"❌ AI Error: {e}")
+        update_state({"model_status": "ERROR"})
+        # The registry is still watched: `python model_registry.py activate vN` recovers without a restart
+        threading.Thread(target=model_recovered, daemon=True).start()
+        return False
+    runtime = getattr(classifier.active.classifier, "runtime", None)
+    where = "worker process" if INFERENCE_WORKER else f"{AI_NUM_THREADS} threads" + (f", {runtime}" if runtime else "")
+    print(f"✅ AI Model Loaded ({classifier.version}, {where}, ready {classifier.boot_s:.1f}s after start)")
+    if BURST_FRAMES > 1:
+        print(f"✅ Burst Capture ({BURST_FRAMES} frames, {BURST_FUSION})")
+    if CASCADE_MODEL_PATH:
+        print(f"✅ Cascade Enabled ({CASCADE_MODEL_PATH}, threshold {CASCADE_THRESHOLD})")
+    update_state({"model_status": "READY"})
+    return True
+
+def model_recovered():
+    classifier.ready.wait()
+    print(f"✅ AI Model Loaded ({classifier.version}, activated after a failed boot)")
+    update_state({"model_status": "READY"})
+
+camera = CameraStream(lambda: hw.open_camera(CAMERA_CAPTURE_SIZE), slots=CAMERA_RING_SLOTS,
+                      idle_interval=CAMERA_IDLE_INTERVAL_S, release_after=CAMERA_RELEASE_AFTER_S)
 
 def start_camera():
-    global global_cap, camera_running
-    if camera_running and global_cap: return True
-    for idx in [0, 1, -1]:
-        try:
-            cap = cv2.VideoCapture(idx, cv2.CAP_V4L2)
-            if cap.isOpened():
-                global_cap = cap
-                camera_running = True
-                threading.Thread(target=camera_loop, daemon=True).start()
-                return True
-        except: continue
-    return False
-
-def camera_loop():
-    global latest_frame
-    while camera_running and global_cap:
-        ret, frame = global_cap.read()
-        if ret:
-            with camera_lock: latest_frame = frame
-        else: time.sleep(0.1)
+    return camera.start()
+
+# The first `count` frames whose exposure started at or after `t`, pinned in
+# the ring (release them); fewer when the camera stops delivering
+def capture_burst(t, count):
+    frames = []
+    deadline = time.monotonic() + CAMERA_FRAME_TIMEOUT_S
+    while len(frames) < count:
+        frame = camera.ring.acquire_after(t, timeout=max(0.0, deadline - time.monotonic()))
+        if frame is None: break
+        frames.append(frame)
+        t = frame.stamp + 1e-6
+        deadline = time.monotonic() + CAMERA_FRAME_TIMEOUT_S
+    return frames
 
 def capture_frame():
-    with camera_lock: return latest_frame.copy() if latest_frame is not None else None
+    frame = camera.ring.acquire_latest()
+    if frame is None: return None
+    with frame: return frame.image.copy()
 
 # ==========================================
 # 🔄 CORE LOGIC
 # ==========================================
-state = { "status": "IDLE", "plastic": 0, "cans": 0, "other": 0, "total_weight": 0, "last_item": "Ready", "last_weight": 0, "transaction_id": None, "claim_secret": None }
+fusion = DecisionEngine(max_weight=MAX_ITEM_WEIGHT, empty_weight=EMPTY_WEIGHT, can_min_prob=CAN_MIN_PROB, plastic_min_prob=PLASTIC_MIN_PROB)
+state = { "status": "IDLE", "plastic": 0, "cans": 0, "other": 0, "total_weight": 0, "last_item": "Ready", "last_weight": 0, "transaction_id": None, "claim_secret": None, "scan_seq": 0, "model_status": "WARMING_UP" }
 qr_img_buffer = None
+state_lock = threading.Lock()
+outbox = Outbox(OUTBOX_PATH, API_URL, PI_SECRET)
+state_stream = StateStream()
+recorder = ScanRecorder(RECORDER_DIR, budget_mb=RECORDER_BUDGET_MB, segment_mb=RECORDER_SEGMENT_MB,
+                        quality=RECORDER_JPEG_QUALITY) if RECORDER_DIR else None
+
+# `state` is never changed in place: every update swaps in a new dict, so
+# readers (/state, SSE, metrics) take the reference without a lock and always
+# see a whole snapshot. `changes` is a dict, or fn(current) -> dict when the
+# new values depend on the old ones (counters).
+def update_state(changes):
+    global state
+    with state_lock:
+        state = {**state, **(changes(state) if callable(changes) else changes)}
+        # Published under the lock so SSE clients never get an older snapshot last
+        state_stream.publish(state)
+
+state_stream.publish(state)
+
+# Started here, once update_state exists
+if MODEL_LOAD_BACKGROUND:
+    threading.Thread(target=load_model, daemon=True).start()
+elif not load_model():
+    sys.exit(1)
 
-def process_scan_request():
+metrics.Gauge("rvm_camera_frames_dropped_total", "Camera frames dropped by the capture ring", lambda: camera.ring.dropped, kind="counter")
+metrics.Gauge("rvm_camera_first_frame_seconds", "Session start to first full-rate frame", lambda: camera.first_frame_s)
+metrics.Gauge("rvm_camera_cold_starts_total", "Times the camera device had to be opened", lambda: camera.cold_starts, kind="counter")
+metrics.Gauge("rvm_soc_temperature_celsius", "SoC temperature", hw.soc_temperature)
+metrics.Gauge("rvm_scale_drift_grams", "Empty-scale reading at the last session start", lambda: scale_drift)
+metrics.Gauge("rvm_outbox_pending", "Backend events waiting in the outbox", outbox.pending)
+metrics.Gauge("rvm_inference_worker_restarts_total", "Times the inference worker process was started again",
+              lambda: getattr(classifier.active and classifier.active.classifier, "restarts", None), kind="counter")
+metrics.Gauge("rvm_model_boot_seconds", "Model load + warm-up time at boot", lambda: classifier.boot_s)
+metrics.Gauge("rvm_shadow_agreement_ratio", "Share of shadow runs where the candidate model agreed with the active one",
+              lambda: classifier.shadow_stats()["agreement"] if classifier.shadow else None)
+metrics.Gauge("rvm_recorder_scans_total", "Scans written by the recorder", lambda: recorder.recorded if recorder else None, kind="counter")
+metrics.Gauge("rvm_recorder_dropped_total", "Scans the recorder dropped because its queue was full", lambda: recorder.dropped if recorder else None, kind="counter")
+metrics.Gauge("rvm_recorder_disk_bytes", "Disk used by recorded scans", lambda: recorder.disk_bytes if recorder else None)
+metrics.Gauge("rvm_weight_samples_total", "HX711 samples read since the last tare", lambda: weight_sampler.count if weight_sampler else None, kind="counter")
+
+def precheck_chamber(weight):
+    # Without a scale there is no cheap evidence, always ask the model
+    if not (weight_sampler or hx): return None
+    if not EMPTY_FRAME_CHECK:
+        return fusion.precheck(weight)
+    # The unlit live frame is compared with the empty chamber seen at session start
+    frame = camera.ring.acquire_latest()
+    if frame is None: return fusion.precheck(weight)
+    with frame: return fusion.precheck(weight, frame.image)
+
+def learn_empty_chamber():
+    if not EMPTY_FRAME_CHECK: return
+    frame = camera.ring.acquire_after(time.monotonic(), timeout=CAMERA_FRAME_TIMEOUT_S)
+    if frame is None: return
+    with frame: fusion.learn_background(frame.image)
+
+# Hands the scan to the recorder's queue; `frames` may be pinned ring slots,
+# the recorder copies them (only when it has room) before they are released
+def record_scan(scan_id, decision, weight, frames=(), metal=None, per_frame=None):
+    if not recorder: return
+    # Full precision: replay.py has to reach the same decision at a threshold tie
+    floats = lambda p: [float(v) for v in p]
+    with metrics.stage("record"):
+        recorder.record(scan_id, frames, {
+            "session": state["transaction_id"], "model": classifier.version,
+            "weight": float(weight), "metal": metal,
+            "probs": [floats(p) for p in per_frame] if per_frame is not None else None,
+            "fused": floats(decision.probs) if decision.probs is not None else None, "fusion": BURST_FUSION,
+            "label": decision.label, "path": decision.path, "reason": decision.reason,
+            "thresholds": {"can_min_prob": CAN_MIN_PROB, "plastic_min_prob": PLASTIC_MIN_PROB,
+                           "max_weight": MAX_ITEM_WEIGHT, "empty_weight": EMPTY_WEIGHT},
+        })
+
+def process_scan_request(on_done=None, scan_id=None):
     try:
+        # 0. WAIT FOR THE PREVIOUS ITEM TO LEAVE THE CHUTE
+        if not scan_pipeline.wait_chute_clear():
+            print("⚠️ Chute still busy, scan refused")
+            return None, 0
+
         # 1. PHYSICAL SENSING
+        # The item went in once the slapper was back at rest, not once the
+        # previous job finished: a can dropped in while the gate parks counts
+        scan_at = time.monotonic()
+        item_since = max(scan_pipeline.rested_at, scan_at - METAL_LOOKBACK_S)
         w_before = get_weight()
-        metal_found = is_metal_detected()
         
         # 🧪 WEIGHT DEBUG
         print(f"\n⚖️  DEBUG: Current Scale Weight: {w_before:.2f}g")
 
-        # 2. CAPTURE
-        set_lights(COLOR_FLASH_WHITE)
-        time.sleep(0.3)             
-        frame = capture_frame()
-        set_lights(COLOR_OFF)      
-
-        if frame is None: return None, 0
-
-        # 3. AI PREDICTION
-        with ai_lock:
-            img = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), (model_w, model_h))
-            img_array = np.expand_dims(img.astype("float32"), axis=0)
-            interpreter.set_tensor(input_index, img_array)
-            interpreter.invoke()
-            probs = interpreter.get_tensor(output_details[0]['index'])[0]
-            
-            pred_idx = np.argmax(probs)
-            label = "Can" if pred_idx == 0 else "Plastic" if pred_idx == 2 else "Other"
-
-            # --- HYBRID LOGIC & CONSTRAINTS ---
-            print(f"   [Logic] AI Result: {label} | Metal Sensor: {metal_found}")
-
-            # 🚫 50g WEIGHT LIMIT
-            print(f"   [Logic] AI Result: {label} | Metal Sensor: {metal_found}")
-
-    # 🚫 Weight limit
-        if w_before > 50.0:
-            print(f"   ⚠️ REJECTED: Item too heavy ({w_before:.1f}g > 50g)")
-            label = "Other"
-
-        # ❌ AI & Sensor DISAGREE → reject
-        elif label == "Can" and not metal_found:
-            print("   ❌ REJECTED: AI says Can but no metal detected")
-            label = "Other"
-
-        elif label == "Plastic" and metal_found:
-            print("   ❌ REJECTED: AI says Plastic but metal detected")
-            label = "Other"
-
-        # ✅ AI & Sensor AGREE → accept
+        # 2. CHEAP SIGNALS FIRST: overweight / empty chamber skip capture + inference
+        with metrics.stage("precheck"):
+            decision = precheck_chamber(w_before)
+        if decision is not None:
+            record_scan(scan_id, decision, w_before)
         else:
-            print("   ✅ ACCEPTED: AI and Sensor agree")
-
-        # 4. DISPENSE
-        run_motor_sequence(label)
-        
-        # 5. FINAL WEIGHT CALCULATION
-        time.sleep(0.5)
-        w_after = get_weight()
-        item_weight = abs(w_before - w_after)
-        
+            # 3. CAPTURE
+            set_lights(COLOR_FLASH_WHITE)
+            # First frames whose exposure started after the LEDs came on (read in place, no copy)
+            lit_at = time.monotonic() + camera.frame_interval() + CAMERA_FLASH_MARGIN_S
+            with metrics.stage("frame_wait"):
+                frames = capture_burst(lit_at, BURST_FRAMES)
+            set_lights(COLOR_OFF)      
+
+            if not frames: return None, 0
+
+            # Checked after the capture so a can still sliding past the sensor is latched too
+            metal_found = is_metal_detected(item_since)
+
+            # 4. AI PREDICTION + SENSOR FUSION
+            try:
+                per_frame = classifier.classify_burst([f.image for f in frames])
+                probs = fuse_burst(per_frame, BURST_FUSION)
+                stage = f" ({classifier.last_stage} model)" if CASCADE_MODEL_PATH else ""
+                burst = f" [{' '.join(label_for(p)[0] for p in per_frame)} {BURST_FUSION}]" if len(per_frame) > 1 else ""
+                print(f"   [Logic] AI Result ({classifier.version}): {label_for(probs)} {max(probs):.2f}{burst}{stage} | Metal Sensor: {metal_found}")
+                with metrics.stage("fusion"):
+                    decision = fusion.decide(probs, metal_found)
+                # Still pinned in the ring: the recorder copies the frames it keeps
+                record_scan(scan_id, decision, w_before, [f.image for f in frames], metal_found, per_frame)
+            finally:
+                for f in frames: f.release()
+
+        fusion.log(decision)
+        result = "accepted" if decision.accepted else "empty" if decision.label is None else "rejected"
+        metrics.DECISIONS.inc(result=result, label=decision.label or "-",
+                              reason=decision.reason if decision.path == "model" else decision.path)
+        label = decision.label
+        if label is None: return None, 0
+
+        # 5. FINAL WEIGHT: the item has rested through the capture, and the
+        # next one can only go in once this one is out of the chute
+        item_weight = get_settled_weight(scan_at)
+
+        # 6. DISPENSE (actuator worker; returns right away when pipelined)
+        scan_pipeline.submit(label, item_weight, on_done)
         return label, item_weight
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -279,52 +544,116 @@ def index():
 @app.route('/state')
 def get_state(): return jsonify(state)
 
+@app.route('/events')
+def get_events():
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(state_stream.sse(), mimetype="text/event-stream", headers=headers)
+
+# Prometheus scrape target; METRICS=0 turns instrumentation and the route off
+if metrics.ENABLED:
+    @app.route('/metrics')
+    def get_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Active / shadow model, shadow agreement and latency, load errors
+@app.route('/models')
+def get_models(): return jsonify(classifier.status())
+
 @app.route('/qr_image')
 def get_qr_image(): return send_file(qr_img_buffer, mimetype='image/png') if qr_img_buffer else ("", 404)
 
 @app.route('/action/start', methods=['POST'])
 def start():
     if not start_camera(): return jsonify({"error": "No Camera"}), 500
-    if hx: 
-        hx.reset()
-        hx.tare()
-    try:
-        res = requests.post(API_URL, json={"action": "START", "binId": BIN_ID, "secret": PI_SECRET}, timeout=5)
-        data = res.json()
-        state["transaction_id"] = data.get("transactionId", f"OFF-{int(time.time())}")
-        state["claim_secret"] = data.get("claimSecret", "offline")
-    except:
-        state["transaction_id"] = f"OFF-{int(time.time())}"
-    
-    state.update({"status": "RUNNING", "plastic": 0, "cans": 0, "other": 0, "total_weight": 0})
+    check_scale_zero()
+    learn_empty_chamber()
+
+    # Journaled and sent in the background; the backend id is picked up later
+    transaction_id = outbox.new_transaction()
+    outbox.enqueue("START", transaction_id, {"action": "START", "binId": BIN_ID})
+    update_state({"transaction_id": transaction_id, "claim_secret": "offline",
+                  "status": "RUNNING", "plastic": 0, "cans": 0, "other": 0, "total_weight": 0})
+    intake.enable(AUTO_SCAN)
     return jsonify({"success": True})
 
+def record_item_weight(transaction_id, scan_id=None):
+    def on_done(job):
+        if recorder: recorder.update(scan_id, settled_weight=round(job.weight, 2))
+        # A late job from a previous session must not leak into the new totals
+        if state["transaction_id"] != transaction_id: return
+        update_state(lambda s: {"last_weight": job.weight, "total_weight": s["total_weight"] + job.weight})
+        print(f"   [Pipeline] Item weight: {job.weight:.1f}g | {scan_pipeline.items_per_minute():.1f} items/min")
+    return on_done
+
+COUNTER_FOR_LABEL = {"Plastic": "plastic", "Can": "cans"}
+
+# Runs on the scan scheduler thread, one job at a time
+def handle_scan(job):
+    if classifier.boot_error or not classifier.ready.wait(MODEL_READY_WAIT_S):
+        print("⚠️ Model not ready, scan refused")
+        return None
+    with metrics.SCANS.time():
+        transaction_id = state["transaction_id"]
+        label, weight = process_scan_request(record_item_weight(transaction_id, job.id), job.id)
+        if not label: return None
+        counter = COUNTER_FOR_LABEL.get(label, "other")
+        update_state(lambda s: {"last_item": label, counter: s[counter] + 1, "scan_seq": s["scan_seq"] + 1})
+        outbox.enqueue("ITEM", transaction_id, {"label": label, "weight": round(weight, 1)}, upload=False)
+        return {"label": label, "weight": round(weight, 1), "scan_seq": state["scan_seq"]}
+
+scans = ScanScheduler(handle_scan)
+metrics.Gauge("rvm_scan_requests_joined_total", "Scan requests answered with an existing job (retry or double tap)", lambda: scans.joined, kind="counter")
+
+def wait_arg(args):
+    try: return min(max(float(args.get("wait", 0)), 0.0), SCAN_WAIT_MAX_S)
+    except ValueError: return 0.0
+
+# Answers with the job right away (202 while it runs); `scan_id` makes retries
+# safe and `wait` (seconds) holds the answer until the scan is done
 @app.route('/action/scan', methods=['POST'])
 def scan():
-    label, weight = process_scan_request()
-    if label:
-        state["last_item"], state["last_weight"] = label, weight
-        state["total_weight"] += weight
-        if label == "Plastic": state["plastic"] += 1
-        elif label == "Can": state["cans"] += 1
-        else: state["other"] += 1
-        return jsonify({"success": True, "label": label, "weight": round(weight, 1)})
-    return jsonify({"error": "Scan Failed"}), 500
+    args = request.get_json(silent=True) or request.values
+    job, _ = scans.submit(args.get("scan_id"))
+    job.wait(wait_arg(args))
+    return jsonify(job.to_dict()), 200 if job.done.is_set() else 202
+
+@app.route('/action/scan/<scan_id>')
+def scan_status(scan_id):
+    job = scans.get(scan_id)
+    if job is None: return jsonify({"error": "Unknown scan"}), 404
+    job.wait(wait_arg(request.args))
+    return jsonify(job.to_dict()), 200 if job.done.is_set() else 202
+
+def auto_scan():
+    if state["status"] != "RUNNING" or scans.busy(): return
+    job, created = scans.submit(source="auto")
+    if not created: return
+    job.wait()
+    label = job.result.get("label")
+    stats = intake.stats()
+    print(f"   [Intake] Auto scan: {label} | at rest {stats['trigger_latency_s'] or 0:.2f}s after motion "
+          f"| detector CPU {stats['cpu_fraction']:.1%} ({stats['cpu_ms_per_frame']:.2f} ms/frame)")
+
+intake = IntakeDetector(camera.ring, auto_scan, poll_hz=AUTO_SCAN_POLL_HZ)
+if AUTO_SCAN: intake.start()
 
 @app.route('/action/stop', methods=['POST'])
 def stop():
-    state["status"] = "SHOW_RESULT"
-    try:
-        requests.post(API_URL, json={
-            "action": "STOP", 
-            "transactionId": state["transaction_id"], 
-            "plastic": state["plastic"], 
-            "cans": state["cans"], 
-            "secret": PI_SECRET
-        }, timeout=3)
-    except: pass
+    update_state({"status": "SHOW_RESULT"})
+    session = state
+    intake.enable(False)
+    camera.idle()
+    outbox.enqueue("STOP", session["transaction_id"], {
+        "action": "STOP", 
+        "transactionId": session["transaction_id"], 
+        "plastic": session["plastic"], 
+        "cans": session["cans"], 
+    })
     
-    url = f"{BASE_URL}/claim/{state['transaction_id']}?secret={state['claim_secret']}"
+    # The START normally went through long ago; offline sessions keep their local id
+    remote_txn, claim_secret = outbox.resolve(session["transaction_id"])
+    url = f"{BASE_URL}/claim/{remote_txn or session['transaction_id']}?secret={claim_secret or session['claim_secret']}"
+    import qrcode   # only needed here; kept out of the boot path
     qr = qrcode.make(url)
     buf = io.BytesIO()
     qr.save(buf, format="PNG")
@@ -335,9 +664,22 @@ def stop():
 
 @app.route('/action/reset', methods=['POST'])
 def reset():
-    state["status"] = "IDLE"
+    update_state({"status": "IDLE"})
+    intake.enable(False)
+    camera.idle()
+    scan_pipeline.after_jobs(reset_motors)
     return jsonify({"success": True})
 
+if HW_BACKEND == "sim":
+    # Put an item into the simulated chamber: kind=can|plastic|other (random if omitted), weight in grams
+    @app.route('/sim/insert', methods=['POST'])
+    def sim_insert():
+        args = request.get_json(silent=True) or request.values
+        kind, weight = hw.chamber.insert(args.get("kind"), args.get("weight"))
+        return jsonify({"kind": kind, "weight": round(weight, 1)})
+
 if __name__ == '__main__':
     setup_hardware()
-    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    outbox.start()
+    if recorder: recorder.start()
+    app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)
\ No newline at end of file
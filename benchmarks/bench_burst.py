@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import cv2
+import numpy as np
+from hardware.backend import load_backend
+from hardware.camera import CameraStream
+from inference import BURST_FUSIONS, CLASS_LABELS, Classifier, fuse_burst, label_for
+
+# ==========================================
+# 🏁 BURST CAPTURE: BATCH LATENCY + ACCURACY
+# ==========================================
+# 1. Batch latency: one invoke on a [k, h, w, 3] input vs k single invokes,
+#    on the deployed model (MODEL_PATH) and the backend's interpreter.
+# 2. Accuracy on recorded bursts: the first frame alone vs every fusion.
+#    Bursts live in <dir>/<can|other|plastic>/<burst>/<frame>.png.
+# 3. --record: lights on, k consecutive frames, like app.py scans, saved in
+#    that layout. The simulated machine inserts the items itself; on the
+#    real one put an item in (of kind --label) and press Enter.
+#
+#   python benchmarks/bench_burst.py --batch-sizes 1,2,3,4,6
+#   python benchmarks/bench_burst.py --record bursts/ --label can --count 20 --frames 5
+#   python benchmarks/bench_burst.py --bursts bursts/ --frames 3
+#   HW_BACKEND=sim python benchmarks/bench_burst.py --record /tmp/bursts --count 60
+
+# Same as app.py
+MODEL_PATH = os.getenv("MODEL_PATH", "model/ai-model-fp32-v2.tflite")
+AI_NUM_THREADS = int(os.getenv("AI_NUM_THREADS", "4"))
+PIXEL_PIN, NUM_PIXELS, LED_BRIGHTNESS = "D18", 8, 1.0
+COLOR_OFF, COLOR_FLASH_WHITE = (0, 0, 0), (255, 150, 255)
+CAMERA_CAPTURE_SIZE = tuple(int(v) for v in os.getenv("CAMERA_CAPTURE_SIZE", "320x240").split("x"))
+
+
+def batch_latency(classifier, sizes, repeats, frame_size):
+    w, h = frame_size
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (h, w, 3), np.uint8) for _ in range(max(sizes))]
+    classifier.classify(frames[0])      # warm-up
+    single = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        classifier.classify(frames[0])
+        single.append((time.perf_counter() - t0) * 1000)
+    single_ms = statistics.median(single)
+
+    results = []
+    print(f"Batch latency ({classifier.model_path}, single frame {single_ms:.1f} ms)")
+    print(f"  {'k':>3} {'batch ms':>10} {'per frame':>10} {'k singles':>10} {'ratio':>7}")
+    for k in sizes:
+        classifier.classify_burst(frames[:k])      # re-allocation for the new size
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            classifier.classify_burst(frames[:k])
+            times.append((time.perf_counter() - t0) * 1000)
+        batch_ms = statistics.median(times)
+        results.append({"k": k, "batch_ms": batch_ms, "per_frame_ms": batch_ms / k, "singles_ms": k * single_ms})
+        print(f"  {k:3d} {batch_ms:10.1f} {batch_ms / k:10.1f} {k * single_ms:10.1f} {batch_ms / (k * single_ms):7.2f}")
+    if not classifier.batchable:
+        print("  ⚠️ The model refused a batch dimension, bursts ran frame by frame")
+    return {"single_ms": single_ms, "batches": results}
+
+
+def burst_accuracy(classifier, folder, frames_per_burst):
+    methods = ("first frame",) + BURST_FUSIONS
+    correct = {m: 0 for m in methods}
+    other = {m: 0 for m in methods}     # cans / bottles answered "Other", the costly mistake
+    total = recyclable = 0
+    for label in CLASS_LABELS:
+        for burst in sorted(p for p in (Path(folder) / label.lower()).glob("*") if p.is_dir()):
+            paths = sorted(burst.glob("*.png")) + sorted(burst.glob("*.jpg"))
+            frames = [cv2.imread(str(p)) for p in paths[:frames_per_burst]]
+            if not frames: continue
+            probs = classifier.classify_burst(frames)
+            answers = {"first frame": label_for(probs[0])}
+            answers.update({m: label_for(fuse_burst(probs, m)) for m in BURST_FUSIONS})
+            total += 1
+            recyclable += label != "Other"
+            for method, answer in answers.items():
+                correct[method] += answer == label
+                other[method] += label != "Other" and answer == "Other"
+    if not total:
+        print(f"❌ No bursts in {folder}")
+        return None
+    print(f"Accuracy on {total} recorded bursts ({frames_per_burst} frames each)")
+    for method in methods:
+        rejected = f"{other[method] / recyclable:6.1%}" if recyclable else "     -"
+        print(f"  {method:<12} {correct[method] / total:7.1%}   recyclables sent to Other {rejected}")
+    return {"bursts": total, "frames": frames_per_burst,
+            "accuracy": {m: correct[m] / total for m in methods},
+            "recyclable_as_other": {m: other[m] / recyclable if recyclable else None for m in methods}}
+
+
+def record(hw, folder, label, count, frames_per_burst):
+    hw.setup()
+    pixels = hw.led_strip(PIXEL_PIN, NUM_PIXELS, LED_BRIGHTNESS)
+    camera = CameraStream(lambda: hw.open_camera(CAMERA_CAPTURE_SIZE), slots=frames_per_burst + 2)
+    if not camera.start():
+        print("❌ No camera")
+        return
+    time.sleep(1.0)
+    kinds = ["can", "other", "plastic"]
+    for i in range(count):
+        if hw.NAME == "sim":
+            kind = label or kinds[i % 3]
+            hw.chamber.insert(kind)
+            time.sleep(0.3)
+        else:
+            kind = label
+            input(f"[{i + 1}/{count}] Put a {kind} in and press Enter ")
+        pixels.fill(COLOR_FLASH_WHITE); pixels.show()
+        t = time.monotonic() + camera.frame_interval() + 0.02
+        out = Path(folder) / kind / f"{time.strftime('%Y%m%d-%H%M%S')}-{i:04d}"
+        out.mkdir(parents=True, exist_ok=True)
+        for k in range(frames_per_burst):
+            frame = camera.ring.acquire_after(t, timeout=1.0)
+            if frame is None: break
+            with frame:
+                cv2.imwrite(str(out / f"{k}.png"), frame.image)
+                t = frame.stamp + 1e-6
+        pixels.fill(COLOR_OFF); pixels.show()
+        if hw.NAME == "sim": hw.chamber.clear()
+    camera.release()
+    print(f"💾 {count} bursts saved to {folder}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=MODEL_PATH)
+    ap.add_argument("--batch-sizes", default="1,2,3,4,6,8")
+    ap.add_argument("--repeats", type=int, default=10)
+    ap.add_argument("--bursts", help="Folder of recorded bursts to score")
+    ap.add_argument("--frames", type=int, default=3, help="Frames per burst to use / record")
+    ap.add_argument("--record", help="Record bursts into this folder instead")
+    ap.add_argument("--label", choices=("can", "other", "plastic"), help="Kind of item being recorded")
+    ap.add_argument("--count", type=int, default=30, help="Bursts to record")
+    ap.add_argument("--out", help="Write results as JSON here")
+    args = ap.parse_args()
+
+    hw = load_backend(os.getenv("HW_BACKEND", "pi"))
+    if args.record:
+        if hw.NAME != "sim" and not args.label:
+            ap.error("--label is required on the real machine")
+        return record(hw, args.record, args.label, args.count, args.frames)
+
+    classifier = Classifier(args.model, num_threads=AI_NUM_THREADS, make_interpreter=hw.interpreter)
+    results = {"model": args.model, "backend": hw.NAME}
+    sizes = [int(k) for k in args.batch_sizes.split(",")]
+    results["latency"] = batch_latency(classifier, sizes, args.repeats, CAMERA_CAPTURE_SIZE)
+    if args.bursts:
+        results["accuracy"] = burst_accuracy(classifier, args.bursts, args.frames)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
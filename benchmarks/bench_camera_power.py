@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from hardware.camera import CameraStream, open_v4l2_camera
+
+# ==========================================
+# 🔋 CAMERA DUTY-CYCLE BENCHMARK
+# ==========================================
+# Runs the capture stream through its power modes and reports, per capture
+# size: process CPU and SoC temperature at full rate / idle trickle / closed,
+# and time-to-first-frame for a warm restart (from idle) and a cold open.
+# Uses the USB camera when one is there, the simulated one otherwise.
+#
+#   python benchmarks/bench_camera_power.py --seconds 20
+#   python benchmarks/bench_camera_power.py --sim --sizes 640x480 320x240
+
+def soc_temperature():
+    try:
+        with open("/sys/class/thermal/thermal_zone0/temp") as f:
+            return int(f.read()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+def measure(seconds):
+    t0, c0, temp0 = time.monotonic(), time.process_time(), soc_temperature()
+    time.sleep(seconds)
+    cpu = (time.process_time() - c0) / (time.monotonic() - t0)
+    temp = soc_temperature()
+    return cpu, temp0, temp
+
+def first_frame(camera, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while camera.first_frame_s is None and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return camera.first_frame_s
+
+def fmt_temp(t0, t1):
+    return f"{t0:.1f} -> {t1:.1f} C" if t0 is not None and t1 is not None else "n/a"
+
+def run(open_capture, size, seconds):
+    camera = CameraStream(lambda: open_capture(size), idle_interval=1.0, release_after=3600)
+    t0 = time.monotonic()
+    if not camera.start():
+        print(f"{size}: no camera")
+        return
+    cold_open = first_frame(camera)
+    print(f"\n{size[0]}x{size[1]} (cold open + first frame {cold_open * 1000:.0f} ms, "
+          f"{time.monotonic() - t0:.2f}s incl. device open)")
+
+    for mode in ("full", "idle", "off"):
+        if mode == "idle": camera.idle()
+        if mode == "off": camera.release()
+        seq0 = camera.ring.last_seq
+        cpu, temp0, temp1 = measure(seconds)
+        fps = (camera.ring.last_seq - seq0) / seconds
+        print(f"  {mode:<5} CPU {cpu:6.1%} | {fps:5.1f} frames/s | SoC {fmt_temp(temp0, temp1)}")
+        if mode == "idle":
+            t0 = time.monotonic()
+            camera.start()
+            warm = first_frame(camera)
+            print(f"  warm restart -> first full-rate frame {warm * 1000:.0f} ms")
+            camera.idle()
+
+    time.sleep(0.2)
+    t0 = time.monotonic()
+    camera.start()
+    cold = first_frame(camera)
+    print(f"  cold restart -> first frame {(time.monotonic() - t0) * 1000:.0f} ms (device open included)")
+    camera.release()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=10.0, help="Time spent in each mode")
+    ap.add_argument("--sizes", nargs="+", default=["640x480", "320x240"])
+    ap.add_argument("--sim", action="store_true", help="Use the simulated camera")
+    args = ap.parse_args()
+
+    open_capture = lambda size: open_v4l2_camera(size=size)
+    if args.sim or open_v4l2_camera() is None:
+        from hardware import sim_backend
+        open_capture = sim_backend.open_camera
+        print("Using the simulated camera")
+
+    for size in args.sizes:
+        run(open_capture, tuple(int(v) for v in size.split("x")), args.seconds)
+
+if __name__ == "__main__":
+    main()
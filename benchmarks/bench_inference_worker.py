@@ -0,0 +1,170 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# ==========================================
+# 🏁 UI LATENCY DURING INFERENCE
+# ==========================================
+# Runs the app on the simulated machine twice, with the model in-process and
+# with INFERENCE_WORKER=1, scanning items back to back while a prober hits
+# the kiosk routes (/state and /) every few milliseconds. Reports the probe
+# latency while a classification is running vs while none is, and the
+# longest gap between camera frames.
+#
+# By default the simulated interpreter keeps the GIL for the whole invoke
+# (SIM_INFER_GIL=1), like a TFLite build that does not release it; with
+# --release-gil it sleeps instead and only the preprocessing competes.
+#
+#   python benchmarks/bench_inference_worker.py --scans 20 --out worker.json
+
+ROUTES = ("/state", "/")
+
+
+def percentiles(values):
+    if not values: return {"n": 0}
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+    return {"n": len(values), "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": values[-1]}
+
+
+# One mode, in this process; prints the results as the last line
+def run_child(args):
+    import requests
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    os.chdir(ROOT)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        app.classifier.ready.wait()     # loads on a thread since boot
+        app.setup_hardware()
+        app.outbox.start()
+
+        # Windows in which a classification was running
+        busy = []
+        classify_burst = app.classifier.classify_burst
+        def timed_classify(frames):
+            t0 = time.perf_counter()
+            try: return classify_burst(frames)
+            finally: busy.append((t0, time.perf_counter()))
+        app.classifier.classify_burst = timed_classify
+
+        # Frame stamps, for the longest gap the capture thread left
+        stamps = []
+        write = app.camera.ring.write
+        def stamped_write(*a, **kw):
+            ok = write(*a, **kw)
+            if ok: stamps.append(time.perf_counter())
+            return ok
+        app.camera.ring.write = stamped_write
+
+        server = make_server("127.0.0.1", 0, app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        probes = []
+        done = threading.Event()
+        def probe():
+            http = requests.Session()
+            while not done.is_set():
+                for route in ROUTES:
+                    t0 = time.perf_counter()
+                    http.get(f"{base}{route}")
+                    probes.append((route, t0, time.perf_counter()))
+                time.sleep(args.probe_interval)
+
+        http = requests.Session()
+        http.post(f"{base}/action/start")
+        stamps.clear()
+        prober = threading.Thread(target=probe)
+        prober.start()
+        t_start = time.perf_counter()
+        for i in range(args.scans):
+            app.scan_pipeline.wait_chute_clear()
+            app.hw.chamber.insert(("can", "plastic", "other")[i % 3])
+            time.sleep(args.rest)
+            http.post(f"{base}/action/scan", json={"wait": 10})
+        elapsed = time.perf_counter() - t_start
+        done.set()
+        prober.join()
+        http.post(f"{base}/action/stop")
+        server.shutdown()
+
+    def during(t0, t1):
+        return any(b0 < t1 and t0 < b1 for b0, b1 in busy)
+
+    routes = {}
+    for route in ROUTES:
+        hits = [(t0, t1) for r, t0, t1 in probes if r == route]
+        routes[route] = {
+            "inference": percentiles([(t1 - t0) * 1000 for t0, t1 in hits if during(t0, t1)]),
+            "idle": percentiles([(t1 - t0) * 1000 for t0, t1 in hits if not during(t0, t1)]),
+        }
+    gaps = [(b - a) * 1000 for a, b in zip(stamps, stamps[1:])]
+    print(json.dumps({
+        "routes": routes,
+        "classify_ms": percentiles([(b - a) * 1000 for a, b in busy]),
+        "max_frame_gap_ms": max(gaps, default=None),
+        "scans_per_min": args.scans * 60.0 / elapsed,
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scans", type=int, default=15)
+    ap.add_argument("--rest", type=float, default=0.3, help="Item comes to rest before the tap (s)")
+    ap.add_argument("--probe-interval", type=float, default=0.01, help="Pause between probe rounds (s)")
+    ap.add_argument("--release-gil", action="store_true", help="Simulated invoke sleeps instead of holding the GIL")
+    ap.add_argument("--out", help="Write results as JSON here")
+    ap.add_argument("--child", choices=("in-process", "worker"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return run_child(args)
+
+    results = {"config": vars(args)}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("in-process", "worker"):
+            env = dict(os.environ, HW_BACKEND="sim", OUTBOX_PATH=str(Path(tmp) / f"{mode}.db"),
+                       CALIBRATION_PATH=str(Path(tmp) / f"{mode}-calibration.json"),
+                       BASE_URL="http://127.0.0.1:9", INFERENCE_WORKER="1" if mode == "worker" else "0",
+                       SIM_INFER_GIL="0" if args.release_gil else "1")
+            cmd = [sys.executable, __file__, "--child", mode, "--scans", str(args.scans),
+                   "--rest", str(args.rest), "--probe-interval", str(args.probe_interval)]
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            if out.returncode:
+                print(out.stderr[-2000:])
+                return
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"Kiosk route latency (ms)          {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for route in ROUTES:
+        for mode in ("in-process", "worker"):
+            for phase in ("inference", "idle"):
+                s = results[mode]["routes"][route][phase]
+                if not s["n"]: continue
+                print(f"  {route:<6} {mode:<10} {phase:<10} {s['n']:5d} {s['p50']:8.1f} {s['p95']:8.1f} "
+                      f"{s['p99']:8.1f} {s['max']:8.1f}")
+    for mode in ("in-process", "worker"):
+        r = results[mode]
+        print(f"{mode:<10}: classify p50 {r['classify_ms']['p50']:.0f} ms, longest camera frame gap "
+              f"{r['max_frame_gap_ms']:.0f} ms, {r['scans_per_min']:.1f} scans/min")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
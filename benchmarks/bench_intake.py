@@ -0,0 +1,100 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cv2
+import numpy as np
+from fusion import chamber_signature
+from intake import IntakeDetector
+
+# ==========================================
+# 👀 INTAKE DETECTOR BENCHMARK
+# ==========================================
+# Feeds synthetic 640x480 camera frames (empty chamber with sensor noise, an
+# item sliding in, the item at rest, then empty again once sorted) through the
+# detector and reports CPU per frame and how long after the item stopped
+# moving the trigger fired. Frames can also come from a folder of images.
+# The items are split over --sessions, with enable(False) / enable() in
+# between like app.py does at every session end and start.
+#
+#   python benchmarks/bench_intake.py --items 50
+#   python benchmarks/bench_intake.py --items 20 --sessions 5
+#   python benchmarks/bench_intake.py --frames recorded_frames/   (sorted by name)
+
+def synthetic_frames(items, fps, rng):
+    h, w = 480, 640
+    empty = np.full((h, w, 3), 60, np.uint8)
+    cv2.rectangle(empty, (100, 80), (540, 420), (90, 90, 90), -1)
+
+    def noisy(img):
+        return cv2.add(img, rng.integers(0, 6, img.shape, dtype=np.uint8))
+
+    for _ in range(items):
+        for _ in range(int(fps * 1.0)):               # empty chamber
+            yield noisy(empty), None
+        slide = int(fps * 0.6)
+        for k in range(slide):                         # item sliding in
+            frame = empty.copy()
+            x = 100 + int(220 * k / slide)
+            cv2.rectangle(frame, (x, 150), (x + 90, 350), (30, 160, 220), -1)
+            yield noisy(frame), None
+        rest = empty.copy()
+        cv2.rectangle(rest, (320, 150), (410, 350), (30, 160, 220), -1)
+        yield noisy(rest), "rest"
+        for _ in range(int(fps * 1.5)):                # item at rest
+            yield noisy(rest), None
+
+def folder_frames(folder):
+    for path in sorted(Path(folder).iterdir()):
+        frame = cv2.imread(str(path))
+        if frame is not None: yield frame, None
+
+# Frames of each session in turn, the detector switched off and on between them
+def session_frames(detector, sessions):
+    for frames in sessions:
+        detector.enable()
+        yield from frames
+        detector.enable(False)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=30)
+    ap.add_argument("--sessions", type=int, default=3, help="Sessions the synthetic items are split over")
+    ap.add_argument("--fps", type=float, default=5.0, help="Detector poll rate")
+    ap.add_argument("--frames", help="Folder of recorded frames instead of synthetic ones")
+    args = ap.parse_args()
+
+    detector = IntakeDetector(ring=None, on_item=None, poll_hz=args.fps)
+    rng = np.random.default_rng(0)
+    if args.frames:
+        sessions = [folder_frames(args.frames)]
+    else:
+        per_session = [args.items // args.sessions + (k < args.items % args.sessions) for k in range(args.sessions)]
+        sessions = [synthetic_frames(n, args.fps, rng) for n in per_session if n]
+
+    triggers, rest_at, delays, n = 0, None, [], 0
+    cpu = 0.0
+    for frame, mark in session_frames(detector, sessions):
+        now = n / args.fps              # virtual clock at the poll rate
+        if mark == "rest": rest_at = now
+        t0 = time.thread_time()
+        fired = detector.process(chamber_signature(frame), now)
+        cpu += time.thread_time() - t0
+        n += 1
+        if fired:
+            triggers += 1
+            if rest_at is not None: delays.append(now - rest_at)
+            rest_at = None
+
+    per_frame_ms = cpu * 1000 / n
+    print(f"Frames            : {n}")
+    print(f"Triggers          : {triggers}" + ("" if args.frames else f" of {args.items} items in {len(sessions)} sessions"))
+    print(f"CPU per frame     : {per_frame_ms:.3f} ms  (signature + detector)")
+    print(f"Core share @{args.fps:g} Hz : {per_frame_ms * args.fps / 1000:.2%}")
+    if delays:
+        print(f"Rest -> trigger   : {sum(delays) / len(delays):.2f} s mean, {max(delays):.2f} s max")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import requests
+from werkzeug.serving import make_server
+from standin_backend import StandinBackend
+
+# ==========================================
+# 🏁 END-TO-END KIOSK BENCHMARK
+# ==========================================
+# Runs the real Flask app on the simulated machine (HW_BACKEND=sim) against
+# the stand-in backend and drives it over HTTP like the kiosk page does:
+# /action/start -> N x (insert item, /action/scan, poll the job) -> /action/stop
+# -> reset. Reports p50/p95/p99 per route ("scan result" is tap to answer),
+# items/minute per session and where the time goes inside a scan.
+# `--double-tap` sends a second /action/scan (its own scan id) right after
+# some taps, like an impatient user; it should join the first job.
+#
+#   python benchmarks/bench_kiosk.py --sessions 5 --items 10 --out bench_kiosk.json
+#   python benchmarks/bench_kiosk.py --compare old.json --out new.json
+
+STAGES = ("lights", "capture", "preprocess", "invoke", "record", "settle", "motor", "park")
+
+
+def percentiles(values):
+    if not values: return {"n": 0}
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+    return {"n": len(values), "p50": pick(50), "p95": pick(95), "p99": pick(99),
+            "mean": sum(values) / len(values), "max": values[-1]}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def add(self, name, ms):
+        with self.lock:
+            self.samples.setdefault(name, []).append(ms)
+
+    # Wraps `fn` so every call is timed under `name`
+    def timed(self, name, fn):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try: return fn(*args, **kwargs)
+            finally: self.add(name, (time.perf_counter() - t0) * 1000)
+        return wrapper
+
+    def summary(self):
+        with self.lock:
+            return {name: percentiles(v) for name, v in self.samples.items()}
+
+
+def instrument(app, inference, stages):
+    app.set_lights = stages.timed("lights", app.set_lights)
+    ring = app.camera.ring
+    ring.acquire_after = stages.timed("capture", ring.acquire_after)
+    inference.preprocess = stages.timed("preprocess", inference.preprocess)
+    active = app.classifier.active.classifier
+    models = [active.fast, active.full] if hasattr(active, "full") else [active]
+    for model in models:
+        # INFERENCE_WORKER=1: the interpreter is in the other process, time the whole call
+        if hasattr(model, "interpreter"):
+            model.interpreter.invoke = stages.timed("invoke", model.interpreter.invoke)
+        else:
+            model.classify_burst = stages.timed("invoke", model.classify_burst)
+    if app.recorder:
+        app.recorder.record = stages.timed("record", app.recorder.record)
+    app.get_settled_weight = stages.timed("settle", app.get_settled_weight)
+    pipe = app.scan_pipeline
+    pipe.clear_chute = stages.timed("motor", pipe.clear_chute)
+    pipe.park = stages.timed("park", pipe.park)
+
+
+def run_session(base, app, args, rng, routes, taps):
+    http = requests.Session()
+
+    def post(route):
+        t0 = time.perf_counter()
+        res = http.post(f"{base}{route}")
+        routes.add(route, (time.perf_counter() - t0) * 1000)
+        return res
+
+    # POST answers with the job, the result is long-polled like the kiosk does
+    def tap(session=http):
+        t0 = time.perf_counter()
+        res = session.post(f"{base}/action/scan", json={"scan_id": uuid.uuid4().hex})
+        routes.add("/action/scan", (time.perf_counter() - t0) * 1000)
+        job = res.json()
+        while job.get("status") in ("queued", "running"):
+            job = session.get(f"{base}/action/scan/{job['job_id']}", params={"wait": 5}).json()
+        routes.add("scan result", (time.perf_counter() - t0) * 1000)
+        return job
+
+    post("/action/start")
+    t_start = time.monotonic()
+    inserted = {"can": 0, "plastic": 0, "other": 0}
+    for _ in range(args.items):
+        # The user waits for the slapper, then drops the next item in
+        app.scan_pipeline.wait_chute_clear()
+        time.sleep(args.insert)
+        kind, _ = app.hw.chamber.insert(rng.choice(["can", "plastic", "other"]))
+        inserted[kind] += 1
+        time.sleep(args.rest)
+        if rng.random() < args.double_tap:
+            # Second tap on its own connection, like a second browser request
+            jobs = {}
+            first = threading.Thread(target=lambda: jobs.update(first=tap()))
+            again = threading.Thread(target=lambda: jobs.update(second=tap(requests.Session())))
+            first.start()
+            time.sleep(args.tap_gap)
+            again.start()
+            first.join(); again.join()
+            taps["double"] += 1
+            taps["joined" if jobs["first"]["job_id"] == jobs["second"]["job_id"] else "separate"] += 1
+        else:
+            tap()
+    state = http.get(f"{base}/state").json()
+    post("/action/stop")
+    elapsed = time.monotonic() - t_start
+    post("/action/reset")
+
+    counted = state["plastic"] + state["cans"] + state["other"]
+    return {
+        "items": args.items,
+        "counted": counted,
+        "inserted": inserted,
+        "seconds": elapsed,
+        "items_per_min": args.items * 60.0 / elapsed,
+    }
+
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(old, new):
+    print(f"\nvs {old.get('git_rev')}  (p50 / p95, ms)")
+    for group in ("routes", "stages"):
+        for name, stats in new[group].items():
+            before = old.get(group, {}).get(name)
+            if not before or not stats.get("n") or not before.get("n"): continue
+            delta = (stats["p95"] / before["p95"] - 1) * 100 if before["p95"] else 0.0
+            print(f"  {name:<14} {before['p50']:8.1f} / {before['p95']:8.1f} -> "
+                  f"{stats['p50']:8.1f} / {stats['p95']:8.1f}  ({delta:+.0f}% p95)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=5)
+    ap.add_argument("--items", type=int, default=10, help="Items per session")
+    ap.add_argument("--insert", type=float, default=0.5, help="Time for the user to drop the next item in (s)")
+    ap.add_argument("--rest", type=float, default=0.3, help="Item comes to rest before the tap (s)")
+    ap.add_argument("--double-tap", type=float, default=0.0, help="Share of scans tapped twice")
+    ap.add_argument("--tap-gap", type=float, default=0.05, help="Seconds between the two taps")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="Write results as JSON here")
+    ap.add_argument("--compare", help="Earlier JSON results to compare against")
+    ap.add_argument("--no-recorder", action="store_true", help="Run without the scan recorder")
+    ap.add_argument("--verbose", action="store_true", help="Keep the app's own log lines")
+    args = ap.parse_args()
+
+    backend = StandinBackend().start()
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update({
+        "HW_BACKEND": "sim",
+        "BASE_URL": backend.url.rsplit("/api/", 1)[0],
+        "OUTBOX_PATH": str(Path(tmp.name) / "outbox.db"),
+        "CALIBRATION_PATH": str(Path(tmp.name) / "calibration.json"),    # the sim tare must not land in the repo
+        "RECORDER_DIR": "" if args.no_recorder else str(Path(tmp.name) / "recordings"),
+    })
+    os.chdir(ROOT)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    with quiet:
+        import app
+        import inference
+        app.classifier.ready.wait()     # loads on a thread since boot
+        app.setup_hardware()
+        app.outbox.start()
+        if app.recorder: app.recorder.start()
+        app.hw.chamber.rng.seed(args.seed)
+
+        stages, routes = Recorder(), Recorder()
+        instrument(app, inference, stages)
+        server = make_server("127.0.0.1", 0, app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        rng = random.Random(args.seed)
+        taps = {"double": 0, "joined": 0, "separate": 0}
+        sessions = [run_session(base, app, args, rng, routes, taps) for _ in range(args.sessions)]
+        server.shutdown()
+
+    results = {
+        "git_rev": git_rev(),
+        "when": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "config": vars(args) | {"pipelined": app.PIPELINE_ENABLED, "model": app.MODEL_PATH},
+        "routes": routes.summary(),
+        "stages": {name: s for name, s in stages.summary().items() if name in STAGES},
+        "sessions": sessions,
+        "items_per_min": percentiles([s["items_per_min"] for s in sessions]),
+        "double_tap": taps | {"overcounted": sum(max(0, s["counted"] - s["items"]) for s in sessions)},
+        "camera_dropped": app.camera.ring.dropped,
+        "recorder": app.recorder.stats() if app.recorder else None,
+    }
+
+    print(f"Route latency (ms)      {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, s in results["routes"].items():
+        print(f"  {name:<20} {s['n']:5d} {s['p50']:8.1f} {s['p95']:8.1f} {s['p99']:8.1f}")
+    print(f"Scan stages (ms)")
+    for name in STAGES:
+        s = results["stages"].get(name)
+        if s: print(f"  {name:<20} {s['n']:5d} {s['p50']:8.1f} {s['p95']:8.1f} {s['p99']:8.1f}")
+    ipm = results["items_per_min"]
+    print(f"Items/min per session : p50 {ipm['p50']:.1f}, min {min(s['items_per_min'] for s in sessions):.1f}")
+    if taps["double"]:
+        dt = results["double_tap"]
+        print(f"Double taps           : {dt['double']} ({dt['joined']} joined the first scan, "
+              f"{dt['separate']} scanned separately, {dt['overcounted']} items over-counted)")
+
+    if app.recorder:
+        r = results["recorder"]
+        print(f"Recorder              : {r['recorded']} scans, {r['dropped']} dropped, {r['disk_mb']:.2f} MB")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), results)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved {args.out}")
+    backend.stop()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from outbox import Outbox
+from standin_backend import StandinBackend
+
+# ==========================================
+# 📮 OUTBOX THROUGHPUT / RECOVERY BENCHMARK
+# ==========================================
+# 1. Throughput: N sessions (START + STOP) journaled at once, time to drain.
+# 2. Outage: the backend goes down, sessions keep coming, then it comes back;
+#    reports how long after recovery the backlog is empty and checks every
+#    STOP was delivered with the remote transaction id.
+#
+#   python benchmarks/bench_outbox.py --sessions 200 --outage 5
+
+def wait_drained(outbox, timeout):
+    deadline = time.monotonic() + timeout
+    while outbox.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return outbox.pending() == 0
+
+def session(outbox, i):
+    txn = f"OFF-bench-{i}"
+    outbox.enqueue("START", txn, {"action": "START", "binId": "BENCH"})
+    outbox.enqueue("STOP", txn, {"action": "STOP", "transactionId": txn, "plastic": 1, "cans": 1})
+    return txn
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=200)
+    ap.add_argument("--outage", type=float, default=5.0, help="Seconds the backend is down")
+    ap.add_argument("--latency", type=float, default=0.0, help="Backend response time (s)")
+    args = ap.parse_args()
+
+    backend = StandinBackend(latency=args.latency).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(str(Path(tmp) / "outbox.db"), backend.url, "bench", max_backoff=2.0)
+
+        # --- Kiosk-side cost of journaling ---
+        t0 = time.perf_counter()
+        txns = [session(outbox, i) for i in range(args.sessions)]
+        enqueue_ms = (time.perf_counter() - t0) * 1000 / (2 * args.sessions)
+
+        # --- Throughput ---
+        t0 = time.perf_counter()
+        outbox.start()
+        wait_drained(outbox, 120)
+        drain = time.perf_counter() - t0
+        print(f"Enqueue          : {enqueue_ms:.3f} ms/event (kiosk route cost)")
+        print(f"Online drain     : {2 * args.sessions / drain:.0f} events/s")
+
+        # --- Outage + recovery ---
+        backend.down = True
+        more = [session(outbox, args.sessions + i) for i in range(args.sessions)]
+        time.sleep(args.outage)
+        backlog = outbox.pending()
+        backend.down = False
+        t0 = time.perf_counter()
+        drained = wait_drained(outbox, 120)
+        print(f"Outage backlog   : {backlog} events after {args.outage:.0f}s down")
+        print(f"Recovery         : {time.perf_counter() - t0:.2f}s to empty the backlog" + ("" if drained else " (timed out)"))
+
+        stops = [p for _, p in backend.events if p.get("action") == "STOP"]
+        remote = sum(1 for p in stops if p["transactionId"].startswith("TXN-"))
+        resolved = sum(1 for t in txns + more if outbox.resolve(t)[0])
+        print(f"Delivered        : {backend.count('START')} START / {len(stops)} STOP, "
+              f"{remote} STOP with remote id, {resolved} sessions reconciled")
+    backend.stop()
+
+if __name__ == "__main__":
+    main()
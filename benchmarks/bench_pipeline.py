@@ -0,0 +1,59 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from scan_pipeline import ScanPipeline
+
+# ==========================================
+# ⏱️ PIPELINE THROUGHPUT BENCHMARK
+# ==========================================
+# Replays the timings of one scan cycle with sleeps (no hardware needed) and
+# reports items/minute with and without the pipelined actuator worker.
+#
+#   python benchmarks/bench_pipeline.py --items 20
+#   python benchmarks/bench_pipeline.py --items 20 --speed 10   (10x faster wall clock)
+
+def run(items, pipelined, t):
+    def sleep(s): time.sleep(s / t["speed"])
+
+    pipeline = ScanPipeline(
+        clear_chute=lambda label: sleep(t["gate"] + t["slap"] + t["slap_back"]),
+        park=lambda label: sleep(t["park"]),
+        pipelined=pipelined,
+        chute_timeout=60,
+    )
+
+    start = time.monotonic()
+    last = None
+    for _ in range(items):
+        # Like the kiosk: the user waits for the slapper, then drops the next item in
+        pipeline.wait_chute_clear()
+        sleep(t["insert"])
+        sleep(t["flash"] + t["infer"])
+        last = pipeline.submit("Plastic", 10.0)
+    last.wait()
+    elapsed = (time.monotonic() - start) * t["speed"]
+    return items * 60.0 / elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=20)
+    ap.add_argument("--speed", type=float, default=1.0, help="Divide every sleep by this factor")
+    ap.add_argument("--insert", type=float, default=0.5, help="User insert time per item (s)")
+    ap.add_argument("--infer", type=float, default=0.35, help="Inference time per item (s)")
+    args = ap.parse_args()
+
+    timings = {
+        "speed": args.speed, "insert": args.insert, "flash": 0.3, "infer": args.infer,
+        "gate": 0.5, "slap": 0.6, "slap_back": 0.4, "park": 0.5,
+    }
+
+    serial = run(args.items, False, timings)
+    piped = run(args.items, True, timings)
+    print(f"Sequential : {serial:5.1f} items/min")
+    print(f"Pipelined  : {piped:5.1f} items/min  ({(piped / serial - 1) * 100:+.0f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import cv2
+import numpy as np
+from evaluate import list_images
+from inference import Classifier, prepare
+
+# ==========================================
+# ⏱️ FP32 vs INT8 BENCHMARK
+# ==========================================
+# Runs every image of a held-out folder (<folder>/<can|other|plastic>/, the
+# same listing as evaluate.py) through each model with the live
+# preprocessing and reports latency, top-1 agreement with the first model
+# and accuracy.
+#
+#   python benchmarks/bench_quantized.py --images /data/test \
+#       --model fp32=model/ai-model-fp32-v2.tflite --model int8=model/ai-model-int8-v2.tflite
+
+# (BGR frame, class index) of every image evaluate.py would score
+def load_images(folder):
+    items = []
+    for path, index in list_images(folder):
+        frame = cv2.imread(path)
+        if frame is not None: items.append((frame, index))
+    return items
+
+# One frame through inference.prepare() and the model, like a live scan
+def classify(clf, frame):
+    return clf.classify_prepared(prepare(frame, (clf.model_w, clf.model_h), clf.color)[None])[0]
+
+def run_model(path, images, threads, warmup=3):
+    clf = Classifier(path, num_threads=threads)
+    for frame, _ in images[:warmup]:
+        classify(clf, frame)
+    latencies, preds = [], []
+    for frame, _ in images:
+        t0 = time.perf_counter()
+        probs = classify(clf, frame)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        preds.append(int(np.argmax(probs)))
+    return latencies, preds
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", required=True)
+    ap.add_argument("--model", action="append", required=True, help="name=path, first one is the reference")
+    ap.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+
+    images = load_images(args.images)
+    if not images: sys.exit(f"No images under {args.images}/<can|other|plastic>")
+    truths = [t for _, t in images]
+
+    reference = None
+    print(f"{len(images)} images, {args.threads} threads\n")
+    print(f"{'model':<8} {'mean ms':>8} {'p50':>7} {'p95':>7} {'agree':>7} {'acc':>7}")
+    for spec in args.model:
+        name, path = spec.split("=", 1)
+        latencies, preds = run_model(path, images, args.threads)
+        reference = reference or preds
+        agree = sum(a == b for a, b in zip(preds, reference)) / len(preds)
+        acc = sum(p == t for p, t in zip(preds, truths)) / len(preds)
+        p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+        print(f"{name:<8} {statistics.mean(latencies):8.1f} {statistics.median(latencies):7.1f} "
+              f"{p95:7.1f} {agree:7.1%} {acc:7.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+# ==========================================
+# 🏁 STARTUP: IMPORT TIME, BOOT TO KIOSK, RSS
+# ==========================================
+# 1. Import cost of the heavy modules, each in a fresh interpreter: wall time
+#    and resident memory added.
+# 2. `python app.py` from cold, per mode (TFLITE_RUNTIME:blocking|background):
+#    time until the kiosk page answers, until /state says the model is READY,
+#    and the resident memory (current and peak) at that point.
+#
+#   python benchmarks/bench_startup.py --model model/ai-model-fp32-v2.tflite
+#   HW_BACKEND=sim python benchmarks/bench_startup.py --model /tmp/model.tflite --runs 3 --out startup.json
+
+MODULES = ("numpy", "cv2", "flask", "qrcode", "tflite_runtime.interpreter", "ai_edge_litert.interpreter",
+           "tensorflow.lite.python.interpreter", "app")
+MODES = ("tensorflow:blocking", "tensorflow:background", "auto:blocking", "auto:background")
+
+CHILD = """
+import json, sys, time
+def rss():
+    with open("/proc/self/status") as f:
+        return {l.split(":")[0]: int(l.split()[1]) for l in f if l.startswith(("VmRSS", "VmHWM"))}
+before = rss()
+t0 = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+    error = None
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+seconds = time.perf_counter() - t0
+after = rss()
+print(json.dumps({"seconds": seconds, "rss_mb": (after["VmRSS"] - before["VmRSS"]) / 1024, "error": error}))
+"""
+
+
+def proc_memory(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = {l.split(":")[0]: int(l.split()[1]) for l in f if l.startswith(("VmRSS", "VmHWM"))}
+        return fields["VmRSS"] / 1024, fields["VmHWM"] / 1024
+    except (OSError, KeyError):
+        return None, None
+
+
+def import_costs(env):
+    results = {}
+    for module in MODULES:
+        out = subprocess.run([sys.executable, "-c", CHILD, module], env=env, cwd=ROOT, capture_output=True, text=True)
+        try:
+            results[module] = json.loads(out.stdout.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            results[module] = {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "no output"}
+    return results
+
+
+def get(url, timeout=0.5):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            return r.status, r.read()
+    except OSError:
+        return None, None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def boot(env, runtime, load, timeout):
+    port = free_port()
+    env = dict(env, PORT=str(port), TFLITE_RUNTIME=runtime, MODEL_LOAD_BACKGROUND="1" if load == "background" else "0")
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "app.py"], env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    page_s = ready_s = status = None
+    try:
+        while time.perf_counter() - t0 < timeout and proc.poll() is None:
+            if page_s is None:
+                if get(f"{base}/")[0] == 200: page_s = time.perf_counter() - t0
+            if page_s is not None:
+                code, body = get(f"{base}/state")
+                status = json.loads(body).get("model_status") if code == 200 else None
+                if status in ("READY", "ERROR"):
+                    ready_s = time.perf_counter() - t0
+                    break
+            time.sleep(0.02)
+        rss, peak = proc_memory(proc.pid)
+    finally:
+        proc.terminate()
+        try: proc.wait(5)
+        except subprocess.TimeoutExpired: proc.kill()
+    if proc.returncode not in (None, 0, -15) and page_s is None:
+        return {"error": f"app exited with {proc.returncode}"}
+    return {"page_s": page_s, "ready_s": ready_s, "model_status": status, "rss_mb": rss, "peak_rss_mb": peak}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default=os.getenv("MODEL_PATH", "model/ai-model-fp32-v2.tflite"))
+    ap.add_argument("--modes", default=",".join(MODES), help="runtime:blocking|background, comma separated")
+    ap.add_argument("--runs", type=int, default=1, help="Boots per mode; the median is shown")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--out", help="Write results as JSON here")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-startup-")
+    env = dict(os.environ, MODEL_PATH=str(Path(args.model).resolve()), MODEL_REGISTRY=str(Path(tmp) / "registry"),
+               OUTBOX_PATH=str(Path(tmp) / "outbox.db"), CALIBRATION_PATH=str(Path(tmp) / "calibration.json"),
+               BASE_URL="http://127.0.0.1:9", TF_CPP_MIN_LOG_LEVEL="3")
+    backend = env.setdefault("HW_BACKEND", "pi")
+    results = {"model": args.model, "backend": backend}
+
+    try:
+        run(args, env, results)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved {args.out}")
+
+
+def run(args, env, results):
+    backend = results["backend"]
+    results["imports"] = import_costs(env)
+    print(f"Import cost, fresh interpreter each ({backend} backend)")
+    print(f"  {'module':<36} {'seconds':>8} {'+RSS MB':>8}")
+    for module, r in results["imports"].items():
+        if r.get("error"):
+            print(f"  {module:<36} {'-':>8} {'-':>8}  ({r['error'][:60]})")
+        else:
+            print(f"  {module:<36} {r['seconds']:8.2f} {r['rss_mb']:8.0f}")
+
+    results["boot"] = {}
+    print(f"\nBoot to kiosk ({args.model}, median of {args.runs})")
+    print(f"  {'mode':<22} {'page s':>8} {'ready s':>8} {'RSS MB':>8} {'peak MB':>8}")
+    for mode in args.modes.split(","):
+        runtime, load = mode.split(":")
+        runs = [boot(env, runtime, load, args.timeout) for _ in range(args.runs)]
+        results["boot"][mode] = runs
+        ok = [r for r in runs if not r.get("error") and r["page_s"] is not None]
+        if not ok:
+            print(f"  {mode:<22} failed ({runs[0].get('error') or 'no answer'})")
+            continue
+        def median(key):
+            values = sorted(r[key] for r in ok if r[key] is not None)
+            return values[len(values) // 2] if values else float("nan")
+        print(f"  {mode:<22} {median('page_s'):8.2f} {median('ready_s'):8.2f} {median('rss_mb'):8.0f} {median('peak_rss_mb'):8.0f}"
+              + ("" if ok[0]["model_status"] == "READY" else f"  (model {ok[0]['model_status']})"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import requests
+from flask import Flask, Response, jsonify
+from werkzeug.serving import make_server
+from state_stream import StateStream
+
+# ==========================================
+# 📡 POLLING vs PUSH BENCHMARK
+# ==========================================
+# Serves /state and /events the same way app.py does, changes the state at
+# random moments (like scans landing) and measures, for a 1 s poller and an
+# SSE client, how long each change took to reach the client and how many
+# HTTP requests each made.
+#
+#   python benchmarks/bench_state_push.py --seconds 30
+
+def serve(stream, state):
+    app = Flask(__name__)
+
+    @app.route('/state')
+    def get_state(): return jsonify(state)
+
+    @app.route('/events')
+    def get_events(): return Response(stream.sse(heartbeat=5), mimetype="text/event-stream")
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def poller(base, seen, stop, interval=1.0):
+    requests_made, last = 0, None
+    session = requests.Session()
+    while not stop.is_set():
+        seq = session.get(f"{base}/state").json()["scan_seq"]
+        requests_made += 1
+        if seq != last: seen.setdefault(seq, time.monotonic())
+        last = seq
+        stop.wait(interval)
+    return requests_made
+
+def sse_client(base, seen, stop):
+    with requests.get(f"{base}/events", stream=True) as res:
+        for line in res.iter_lines(decode_unicode=True):
+            if stop.is_set(): break
+            if line.startswith("data:"):
+                data = json.loads(line[5:])
+                if "scan_seq" in data: seen.setdefault(data["scan_seq"], time.monotonic())
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=30)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    state = {"status": "RUNNING", "scan_seq": 0, "plastic": 0}
+    stream = StateStream()
+    stream.publish(state)
+    server, base = serve(stream, state)
+
+    stop = threading.Event()
+    polled, pushed, result = {}, {}, {}
+    t_poll = threading.Thread(target=lambda: result.update(polls=poller(base, polled, stop)))
+    t_push = threading.Thread(target=sse_client, args=(base, pushed, stop), daemon=True)
+    t_poll.start(); t_push.start()
+    time.sleep(0.5)
+
+    rng = random.Random(args.seed)
+    changed_at = {}
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        time.sleep(rng.uniform(0.5, 3.0))
+        state["scan_seq"] += 1
+        state["plastic"] += 1
+        changed_at[state["scan_seq"]] = time.monotonic()
+        stream.publish(state)
+    time.sleep(1.5)
+    stop.set()
+    t_poll.join()
+
+    def lag(seen):
+        return [(seen[k] - t) * 1000 for k, t in changed_at.items() if k in seen]
+
+    for name, seen, reqs in (("poll 1s", polled, result["polls"]), ("SSE", pushed, 1)):
+        lags = lag(seen)
+        print(f"{name:<8} requests {reqs:5d} ({reqs / args.seconds:.2f}/s) | "
+              f"time-to-client mean {statistics.mean(lags):7.1f} ms, max {max(lags):7.1f} ms | "
+              f"{len(lags)}/{len(changed_at)} changes seen")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
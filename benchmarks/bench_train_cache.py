@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import train
+
+# ==========================================
+# 🏁 TRAINING EPOCHS: IMAGE FOLDERS VS CACHE
+# ==========================================
+# Same model, same data, two input pipelines:
+#   folders = the notebook's image_dataset_from_directory, every JPEG decoded
+#             and resized again each epoch
+#   cache   = train.py's memory-mapped uint8 shards with a prefetch thread
+# For each one it times a pass over the training set alone (input pipeline
+# only) and the head-only and fine-tuning epochs. The one-off cache build is
+# reported separately. The first epoch of a phase includes graph tracing, so
+# the table shows it apart from the median of the others.
+#
+#   python benchmarks/bench_train_cache.py /data/3types-trash --epochs 3
+#   python benchmarks/bench_train_cache.py /data/3types-trash --preset tiny --weights none --out cache.json
+
+
+def input_pass(dataset):
+    t0 = time.perf_counter()
+    n = sum(int(images.shape[0]) for images, _ in dataset)
+    return n / (time.perf_counter() - t0)
+
+
+def epochs_summary(seconds):
+    rest = seconds[1:]
+    return {"first": seconds[0], "median": statistics.median(rest) if rest else seconds[0], "all": seconds}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("data", help="Folder with augmented_trainset/, val/ and test/")
+    ap.add_argument("--preset", choices=tuple(train.PRESETS), default="full")
+    ap.add_argument("--epochs", type=int, default=2, help="Epochs per phase")
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--weights", default="imagenet", help="Backbone weights: imagenet, a .h5 file, or none")
+    ap.add_argument("--out", help="Write results as JSON here")
+    args = ap.parse_args()
+
+    preset = train.PRESETS[args.preset]
+    size = preset["size"]
+    weights = None if args.weights == "none" else args.weights
+    # Early stopping and LR drops off: every run does the same epochs
+    phases = {name: dict(preset[name], patience=10 ** 6, reduce_lr=False) for name in ("head", "fine")}
+    results = {"preset": args.preset, "size": list(size), "batch": args.batch, "epochs": args.epochs}
+
+    cache_dir = tempfile.mkdtemp(prefix="train-cache-")
+    try:
+        # Cold build, before TensorFlow is loaded (the decode pool forks)
+        t0 = time.perf_counter()
+        splits, _ = train.build_cache(args.data, cache_dir, size, args.workers)
+        results["cache_build_seconds"] = time.perf_counter() - t0
+        results["cache_mb"] = sum(f.stat().st_size for f in Path(cache_dir).rglob("*.npy")) / 1e6
+        results["images"] = {split: len(s) for split, s in splits.items()}
+
+        pipelines = {
+            "folders": lambda: train.directory_datasets(args.data, size, args.batch),
+            "cache": lambda: {split: train.BatchStream(s, args.batch, shuffle=split == "train").dataset()
+                              for split, s in splits.items()},
+        }
+        for name, make in pipelines.items():
+            print(f"\n=== {name} ===")
+            datasets = make()
+            run = {"input_images_per_s": input_pass(datasets["train"])}
+            model, base = train.build_model(preset, weights)
+            run["head"] = epochs_summary(train.fit_phase(model, phases["head"], datasets["train"], datasets["val"], args.epochs)["epoch_seconds"])
+            train.unfreeze(base, preset["fine"]["layers"])
+            run["fine"] = epochs_summary(train.fit_phase(model, phases["fine"], datasets["train"], datasets["val"], args.epochs)["epoch_seconds"])
+            results[name] = run
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"\n{sum(results['images'].values())} images at {size[0]}x{size[1]}, batch {args.batch}; "
+          f"cache built once in {results['cache_build_seconds']:.1f} s ({results['cache_mb']:.0f} MB)")
+    print(f"  {'':<8} {'input img/s':>12} {'head 1st':>9} {'head s/ep':>10} {'fine 1st':>9} {'fine s/ep':>10}")
+    for name in pipelines:
+        r = results[name]
+        print(f"  {name:<8} {r['input_images_per_s']:12.0f} {r['head']['first']:9.1f} {r['head']['median']:10.1f} "
+              f"{r['fine']['first']:9.1f} {r['fine']['median']:10.1f}")
+    for phase in ("head", "fine"):
+        saved = results["folders"][phase]["median"] - results["cache"][phase]["median"]
+        print(f"{phase}: cache saves {saved:.1f} s per epoch ({saved / results['folders'][phase]['median']:.0%})")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2))
+        print(f"\nSaved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import numpy as np
+from inference import Classifier
+from bench_quantized import classify, load_images
+
+# ==========================================
+# 🪜 CASCADE THRESHOLD SWEEP
+# ==========================================
+# Both stages run once on every labelled image (folder/<can|other|plastic>/*).
+# The sweep then replays the cascade rule offline: stage 1 always runs, stage 2
+# only when stage 1's top probability is below the threshold.
+#
+#   python benchmarks/eval_cascade.py --images /data/test \
+#       --fast model/ai-model-tiny-v1.tflite --full model/ai-model-fp32-v2.tflite
+
+def timed_run(clf, images):
+    for frame, _ in images[:3]: classify(clf, frame)   # warm up
+    out = []
+    for frame, _ in images:
+        t0 = time.perf_counter()
+        probs = classify(clf, frame)
+        out.append(((time.perf_counter() - t0) * 1000, np.asarray(probs)))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", required=True)
+    ap.add_argument("--fast", required=True)
+    ap.add_argument("--full", required=True)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--thresholds", default="0.5,0.6,0.7,0.8,0.85,0.9,0.95,0.98,0.99")
+    args = ap.parse_args()
+
+    images = load_images(args.images)
+    if not images: sys.exit(f"No labelled images under {args.images}/<can|other|plastic>")
+    truth = [t for _, t in images]
+
+    fast = timed_run(Classifier(args.fast, num_threads=args.threads), images)
+    full = timed_run(Classifier(args.full, num_threads=args.threads), images)
+
+    full_ms = statistics.mean(ms for ms, _ in full)
+    full_acc = statistics.mean(int(np.argmax(p)) == t for (_, p), t in zip(full, truth))
+    print(f"{len(images)} images\n")
+    print(f"{'threshold':>9} {'mean ms':>8} {'full runs':>9} {'accuracy':>9}")
+    print(f"{'full only':>9} {full_ms:8.1f} {1:9.0%} {full_acc:9.1%}")
+
+    for threshold in (float(x) for x in args.thresholds.split(",")):
+        latencies, correct, fallbacks = [], 0, 0
+        for (f_ms, f_probs), (m_ms, m_probs), t in zip(fast, full, truth):
+            if f_probs.max() >= threshold:
+                latencies.append(f_ms)
+                correct += int(np.argmax(f_probs)) == t
+            else:
+                fallbacks += 1
+                latencies.append(f_ms + m_ms)
+                correct += int(np.argmax(m_probs)) == t
+        n = len(images)
+        print(f"{threshold:9.2f} {statistics.mean(latencies):8.1f} {fallbacks / n:9.0%} {correct / n:9.1%}")
+
+if __name__ == "__main__":
+    main()
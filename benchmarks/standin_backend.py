@@ -0,0 +1,68 @@
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==========================================
+# 🧪 STAND-IN KIOSK BACKEND
+# ==========================================
+# A local replacement for the /api/machine/kiosk endpoint: START returns a
+# transactionId + claimSecret, STOP returns success. It can be switched
+# "down" (503) or made slow to test outages and recovery.
+#
+#   backend = StandinBackend().start()
+#   api_url = backend.url
+#   backend.down = True
+
+class StandinBackend:
+    def __init__(self, port=0, latency=0.0):
+        self.latency = latency
+        self.down = False
+        self.events = []
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, like the real server
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if backend.latency: time.sleep(backend.latency)
+                if backend.down:
+                    return self._reply(503, {"error": "down"})
+                payload = json.loads(body or b"{}")
+                with backend.lock:
+                    backend.events.append((time.monotonic(), payload))
+                if payload.get("action") == "START":
+                    n = next(backend.ids)
+                    return self._reply(200, {"transactionId": f"TXN-{n}", "claimSecret": f"secret-{n}"})
+                return self._reply(200, {"success": True})
+
+            def _reply(self, code, data):
+                out = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/machine/kiosk"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def count(self, action=None):
+        with self.lock:
+            return sum(1 for _, p in self.events if action is None or p.get("action") == action)
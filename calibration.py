@@ -0,0 +1,39 @@
+import json
+import os
+import time
+
+# ==========================================
+# 📐 CALIBRATION STORE
+# ==========================================
+# Per-machine measurements live in one JSON file with a section per device,
+# e.g. {"servos": {"deg_per_s": {"0": 310.0, "15": 280.0}, "updated_at": ...},
+#       "scale": {"reference_unit": -1068.7, "offset": 83250.0, ...}}.
+# The calibration scripts in hardware/ write it, app.py reads it at boot.
+# Writes go to a temp file first so a power cut never leaves half a file.
+
+class CalibrationStore:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def section(self, name):
+        return self.load().get(name, {})
+
+    # Merges `values` into the section, keys not given are kept
+    def save(self, name, values):
+        data = self.load()
+        data[name] = dict(data.get(name, {}), **values, updated_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        return data[name]
@@ -0,0 +1,168 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from inference import CLASS_LABELS, Classifier, label_for, prepare
+
+# ==========================================
+# 📊 OFFLINE EVALUATION
+# ==========================================
+# Scores a model on a folder of labelled images through the exact path the
+# machine uses: inference.prepare() (BGR -> model size -> RGB) and the same
+# Classifier input handling. Unlike image_dataset_from_directory in the
+# notebook, this catches train/serve skew. A process pool decodes and
+# resizes while the interpreter runs batches. Reports throughput, accuracy
+# and the confusion matrix.
+#
+#   <folder>/can/*.jpg, <folder>/other/*.jpg, <folder>/plastic/*.jpg   (same layout as training)
+#
+#   python evaluate.py /data/3types-trash/test
+#   python evaluate.py /data/test --model model/ai-model-int8-v2.tflite --batch 16 --workers 3
+#   python evaluate.py /data/test --version v4 --out eval-v4.json
+#   HW_BACKEND=sim python evaluate.py /tmp/bursts
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# (path, class index) of every image under <folder>/<class>/, nested folders
+# included; train.py builds its cache from the same list
+def list_images(folder):
+    items = []
+    for index, label in enumerate(CLASS_LABELS):
+        sub = Path(folder) / label.lower()
+        if sub.is_dir():
+            items += [(str(p), index) for p in sorted(sub.rglob("*")) if p.suffix.lower() in IMAGE_SUFFIXES]
+    return items
+
+
+# Pool worker: one image file -> model pixels (None if it does not decode)
+def load(job):
+    path, size, color = job
+    image = cv2.imread(path)
+    return None if image is None else prepare(image, size, color)
+
+
+# A registry version (with its metadata) or a model file -> (path, Classifier options)
+def resolve_model(name, registry_root):
+    meta = {"classes": None, "color": "rgb", "input_range": (0.0, 255.0)}
+    if not os.path.exists(name):
+        from model_registry import ModelRegistry
+        registry = ModelRegistry(registry_root)
+        if name in registry.versions():
+            meta.update({k: v for k, v in registry.meta(name).items() if k in meta})
+            return registry.model_path(name), meta
+    return name, meta
+
+
+# Decode pool plus one Classifier per {name: (path, options)}. The pool comes
+# first: forked decoders must not inherit the interpreters' threads.
+def open_classifiers(models, workers, threads):
+    pool = multiprocessing.Pool(workers)
+    from hardware.backend import load_backend
+    hw = load_backend(os.getenv("HW_BACKEND", "pi"))
+    classifiers = {name: Classifier(path, num_threads=threads, make_interpreter=hw.interpreter, **meta)
+                   for name, (path, meta) in models.items()}
+    return pool, classifiers
+
+
+def confusion_report(confusion, seconds, n, failed):
+    print(f"\n{n} images in {seconds:.1f} s = {n / seconds:.1f} images/s" + (f" ({failed} unreadable)" if failed else ""))
+    print(f"Accuracy {np.trace(confusion) / max(1, confusion.sum()):.1%}\n")
+    width = max(len(l) for l in CLASS_LABELS) + 2
+    print(" " * (width + 8) + "predicted")
+    print(f"{'actual':<{width}}" + "".join(f"{l:>{width}}" for l in CLASS_LABELS) + f"{'recall':>9}")
+    for i, label in enumerate(CLASS_LABELS):
+        row = confusion[i]
+        recall = row[i] / row.sum() if row.sum() else float("nan")
+        print(f"{label:<{width}}" + "".join(f"{v:>{width}d}" for v in row) + f"{recall:9.1%}")
+    precision = [confusion[i, i] / confusion[:, i].sum() if confusion[:, i].sum() else float("nan")
+                 for i in range(len(CLASS_LABELS))]
+    print(f"{'precision':<{width}}" + "".join(f"{p:>{width}.1%}" for p in precision))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", help="Folder with can/ other/ plastic/ subfolders")
+    ap.add_argument("--model", default=os.getenv("MODEL_PATH", "model/ai-model-fp32-v2.tflite"))
+    ap.add_argument("--version", help="Registry version to score instead of --model (uses its metadata)")
+    ap.add_argument("--registry", default=os.getenv("MODEL_REGISTRY", "model/registry"))
+    ap.add_argument("--batch", type=int, default=8, help="Images per invoke")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Decode processes")
+    ap.add_argument("--threads", type=int, default=int(os.getenv("AI_NUM_THREADS", "4")))
+    ap.add_argument("--limit", type=int, help="Score only the first N images per class")
+    ap.add_argument("--out", help="Write results as JSON here")
+    args = ap.parse_args()
+
+    if args.version:
+        from model_registry import ModelRegistry
+        if args.version not in ModelRegistry(args.registry).versions():
+            sys.exit(f"❌ No version {args.version} in {args.registry}")
+    model_path, meta = resolve_model(args.version or args.model, args.registry)
+
+    items = list_images(args.folder)
+    if args.limit:
+        seen = {}
+        kept = []
+        for path, index in items:
+            seen[index] = seen.get(index, 0) + 1
+            if seen[index] <= args.limit: kept.append((path, index))
+        items = kept
+    if not items:
+        sys.exit(f"❌ No images under {args.folder}/{{{','.join(l.lower() for l in CLASS_LABELS)}}}")
+
+    pool, classifiers = open_classifiers({model_path: (model_path, meta)}, args.workers, args.threads)
+    classifier = classifiers[model_path]
+    size = (classifier.model_w, classifier.model_h)
+    print(f"Scoring {model_path} ({size[0]}x{size[1]}, {meta['color']}) on {len(items)} images, "
+          f"batch {args.batch}, {args.workers} decode workers")
+
+    confusion = np.zeros((len(CLASS_LABELS), len(CLASS_LABELS)), np.int64)
+    failed = 0
+    infer_s = 0.0
+    batch, truth = [], []
+    def flush():
+        nonlocal infer_s
+        t0 = time.perf_counter()
+        probs = classifier.classify_prepared(np.stack(batch))
+        infer_s += time.perf_counter() - t0
+        for actual, p in zip(truth, probs):
+            confusion[actual, CLASS_LABELS.index(label_for(p))] += 1
+        batch.clear(); truth.clear()
+
+    t_start = time.perf_counter()
+    jobs = ((path, size, meta["color"]) for path, _ in items)
+    for (path, actual), pixels in zip(items, pool.imap(load, jobs, chunksize=4)):
+        if pixels is None:
+            failed += 1
+            continue
+        batch.append(pixels); truth.append(actual)
+        if len(batch) == args.batch: flush()
+    if batch: flush()
+    elapsed = time.perf_counter() - t_start
+    pool.close()
+
+    scored = int(confusion.sum())
+    if not scored:
+        sys.exit(f"❌ No readable images under {args.folder} ({failed} failed to decode)")
+    confusion_report(confusion, elapsed, scored, failed)
+    print(f"\nInterpreter {infer_s:.1f} s ({scored / infer_s:.1f} images/s, "
+          f"{infer_s / scored * 1000:.1f} ms/image); the rest is decode the pool did not hide")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({
+            "model": model_path, "version": args.version, "folder": args.folder, "batch": args.batch,
+            "workers": args.workers, "images": scored, "unreadable": failed, "seconds": elapsed,
+            "images_per_s": scored / elapsed, "inference_ms_per_image": infer_s / scored * 1000,
+            "accuracy": float(np.trace(confusion) / scored), "labels": CLASS_LABELS,
+            "confusion": confusion.tolist(), "when": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, indent=2))
+        print(f"💾 Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from collections import Counter
+import cv2
+import numpy as np
+
+# ==========================================
+# 🔀 DECISION FUSION
+# ==========================================
+# Cheap signals go first: an overweight item or an empty chamber decides the
+# scan before the flash, capture and CNN are paid for. Otherwise the CNN
+# probabilities are combined with the metal latch through per-class
+# confidence thresholds instead of a bare argmax.
+
+CAN, OTHER, PLASTIC = 0, 1, 2     # model output order
+DIFF_SIZE = (32, 24)              # frames are compared at this size, grayscale
+
+
+class Decision:
+    def __init__(self, label, path, reason, probs=None):
+        self.label = label      # "Can" / "Plastic" / "Other", None = nothing to sort
+        self.path = path        # "overweight" / "empty" / "model"
+        self.reason = reason
+        self.probs = probs
+
+    @property
+    def skipped_model(self):
+        return self.path != "model"
+
+    @property
+    def accepted(self):
+        return self.label in ("Can", "Plastic")
+
+
+def chamber_signature(frame):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, DIFF_SIZE, interpolation=cv2.INTER_AREA)
+
+# Share of signature pixels whose grey level moved by more than `pixel_diff`
+def changed_fraction(a, b, pixel_diff=25):
+    return float(np.count_nonzero(cv2.absdiff(a, b) > pixel_diff)) / a.size
+
+
+class DecisionEngine:
+    def __init__(self, max_weight=50.0, empty_weight=0.5, empty_changed=0.02, can_min_prob=0.4, plastic_min_prob=0.5):
+        self.max_weight = max_weight
+        self.empty_weight = empty_weight
+        self.empty_changed = empty_changed
+        self.can_min_prob = can_min_prob
+        self.plastic_min_prob = plastic_min_prob
+        self.background = None
+        self.paths = Counter()
+        self.reasons = Counter()
+
+    def learn_background(self, frame):
+        self.background = chamber_signature(frame)
+
+    # Decides from the scale (and the unlit chamber view) alone, or returns None
+    def precheck(self, weight, frame=None):
+        if weight > self.max_weight:
+            return Decision("Other", "overweight", f"{weight:.1f}g > {self.max_weight:.0f}g")
+        if weight < self.empty_weight:
+            if frame is None or self.background is None:
+                return Decision(None, "empty", "no weight")
+            changed = changed_fraction(chamber_signature(frame), self.background)
+            if changed < self.empty_changed:
+                return Decision(None, "empty", f"no weight, {changed:.0%} of view changed")
+        return None
+
+    def decide(self, probs, metal):
+        p_can, p_other, p_plastic = float(probs[CAN]), float(probs[OTHER]), float(probs[PLASTIC])
+        top = int(np.argmax(probs))
+        if metal:
+            # Metal backs up the CNN's "can", it never outvotes its top class:
+            # plastic with metal is rejected, and so is "other" (tins, foil
+            # and batteries are metal too)
+            if top == CAN and p_can >= self.can_min_prob:
+                return Decision("Can", "model", "can + metal", probs)
+            if top == OTHER and p_can >= self.can_min_prob:
+                return Decision("Other", "model", "metal, but more other than can", probs)
+            if top == PLASTIC:
+                return Decision("Other", "model", "plastic but metal detected", probs)
+            return Decision("Other", "model", "not a can", probs)
+        if top == PLASTIC and p_plastic >= self.plastic_min_prob:
+            return Decision("Plastic", "model", "plastic, no metal", probs)
+        if top == CAN:
+            return Decision("Other", "model", "can but no metal detected", probs)
+        if top == PLASTIC:
+            return Decision("Other", "model", f"plastic below {self.plastic_min_prob:.2f}", probs)
+        return Decision("Other", "model", "other", probs)
+
+    def log(self, decision):
+        self.paths[decision.path] += 1
+        self.reasons[decision.reason if decision.path == "model" else decision.path] += 1
+        icon = "✅ ACCEPTED" if decision.accepted else "⚠️ EMPTY" if decision.label is None else "❌ REJECTED"
+        print(f"   {icon}: {decision.label or '-'} via {decision.path} ({decision.reason}) "
+              f"| model skipped on {self.skipped_fraction():.0%} of scans")
+
+    def skipped_fraction(self):
+        total = sum(self.paths.values())
+        return (total - self.paths["model"]) / total if total else 0.0
@@ -0,0 +1,32 @@
+import importlib
+
+# ==========================================
+# 🔌 HARDWARE BACKENDS
+# ==========================================
+# app.py talks to the LED strip, servos, load cell, metal sensor, camera and
+# TFLite interpreter only through a backend module. Every backend provides:
+#
+#   NAME
+#   GPIO                                   RPi.GPIO-compatible module
+#   setup()                                pin numbering etc., once at boot
+#   led_strip(pin_name, count, brightness) .fill(color) / .show()
+#   servo_kit(channels, pusher=None)       .servo[ch].angle; pusher = (ch, angle) that pushes items out
+#   load_cell(dt_pin, sck_pin)             HX711-compatible driver
+#   metal_sensor(pin)                      configures the pin, returns the GPIO module to watch it on
+#   open_camera(size=None)                 capture with .read(buffer) or None; size = (w, h) wanted
+#   interpreter(model_path, num_threads)   tf.lite.Interpreter-compatible
+#   soc_temperature()                      degrees C, None if unknown
+#
+# "pi" drives the real machine, "sim" runs everything on a plain Linux box
+# (see hardware/sim_backend.py).
+
+BACKENDS = {
+    "pi": "hardware.pi_backend",
+    "sim": "hardware.sim_backend",
+}
+
+
+def load_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown hardware backend '{name}' (choose from {', '.join(BACKENDS)})")
+    return importlib.import_module(BACKENDS[name])
@@ -0,0 +1,204 @@
+import threading
+import time
+
+# ==========================================
+# 📷 CAMERA FRAME RING
+# ==========================================
+# The capture thread decodes straight into a small ring of preallocated frame
+# buffers. Every frame gets a sequence number and the time it was grabbed, so
+# a scan can wait for "the first frame captured after the flash" and read it
+# in place. A slot that a reader has acquired is never overwritten.
+
+class Frame:
+    def __init__(self, ring, slot, seq, stamp, image):
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.stamp = stamp
+        self.image = image      # view into the ring, valid until release()
+
+    def release(self):
+        if self.ring:
+            self.ring._release(self.slot)
+            self.ring = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.release()
+
+
+class FrameRing:
+    def __init__(self, slots=4):
+        self.buffers = [None] * slots
+        self.seqs = [0] * slots         # 0 = empty or being written
+        self.stamps = [0.0] * slots
+        self.pins = [0] * slots
+        self.last_seq = 0
+        self.interval = 1 / 30.0        # smoothed time between frames
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    # Oldest slot no reader holds; None when every slot is pinned
+    def _claim(self):
+        with self.cond:
+            free = [i for i in range(len(self.buffers)) if not self.pins[i]]
+            if not free: return None
+            slot = min(free, key=lambda i: self.seqs[i])
+            self.seqs[slot] = 0
+            return slot
+
+    # `read_into(buffer)` fills the given buffer (or allocates on first use)
+    # and returns (ok, image). Frames grabbed off the normal rhythm (idle
+    # trickle, first one after a pause) pass timed=False so they do not skew
+    # the frame interval.
+    def write(self, read_into, timed=True):
+        slot = self._claim()
+        if slot is None:
+            self.dropped += 1
+            return False
+        ok, image = read_into(self.buffers[slot])
+        now = time.monotonic()
+        with self.cond:
+            if not ok or image is None:
+                self.dropped += 1
+                return False
+            if self.last_seq and timed:
+                self.interval = 0.9 * self.interval + 0.1 * (now - self.stamps[self._latest_slot()])
+            self.buffers[slot] = image
+            self.last_seq += 1
+            self.seqs[slot], self.stamps[slot] = self.last_seq, now
+            self.cond.notify_all()
+        return True
+
+    def _latest_slot(self):
+        return max(range(len(self.seqs)), key=lambda i: self.seqs[i])
+
+    def _pin(self, slot):
+        self.pins[slot] += 1
+        return Frame(self, slot, self.seqs[slot], self.stamps[slot], self.buffers[slot])
+
+    def _release(self, slot):
+        with self.cond:
+            self.pins[slot] -= 1
+
+    # Blocks for the first frame grabbed at or after monotonic time `t`
+    def acquire_after(self, t, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                ready = [i for i in range(len(self.seqs)) if self.seqs[i] and self.stamps[i] >= t]
+                if ready:
+                    return self._pin(min(ready, key=lambda i: self.seqs[i]))
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return None
+                self.cond.wait(remaining)
+
+    def acquire_latest(self):
+        with self.cond:
+            if not self.last_seq: return None
+            return self._pin(self._latest_slot())
+
+
+# Power policy: full rate while a session runs; between sessions the device
+# stays open but only one frame every `idle_interval` is decoded, which keeps
+# auto-exposure current so the next session starts with a usable frame right
+# away. After `release_after` seconds of idling the device is closed
+# (no more USB traffic) and the next start() pays for a cold open.
+FULL, IDLE, OFF = "full", "idle", "off"
+
+
+class CameraStream:
+    def __init__(self, open_capture, slots=4, idle_interval=1.0, release_after=300.0):
+        self.open_capture = open_capture    # () -> opened capture object or None
+        self.ring = FrameRing(slots)
+        self.idle_interval = idle_interval
+        self.release_after = release_after
+        self.cap = None
+        self.mode = OFF
+        self.running = False
+        self.idle_since = 0.0
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.first_frame_s = None           # start() -> first full-rate frame, last session
+        self._started_at = 0.0
+        self.cold_starts = 0
+
+    def start(self):
+        t0 = time.monotonic()
+        with self.lock:
+            if not self.cap:
+                cap = self.open_capture()
+                if cap is None: return False
+                self.cap = cap
+                self.cold_starts += 1
+            self.mode = FULL
+            self.first_frame_s = None
+            self._started_at = t0
+            if not self.running:
+                self.running = True
+                threading.Thread(target=self._loop, daemon=True).start()
+        self.wake.set()
+        return True
+
+    def idle(self):
+        with self.lock:
+            if self.mode != FULL: return
+            self.mode, self.idle_since = IDLE, time.monotonic()
+
+    def release(self):
+        with self.lock:
+            self.mode = OFF
+        self.wake.set()
+
+    def _loop(self):
+        was_full = False
+        while True:
+            with self.lock:
+                mode = self.mode
+                if mode == IDLE and time.monotonic() - self.idle_since > self.release_after:
+                    self.mode = mode = OFF
+                if mode == OFF:
+                    self._close()
+                    return
+            if mode == IDLE:
+                was_full = False
+                # start() cuts the wait short
+                self.wake.wait(self.idle_interval)
+                self.wake.clear()
+                if self.mode != IDLE: continue
+            if not self.ring.write(self._read_into, timed=was_full):
+                time.sleep(0.1)
+                continue
+            if mode == FULL and not was_full:
+                was_full = True
+                if self.first_frame_s is None:
+                    self.first_frame_s = time.monotonic() - self._started_at
+
+    def _close(self):
+        self.running = False
+        cap, self.cap = self.cap, None
+        try:
+            if cap: cap.release()
+        except Exception: pass
+
+    def _read_into(self, buffer):
+        return self.cap.read(buffer) if buffer is not None else self.cap.read()
+
+    def frame_interval(self):
+        return self.ring.interval
+
+
+# `size` = (width, height) to ask the driver for; it picks the nearest mode
+def open_v4l2_camera(indexes=(0, 1, -1), size=None):
+    import cv2
+    for idx in indexes:
+        try:
+            cap = cv2.VideoCapture(idx, cv2.CAP_V4L2)
+            if cap.isOpened():
+                # Keep the driver queue short so "after T" really means after T
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                if size:
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+                return cap
+        except: continue
+    return None
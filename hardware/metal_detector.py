@@ -0,0 +1,118 @@
+import threading
+import time
+
+# ==========================================
+# 🧲 LATCHED METAL DETECTION
+# ==========================================
+# The inductive sensor pulls the pin LOW while metal is in range. A can that
+# slides past only gives a short pulse, so instead of polling once we listen
+# for edges and keep the last few detection windows [start, end] in a ring.
+# A window with end=None is still open (metal in range right now). A window
+# only opens once the pin has stayed active for the debounce time, so a
+# glitch (servo noise on the sensor line) never latches "metal"; its start is
+# then back-dated to the edge that began it.
+
+class MetalDetector:
+    def __init__(self, gpio, pin, debounce_ms=10, history=16, active_low=True, clock=time.monotonic, schedule=None):
+        self.gpio = gpio
+        self.pin = pin
+        self.debounce = debounce_ms / 1000.0
+        self.active_low = active_low
+        self.clock = clock
+        self.schedule = schedule or _run_later
+        self.windows = [[0.0, 0.0] for _ in range(history)]
+        self.count = 0               # windows opened so far
+        self.active = False
+        self.pending_since = None    # pin went active at this time, not confirmed yet
+        self.last_edge = -1e9
+        self.lock = threading.Lock()
+        self.polling = False
+
+    def start(self):
+        self.active, self.pending_since = False, None
+        self._on_edge()
+        try:
+            # Debounce in software: RPi.GPIO's bouncetime can swallow the release edge
+            self.gpio.add_event_detect(self.pin, self.gpio.BOTH, callback=self._on_edge)
+        except Exception as e:
+            print(f"⚠️ Metal edge detection unavailable ({e}), polling instead")
+            self.polling = True
+            threading.Thread(target=self._poll_loop, daemon=True).start()
+
+    def stop(self):
+        self.polling = False
+        try: self.gpio.remove_event_detect(self.pin)
+        except Exception: pass
+
+    def _poll_loop(self):
+        while self.polling:
+            self._sync()
+            time.sleep(0.002)
+
+    def _level_active(self):
+        level = self.gpio.input(self.pin)
+        return (level == 0) if self.active_low else (level == 1)
+
+    def _on_edge(self, channel=None):
+        if not self._sync():
+            # Not settled yet: look again once the debounce time has passed
+            self.schedule(self.debounce, self._on_edge)
+
+    # Reconcile the latched state with the pin. A level that has not held for
+    # the debounce time yet is left for later (returns False): going active
+    # until it has stayed active that long, going inactive until the debounce
+    # time after the previous transition.
+    def _sync(self):
+        now = self.clock()
+        active = self._level_active()
+        with self.lock:
+            if active == self.active:
+                self.pending_since = None      # a glitch that went away
+                return True
+            if active:
+                if self.pending_since is None:
+                    self.pending_since = now
+                if now - self.pending_since < self.debounce:
+                    return False
+                slot = self.windows[self.count % len(self.windows)]
+                slot[0], slot[1] = self.pending_since, None
+                self.count += 1
+                self.pending_since = None
+            else:
+                if now - self.last_edge < self.debounce:
+                    return False
+                if self.count:
+                    self.windows[(self.count - 1) % len(self.windows)][1] = now
+            self.last_edge = now
+            self.active = active
+            return True
+
+    def is_active(self):
+        self._sync()
+        return self.active
+
+    # True if any detection window overlaps [since, now]
+    def seen_since(self, since):
+        self._sync()
+        with self.lock:
+            n = min(self.count, len(self.windows))
+            for k in range(self.count - n, self.count):
+                start, end = self.windows[k % len(self.windows)]
+                if end is None or end >= since:
+                    return True
+        return False
+
+    def seen_within(self, ms):
+        return self.seen_since(self.clock() - ms / 1000.0)
+
+    def last_window(self):
+        with self.lock:
+            if not self.count: return None
+            start, end = self.windows[(self.count - 1) % len(self.windows)]
+            return start, end
+
+
+def _run_later(delay, fn):
+    timer = threading.Timer(delay, fn)
+    timer.daemon = True
+    timer.start()
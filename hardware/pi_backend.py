@@ -0,0 +1,54 @@
+import RPi.GPIO as GPIO
+from hardware.camera import open_v4l2_camera
+from inference import tf_interpreter
+
+# ==========================================
+# 🍓 RASPBERRY PI BACKEND
+# ==========================================
+# The real machine: WS2812B strip, PCA9685 servo driver, HX711 load cell,
+# inductive sensor on a GPIO pin and the USB camera. The Blinka stacks
+# (board, neopixel, servokit) and the HX711 driver are imported by the
+# function that needs them, not when app.py loads the backend.
+
+NAME = "pi"
+
+
+def setup():
+    GPIO.setmode(GPIO.BCM)
+
+
+def led_strip(pin_name, count, brightness):
+    import board
+    import neopixel
+    return neopixel.NeoPixel(getattr(board, pin_name), count, brightness=brightness, auto_write=False, pixel_order=neopixel.RGB)
+
+
+def servo_kit(channels, pusher=None):
+    from adafruit_servokit import ServoKit
+    return ServoKit(channels=channels)
+
+
+def load_cell(dt_pin, sck_pin):
+    from hx711 import HX711
+    return HX711(dt_pin, sck_pin)
+
+
+def metal_sensor(pin):
+    GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    return GPIO
+
+
+def open_camera(size=None):
+    return open_v4l2_camera(size=size)
+
+
+def soc_temperature():
+    try:
+        with open("/sys/class/thermal/thermal_zone0/temp") as f:
+            return int(f.read()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def interpreter(model_path, num_threads=None):
+    return tf_interpreter(model_path, num_threads)
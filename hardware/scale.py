@@ -1,40 +1,89 @@
+import argparse
+import os
+import statistics
+import sys
 import time
-import RPi.GPIO as GPIO
-from hx711 import HX711
-
-# Setup HX711
-hx = HX711(5, 6)
-hx.set_reading_format("MSB", "MSB")
-hx.set_reference_unit(1)
-hx.reset()
-hx.tare()
-
-# Configuration
-num_samples = 15
-
-print(f"Place known weight on scale and enter it's weight in grams:",end="")
-known_weight = int(input())
-
-# Collect samples
-print("Collecting samples...")
-samples = []
-for i in range(num_samples):
-    reading = hx.get_weight(1)
-    samples.append(reading)
-    print(f"{i+1}: {reading}")
-    time.sleep(0.2)
-
-# Remove outliers (simple method: remove top and bottom 20%)
-samples.sort()
-clean_samples = samples[3:-3]  # Remove 3 highest and 3 lowest
-
-# Calculate reference unit
-average = sum(clean_samples) / len(clean_samples)
-reference_unit = average / known_weight
-
-print(f"\nAverage reading: {average:.1f}")
-print(f"Reference unit: {reference_unit:.2f}")
-print(f"\nAdd this to your script:")
-print(f"hx.set_reference_unit({reference_unit:.2f})")
-
-GPIO.cleanup()
\ No newline at end of file
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from calibration import CalibrationStore
+from hardware.backend import load_backend
+
+# ==========================================
+# ⚖️ SCALE CALIBRATION
+# ==========================================
+# Finds the HX711 reference unit and zero offset and stores them in the
+# calibration file app.py reads at boot (no more pasting CALIBRATION_FACTOR).
+# Runs without prompts: it zeroes the empty platform, waits for the known
+# weight to be put on and to settle, then writes the result.
+#
+#   python hardware/scale.py --known 100            (start with the platform empty)
+#   python hardware/scale.py --zero-only            (re-zero, keep the reference unit)
+#   HW_BACKEND=sim python hardware/scale.py --known 100
+
+WEIGHT_DT_PIN, WEIGHT_SCK_PIN = 5, 6    # same as app.py
+
+
+# Raw readings until the newest `n` agree within `spread` counts
+def read_stable(hx, n, spread, timeout):
+    values = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        values = (values + [hx.read_long()])[-n:]
+        if len(values) == n and max(values) - min(values) <= spread:
+            return statistics.mean(values)
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--known", type=float, help="Grams of the reference weight")
+    ap.add_argument("--zero-only", action="store_true", help="Only measure the empty-platform offset")
+    ap.add_argument("--samples", type=int, default=15, help="Readings averaged per measurement")
+    ap.add_argument("--noise", type=float, default=600, help="Raw counts the readings of a still platform may spread")
+    ap.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the weight")
+    ap.add_argument("--calibration", default=os.getenv("CALIBRATION_PATH", "calibration.json"))
+    args = ap.parse_args()
+    if not args.zero_only and not args.known:
+        ap.error("give --known GRAMS, or --zero-only")
+
+    hw = load_backend(os.getenv("HW_BACKEND", "pi"))
+    hw.setup()
+    hx = hw.load_cell(WEIGHT_DT_PIN, WEIGHT_SCK_PIN)
+    hx.set_reading_format("MSB", "MSB")
+    hx.reset()
+
+    print("Zeroing the empty platform...")
+    offset = read_stable(hx, args.samples, args.noise, timeout=10.0)
+    if offset is None:
+        print("❌ Readings do not settle, is the platform moving?")
+        return
+    print(f"   offset {offset:.0f}")
+    store = CalibrationStore(args.calibration)
+    if args.zero_only:
+        store.save("scale", {"offset": offset})
+        print(f"💾 Saved to {args.calibration}")
+        return
+
+    print(f"Put the {args.known:g} g weight on the platform")
+    if hw.NAME == "sim":
+        # The simulated machine puts the weight on by itself
+        hw.chamber.insert("other", args.known)
+    deadline = time.monotonic() + args.timeout
+    while abs(hx.read_long() - offset) < 10 * args.noise:
+        if time.monotonic() > deadline:
+            print("❌ No weight was put on")
+            return
+    loaded = read_stable(hx, args.samples, args.noise, timeout=10.0)
+    if loaded is None:
+        print("❌ Readings do not settle with the weight on")
+        return
+
+    reference_unit = (loaded - offset) / args.known
+    store.save("scale", {"reference_unit": reference_unit, "offset": offset, "known_weight": args.known})
+    print(f"✅ Reference unit {reference_unit:.2f} (counts per gram)")
+    print(f"💾 Saved to {args.calibration}; take the weight off before starting a session")
+
+
+if __name__ == "__main__":
+    main()
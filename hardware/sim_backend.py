@@ -0,0 +1,479 @@
+import math
+import os
+import random
+import threading
+import time
+from pathlib import Path
+import numpy as np
+
+# ==========================================
+# 🧪 SIMULATED BACKEND
+# ==========================================
+# Stands in for the whole machine so app.py, the Flask routes and the
+# benchmarks run on any Linux box. One `chamber` model ties the devices
+# together: inserting an item puts its weight on the load cell, shows it to
+# the camera and (for a can) pulses the metal sensor; the slapper reaching
+# its push angle drops it out of the chamber again.
+#
+# Timings follow the real parts and can be tuned with SIM_* variables:
+#   servo travel   SIM_SERVO_DEG_PER_S  (MG996R ~0.17 s / 60 deg at 5 V)
+#   HX711 rate     SIM_HX711_HZ         (10 samples/s with RATE pin low)
+#   camera         SIM_CAMERA_FPS       (Logitech USB at 640x480)
+#   camera images  SIM_IMAGES           (folder with can/ other/ plastic/ subfolders,
+#                                        synthetic items when unset)
+#   inference      SIM_INFER_MS         (MobileNetV2 224x224 fp32 on a Pi 3B)
+#                  SIM_INFER_BATCH      (cost of each extra frame in a batch, share of one invoke)
+#                  SIM_INFER_GIL=1      (invoke keeps the GIL, like an interpreter build that
+#                                        does not release it; see benchmarks/bench_inference_worker.py)
+#
+#   HW_BACKEND=sim python app.py
+#   curl -X POST localhost:5000/sim/insert -d kind=can
+
+NAME = "sim"
+
+SERVO_DEG_PER_S = float(os.getenv("SIM_SERVO_DEG_PER_S", "350"))
+HX711_RATE_HZ = float(os.getenv("SIM_HX711_HZ", "10"))
+HX711_NOISE_G = 0.05
+HX711_RAW_PER_GRAM = -1068.74    # what calibration should find (CALIBRATION_FACTOR in app.py)
+HX711_RAW_ZERO = 83250           # empty-platform reading, removed by tare()
+SCALE_SETTLE_S = 0.12            # time constant of the platform after the load changes
+CAMERA_FPS = float(os.getenv("SIM_CAMERA_FPS", "30"))
+CAMERA_SIZE = (640, 480)
+CAMERA_OPEN_S = 0.8              # UVC probe + stream on for a cold open
+CAMERA_IMAGES = os.getenv("SIM_IMAGES", "")
+METAL_PULSE_S = 0.15             # a can sliding past the inductive sensor
+INFER_MS = float(os.getenv("SIM_INFER_MS", "180"))
+SIM_ACCURACY = float(os.getenv("SIM_ACCURACY", "0.95"))
+INFER_HOLDS_GIL = os.getenv("SIM_INFER_GIL", "0") == "1"
+INFER_BATCH_COST = float(os.getenv("SIM_INFER_BATCH", "0.6"))
+
+KINDS = ("can", "other", "plastic")     # model output order
+ITEM_WEIGHTS = {"can": (12.0, 17.0), "other": (3.0, 45.0), "plastic": (15.0, 32.0)}
+
+
+class Chamber:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.kind = None
+        self.weight = 0.0
+        self.start_load = 0.0
+        self.changed_at = 0.0
+        self.lit = False
+        self.version = 0            # bumps on every change so the camera re-renders
+        self.inserted = 0
+        self.cleared = 0
+        self.on_metal = None        # fn(active), wired up by metal_sensor()
+        self.arm = None             # the slapper servo, visible at the edge of the view
+
+    def insert(self, kind=None, weight=None):
+        kind = kind or self.rng.choice(KINDS)
+        if kind not in KINDS: raise ValueError(f"Unknown item kind '{kind}'")
+        weight = self.rng.uniform(*ITEM_WEIGHTS[kind]) if weight is None else float(weight)
+        with self.lock:
+            self._set_load(weight)
+            self.kind = kind
+            self.version += 1
+            self.inserted += 1
+        if kind == "can" and self.on_metal:
+            self.on_metal(True)
+            _run_later(METAL_PULSE_S, lambda: self.on_metal(False))
+        return kind, weight
+
+    def clear(self):
+        with self.lock:
+            if self.kind is None: return
+            self._set_load(0.0)
+            self.kind = None
+            self.version += 1
+            self.cleared += 1
+
+    def _set_load(self, weight):
+        now = time.monotonic()
+        self.start_load = self._load(now)
+        self.weight, self.changed_at = weight, now
+
+    # Grams on the platform right now: first-order approach to the new load
+    def _load(self, now):
+        k = math.exp(-(now - self.changed_at) / SCALE_SETTLE_S)
+        return self.weight + (self.start_load - self.weight) * k
+
+    def load(self):
+        with self.lock:
+            return self._load(time.monotonic())
+
+    def snapshot(self):
+        arm = round(self.arm.position()) if self.arm else None
+        with self.lock:
+            return self.kind, self.version, self.lit, arm
+
+
+chamber = Chamber()
+
+
+# --- GPIO ---
+class SimGPIO:
+    BCM, BOARD = 11, 10
+    IN, OUT = 1, 0
+    LOW, HIGH = 0, 1
+    PUD_OFF, PUD_DOWN, PUD_UP = 20, 21, 22
+    RISING, FALLING, BOTH = 31, 32, 33
+
+    def __init__(self):
+        self.levels = {}
+        self.callbacks = {}
+        self.lock = threading.Lock()
+
+    def setmode(self, mode): pass
+    def setwarnings(self, on): pass
+
+    def setup(self, pin, mode, pull_up_down=None, initial=None):
+        with self.lock:
+            self.levels.setdefault(pin, self.LOW if pull_up_down == self.PUD_DOWN else self.HIGH)
+
+    def input(self, pin):
+        return self.levels.get(pin, self.HIGH)
+
+    def output(self, pin, level):
+        self.drive(pin, level)
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self.lock:
+            self.callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        with self.lock:
+            self.callbacks.pop(pin, None)
+
+    def cleanup(self, *pins):
+        with self.lock:
+            self.callbacks.clear()
+
+    # Set the level seen on `pin` and fire its edge callback like RPi.GPIO
+    def drive(self, pin, level):
+        with self.lock:
+            old = self.levels.get(pin, self.HIGH)
+            self.levels[pin] = level
+            edge, callback = self.callbacks.get(pin, (None, None))
+        if callback is None or old == level: return
+        if edge == self.BOTH or edge == (self.RISING if level else self.FALLING):
+            callback(pin)
+
+
+GPIO = SimGPIO()
+
+
+def setup():
+    GPIO.setmode(GPIO.BCM)
+
+
+# --- LED strip ---
+class SimPixels:
+    def __init__(self, count, brightness=1.0):
+        self.pixels = [(0, 0, 0)] * count
+        self.brightness = brightness
+
+    def __setitem__(self, i, color): self.pixels[i] = color
+    def __getitem__(self, i): return self.pixels[i]
+    def __len__(self): return len(self.pixels)
+
+    def fill(self, color):
+        self.pixels = [color] * len(self.pixels)
+
+    def show(self):
+        # WS2812B: 30 us per pixel on the wire
+        time.sleep(30e-6 * len(self.pixels))
+        lit = self.brightness > 0 and any(any(c) for c in self.pixels)
+        with chamber.lock:
+            chamber.lit = lit
+
+
+def led_strip(pin_name, count, brightness):
+    return SimPixels(count, brightness)
+
+
+# --- Servos ---
+class SimServo:
+    def __init__(self, kit, channel):
+        self.kit = kit
+        self.channel = channel
+        self.start = 90.0
+        self.target = 90.0
+        self.moved_at = 0.0
+        self.travel = 0.0
+        self.powered = False
+
+    def set_pulse_width_range(self, min_pulse, max_pulse): pass
+
+    @property
+    def angle(self):
+        if not self.powered: return None
+        return self.position()
+
+    @angle.setter
+    def angle(self, value):
+        if value is None:
+            # Released: the horn stays wherever it got to
+            self.start = self.target = self.position()
+            self.powered = False
+            return
+        now = time.monotonic()
+        self.start = self.position(now)
+        self.target = float(value)
+        self.moved_at = now
+        self.travel = abs(self.target - self.start) / SERVO_DEG_PER_S
+        self.powered = True
+        self.kit._moved(self)
+
+    def position(self, now=None):
+        now = time.monotonic() if now is None else now
+        if not self.travel or now - self.moved_at >= self.travel: return self.target
+        return self.start + (self.target - self.start) * (now - self.moved_at) / self.travel
+
+
+class SimServoKit:
+    def __init__(self, channels=16, pusher=None):
+        self.servo = [SimServo(self, ch) for ch in range(channels)]
+        self.pusher = pusher
+        if pusher: chamber.arm = self.servo[pusher[0]]
+
+    def _moved(self, servo):
+        if not self.pusher: return
+        channel, push_angle = self.pusher
+        if servo.channel == channel and abs(servo.target - push_angle) < 1.0:
+            # The item drops out once the slapper has swung all the way over
+            _run_later(servo.travel, chamber.clear)
+
+
+def servo_kit(channels, pusher=None):
+    return SimServoKit(channels, pusher)
+
+
+# --- Load cell ---
+class SimHX711:
+    def __init__(self, dt_pin, sck_pin, rate_hz=HX711_RATE_HZ):
+        self.period = 1.0 / rate_hz
+        self.next_at = time.monotonic()
+        self.reference_unit = 1.0
+        self.offset = 0.0
+        self.rng = random.Random()
+
+    def set_reading_format(self, byte_format="MSB", bit_format="MSB"): pass
+    def set_reference_unit(self, reference_unit): self.reference_unit = reference_unit
+    def get_reference_unit(self): return self.reference_unit
+    def set_offset(self, offset): self.offset = offset
+    def get_offset(self): return self.offset
+    def reset(self): pass
+    def power_down(self): pass
+    def power_up(self): pass
+
+    def is_ready(self):
+        return time.monotonic() >= self.next_at
+
+    # One conversion; blocks until the next one is due, like DOUT going low
+    def read_long(self):
+        wait = self.next_at - time.monotonic()
+        if wait > 0: time.sleep(wait)
+        self.next_at = max(self.next_at + self.period, time.monotonic())
+        grams = chamber.load() + self.rng.gauss(0.0, HX711_NOISE_G)
+        return int(HX711_RAW_ZERO + grams * HX711_RAW_PER_GRAM)
+
+    def read_average(self, times=3):
+        return sum(self.read_long() for _ in range(times)) / times
+
+    def get_value(self, times=3):
+        return self.read_average(times) - self.offset
+
+    def get_weight(self, times=3):
+        return self.get_value(times) / self.reference_unit
+
+    def tare(self, times=15):
+        self.offset = self.read_average(times)
+        return self.offset
+
+
+def load_cell(dt_pin, sck_pin):
+    return SimHX711(dt_pin, sck_pin)
+
+
+# --- Metal sensor ---
+def metal_sensor(pin):
+    GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    # Active low: metal in range pulls the pin down
+    chamber.on_metal = lambda active: GPIO.drive(pin, GPIO.LOW if active else GPIO.HIGH)
+    return GPIO
+
+
+# --- Camera ---
+class SimCapture:
+    def __init__(self, fps=CAMERA_FPS, size=CAMERA_SIZE, images=CAMERA_IMAGES):
+        self.interval = 1.0 / fps
+        self.size = size
+        self.next_at = time.monotonic()
+        self.images = _image_index(images) if images else {}
+        self.cache = {}         # (kind, version, lit) -> rendered frame
+        self.opened = True
+
+    def isOpened(self): return self.opened
+    def release(self): self.opened = False
+    def set(self, prop, value): return True
+
+    def read(self, buffer=None):
+        wait = self.next_at - time.monotonic()
+        if wait > 0: time.sleep(wait)
+        self.next_at = max(self.next_at + self.interval, time.monotonic())
+        key = chamber.snapshot()
+        frame = self.cache.get(key)
+        if frame is None:
+            # Only the newest scene is kept; it changes per item and while the arm swings
+            self.cache = {key: self._render(*key)}
+            frame = self.cache[key]
+        if buffer is None or buffer.shape != frame.shape:
+            buffer = np.empty_like(frame)
+        np.copyto(buffer, frame)
+        return True, buffer
+
+    def _render(self, kind, version, lit, arm):
+        import cv2
+        w, h = self.size
+        # Dim chamber interior, a little brighter towards the top
+        frame = np.empty((h, w, 3), np.uint8)
+        frame[:] = np.linspace(70, 45, h, dtype=np.uint8)[:, None, None]
+        if kind:
+            rng = random.Random(version)
+            paths = self.images.get(kind)
+            if paths:
+                item = cv2.imread(str(rng.choice(paths)))
+                frame = cv2.resize(item, (w, h)) if item is not None else frame
+            else:
+                _draw_item(frame, kind, rng)
+        if arm is not None:
+            # Slapper pivots at the lower left corner, rest ~65 deg, hit ~160 deg
+            pivot = (int(w * 0.08), int(h * 0.92))
+            length = 0.4 * w
+            tip = (int(pivot[0] + length * math.cos(math.radians(arm - 90))),
+                   int(pivot[1] - length * math.sin(math.radians(arm - 90))))
+            cv2.line(frame, pivot, tip, (200, 200, 200), max(2, w // 40))
+        if lit:
+            frame = cv2.convertScaleAbs(frame, alpha=1.4, beta=40)
+        if kind:
+            # Ground-truth tag in the top left corner: pure red/green/blue (RGB) in
+            # KINDS order. SimInterpreter reads it, in this process or in the
+            # inference worker, which cannot see the chamber.
+            tag = max(4, w // 32)
+            frame[:tag, :tag] = [255 if KINDS[2 - c] == kind else 0 for c in range(3)]    # BGR
+        return frame
+
+
+def _draw_item(frame, kind, rng):
+    import cv2
+    h, w = frame.shape[:2]
+    # Drawn for 640x480, scaled to the capture size
+    k = w / 640.0
+    s = lambda v: int(v * k)
+    cx, cy = w // 2 + s(rng.randint(-40, 40)), h // 2 + s(rng.randint(-20, 20))
+    if kind == "can":
+        cv2.rectangle(frame, (cx - s(60), cy - s(110)), (cx + s(60), cy + s(110)), (190, 190, 195), -1)
+        cv2.rectangle(frame, (cx - s(60), cy - s(30)), (cx + s(60), cy + s(30)), (40, 40, 200), -1)
+    elif kind == "plastic":
+        cv2.rectangle(frame, (cx - s(55), cy - s(80)), (cx + s(55), cy + s(140)), (225, 200, 160), -1)
+        cv2.rectangle(frame, (cx - s(18), cy - s(140)), (cx + s(18), cy - s(80)), (225, 200, 160), -1)
+        cv2.rectangle(frame, (cx - s(55), cy - s(10)), (cx + s(55), cy + s(40)), (60, 160, 60), -1)
+    else:
+        cv2.ellipse(frame, (cx, cy), (s(110), s(70)), rng.randint(0, 180), 0, 360, (40, 90, 140), -1)
+
+
+def _image_index(folder):
+    index = {}
+    for kind in KINDS:
+        sub = Path(folder) / kind
+        if sub.is_dir():
+            index[kind] = sorted(p for p in sub.iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    return index
+
+
+def open_camera(size=None):
+    time.sleep(CAMERA_OPEN_S)
+    return SimCapture(size=size or CAMERA_SIZE)
+
+
+def soc_temperature():
+    return None
+
+
+# --- Inference ---
+# Same calls as tf.lite.Interpreter. It "sees" the item through the tag the
+# simulated camera puts on the frame and answers correctly SIM_ACCURACY of
+# the time after SIM_INFER_MS.
+class SimInterpreter:
+    def __init__(self, model_path=None, num_threads=None, size=224, latency_ms=INFER_MS, accuracy=SIM_ACCURACY):
+        self.latency = latency_ms / 1000.0
+        self.accuracy = accuracy
+        self.input = np.zeros((1, size, size, 3), np.float32)
+        self.output = np.zeros((1, len(KINDS)), np.float32)
+        self.rng = random.Random()
+
+    def allocate_tensors(self): pass
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.input.shape), "dtype": np.float32, "quantization": (0.0, 0)}]
+
+    def get_output_details(self):
+        return [{"index": 1, "shape": np.array(self.output.shape), "dtype": np.float32, "quantization": (0.0, 0)}]
+
+    def resize_tensor_input(self, index, shape, strict=False):
+        self.input = np.zeros(shape, np.float32)
+        self.output = np.zeros((shape[0], len(KINDS)), np.float32)
+
+    def tensor(self, index):
+        return lambda: self.input if index == 0 else self.output
+
+    def get_tensor(self, index):
+        return (self.input if index == 0 else self.output).copy()
+
+    def invoke(self):
+        batch = len(self.input)
+        latency = self.latency * (1 + INFER_BATCH_COST * (batch - 1))
+        if INFER_HOLDS_GIL:
+            _hold_gil(latency)
+        else:
+            time.sleep(latency)
+        for row in range(batch):
+            tag = self.input[row, 1, 1]
+            kind = KINDS[int(np.argmax(tag))] if tag.max() - tag.min() > 128 else "other"
+            # Every frame errs on its own, like blur or glare on one frame of a burst
+            if self.rng.random() >= self.accuracy:
+                kind = self.rng.choice([k for k in KINDS if k != kind])
+            top = self.rng.uniform(0.6, 0.99)
+            probs = np.full(len(KINDS), (1.0 - top) / (len(KINDS) - 1), np.float32)
+            probs[KINDS.index(kind)] = top
+            self.output[row] = probs
+
+
+# sum() over a range runs in C without giving up the GIL
+_gil_ops_per_s = None
+
+def _hold_gil(seconds):
+    global _gil_ops_per_s
+    if _gil_ops_per_s is None:
+        t0 = time.perf_counter()
+        sum(range(200_000))
+        _gil_ops_per_s = 200_000 / (time.perf_counter() - t0)
+    sum(range(int(seconds * _gil_ops_per_s)))
+
+
+# A real model is used when the file is there and TensorFlow is installed
+def interpreter(model_path, num_threads=None):
+    if model_path and os.path.exists(model_path):
+        try:
+            from inference import tf_interpreter
+            return tf_interpreter(model_path, num_threads)
+        except ImportError:
+            pass
+    return SimInterpreter(model_path, num_threads)
+
+
+def _run_later(delay, fn):
+    timer = threading.Timer(delay, fn)
+    timer.daemon = True
+    timer.start()
@@ -1,21 +1,111 @@
-def sort_plastic(self):
-        if not self.servo: return
-        print("⚙️ Hardware: Sorting PLASTIC (Left)")
-        self.servo.angle = -90
-        sleep(1.0)
-        self.servo.value = None # <--- Add this to stop shaking
-        self.reset()
-
-    def sort_can(self):
-        if not self.servo: return
-        print("⚙️ Hardware: Sorting CAN (Right)")
-        self.servo.angle = 90
-        sleep(1.0)
-        self.servo.value = None # <--- Add this to stop shaking
-        self.reset()
-
-    def reset(self):
-        if not self.servo: return
-        self.servo.angle = 0
-        sleep(0.5)
-        self.servo.value = None # <--- Add this to stop shaking
\ No newline at end of file
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from calibration import CalibrationStore
+from fusion import chamber_signature, changed_fraction
+from hardware.backend import load_backend
+from hardware.camera import CameraStream
+
+# ==========================================
+# 📐 SERVO SPEED CALIBRATION
+# ==========================================
+# Measures how fast each servo really turns (deg/s) and stores it in the
+# calibration file app.py reads at boot; the motion planner derives every
+# wait from it. The servo is swung between two angles while the camera
+# watches, and the move is over once the view stops changing. Resolution is
+# one frame (~33 ms), so the median of several repeats is kept.
+#
+# A servo the camera cannot see (the gate, usually) can be given a rate by
+# hand, e.g. from a stopwatch or the datasheet.
+#
+#   python hardware/sorter.py                          (both servos, 5 swings each)
+#   python hardware/sorter.py --servo 0:65:160 --repeats 10
+#   python hardware/sorter.py --rate 15=280
+#   HW_BACKEND=sim python hardware/sorter.py
+
+SERVO_PULSE_RANGE = (500, 2500)
+SLAPPER = (0, 160)      # channel, push angle (SERVO_SLAPPER_CH / ANGLE_SLAP_HIT in app.py)
+# channel:from:to, the same moves app.py makes (slapper rest -> hit, gate idle -> plastic)
+DEFAULT_SERVOS = ["0:65:160", "15:60:95"]
+
+
+def measure_once(kit, camera, channel, start, end, threshold, quiet_s, timeout):
+    kit.servo[channel].angle = start
+    time.sleep(180 / 60.0)           # slow enough for any hobby servo to get there
+    frame = camera.ring.acquire_after(time.monotonic(), timeout=1.0)
+    if frame is None: raise RuntimeError("no camera frames")
+    with frame: prev, t = chamber_signature(frame.image), frame.stamp
+
+    t_cmd = time.monotonic()
+    kit.servo[channel].angle = end
+    last_motion = None
+    while True:
+        frame = camera.ring.acquire_after(t + 1e-6, timeout=1.0)
+        if frame is None: break
+        with frame: sig, t = chamber_signature(frame.image), frame.stamp
+        if t > t_cmd and changed_fraction(sig, prev) >= threshold:
+            last_motion = t
+        prev = sig
+        if t - (last_motion or t_cmd) > quiet_s or t - t_cmd > timeout: break
+    kit.servo[channel].angle = None
+    if last_motion is None: return None
+    # The last frame that still changed was exposed about half a frame before it was stamped
+    return last_motion - t_cmd - camera.frame_interval() / 2
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--servo", action="append", help="channel:from:to to measure (default: slapper and gate)")
+    ap.add_argument("--rate", action="append", default=[], help="channel=deg_per_s to store without measuring")
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--threshold", type=float, default=0.002, help="Share of the view that must change between frames")
+    ap.add_argument("--quiet", type=float, default=0.25, help="Seconds without change that end a move")
+    ap.add_argument("--calibration", default=os.getenv("CALIBRATION_PATH", "calibration.json"))
+    args = ap.parse_args()
+
+    store = CalibrationStore(args.calibration)
+    rates = {str(k): v for k, v in store.section("servos").get("deg_per_s", {}).items()}
+    for item in args.rate:
+        channel, rate = item.split("=")
+        rates[str(int(channel))] = float(rate)
+        print(f"   ch {channel}: {float(rate):.0f} deg/s (given)")
+
+    servos = args.servo or ([] if args.rate else DEFAULT_SERVOS)
+    if servos:
+        hw = load_backend(os.getenv("HW_BACKEND", "pi"))
+        hw.setup()
+        kit = hw.servo_kit(16, pusher=SLAPPER)
+        camera = CameraStream(hw.open_camera)
+        if not camera.start():
+            print("❌ No camera, give rates with --rate instead")
+            return
+        time.sleep(1.0)
+        for spec in servos:
+            channel, start, end = (int(v) for v in spec.split(":"))
+            kit.servo[channel].set_pulse_width_range(*SERVO_PULSE_RANGE)
+            times = []
+            for _ in range(args.repeats):
+                travel = measure_once(kit, camera, channel, start, end, args.threshold, args.quiet, timeout=3.0)
+                if travel is None: break
+                times.append(travel)
+            if not times:
+                print(f"⚠️ ch {channel}: no movement seen by the camera, skipped (use --rate {channel}=...)")
+                continue
+            travel = statistics.median(times)
+            rates[str(channel)] = abs(end - start) / travel
+            print(f"✅ ch {channel}: {start}° -> {end}° in {travel * 1000:.0f} ms "
+                  f"(spread {(max(times) - min(times)) * 1000:.0f} ms) = {rates[str(channel)]:.0f} deg/s")
+        camera.release()
+
+    if rates:
+        store.save("servos", {"deg_per_s": rates})
+        print(f"💾 Saved to {args.calibration}")
+
+
+if __name__ == "__main__":
+    main()
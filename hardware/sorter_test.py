@@ -1,71 +1,74 @@
-import RPi.GPIO as GPIO
+import argparse
+import os
+import sys
 import time
+from pathlib import Path
 
-# --- CONFIGURATION ---
-SERVO_PIN = 23
-PWM_FREQ = 50 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from calibration import CalibrationStore
+from hardware.backend import load_backend
+from motion import MotionPlanner
 
-# ANGLES
-IDLE_ANGLE = 0
-SLAP_ANGLE = 90# You confirmed 90 works with the manual script
+# ==========================================
+# 🧪 SORTER TIMING CHECK
+# ==========================================
+# Sorts a sequence of items with the motion planner and the calibrated servo
+# speeds (hardware/sorter.py), the way app.py does it, and compares the
+# motor time per item with the old fixed sequence (gate, slap, gate back to
+# idle: 2.0 s every item). Watch the machine while it runs: every slap must
+# reach the end stop, otherwise the stored speed is too optimistic.
+#
+#   python hardware/sorter_test.py --items ppcppcccp
+#   HW_BACKEND=sim python hardware/sorter_test.py
 
-# TIMING
-# 0.3s is enough for 90 degrees (MG996R is fast). 
-# If it doesn't reach 90 fully, increase this to 0.4.
-MOVE_TIME = 0.5 
+# Same channels and angles as app.py
+SERVO_SORTER_CH, SERVO_SLAPPER_CH = 15, 0
+ANGLE_SORTER_IDLE = 60
+ANGLE_SORTER = {"p": ANGLE_SORTER_IDLE + 35, "c": ANGLE_SORTER_IDLE - 35}
+ANGLE_SLAP_REST, ANGLE_SLAP_HIT = 65, 160
+FIXED_SEQUENCE_S = 0.5 + 0.6 + 0.4 + 0.5
 
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(SERVO_PIN, GPIO.OUT)
-pwm = GPIO.PWM(SERVO_PIN, PWM_FREQ)
-pwm.start(0)
 
-def angle_to_duty_cycle(angle):
-    # The EXACT formula from your working manual_servo.py
-    duty = 2.5 + ((angle + 90) / 18)
-    return duty
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", default="ppcppcccpp", help="p = plastic, c = can")
+    ap.add_argument("--calibration", default=os.getenv("CALIBRATION_PATH", "calibration.json"))
+    args = ap.parse_args()
 
-def move_servo(angle):
-    # 1. Calculate Duty
-    duty = angle_to_duty_cycle(angle)
-    
-    # 2. Move
-    pwm.ChangeDutyCycle(duty)
-    
-    # 3. Wait for physical travel
-    time.sleep(MOVE_TIME)
-    
-    # 4. Cut power to stop shaking (The "Secret")
-    pwm.ChangeDutyCycle(0)
+    hw = load_backend(os.getenv("HW_BACKEND", "pi"))
+    hw.setup()
+    kit = hw.servo_kit(16, pusher=(SERVO_SLAPPER_CH, ANGLE_SLAP_HIT))
+    for ch in (SERVO_SORTER_CH, SERVO_SLAPPER_CH):
+        kit.servo[ch].set_pulse_width_range(500, 2500)
+    rates = CalibrationStore(args.calibration).section("servos").get("deg_per_s", {})
+    motion = MotionPlanner(kit, rates=rates)
+    print(f"Servo speeds: {motion.rate(SERVO_SORTER_CH):.0f} deg/s gate, "
+          f"{motion.rate(SERVO_SLAPPER_CH):.0f} deg/s slapper ({'calibrated' if rates else 'defaults'})")
 
-def slap():
-    print(f"   👋 Slapping! (0° -> {SLAP_ANGLE}° -> 0°)")
-    
-    # Swing Out to 90
-    move_servo(SLAP_ANGLE)
-    
-    # Swing Back to 0
-    move_servo(IDLE_ANGLE)
+    motion.move_together({SERVO_SORTER_CH: ANGLE_SORTER_IDLE, SERVO_SLAPPER_CH: ANGLE_SLAP_REST})
+    total = 0.0
+    try:
+        for item in args.items:
+            if item not in ANGLE_SORTER: continue
+            skipped = motion.skipped
+            t0 = time.monotonic()
+            motion.move(SERVO_SORTER_CH, ANGLE_SORTER[item])
+            motion.move(SERVO_SLAPPER_CH, ANGLE_SLAP_HIT)
+            motion.move(SERVO_SLAPPER_CH, ANGLE_SLAP_REST)
+            motion.release()
+            took = time.monotonic() - t0
+            total += took
+            gate = "gate stays" if motion.skipped > skipped else "gate moves"
+            print(f"   {'PLASTIC' if item == 'p' else 'CAN':<7} {took * 1000:5.0f} ms ({gate})")
+    finally:
+        motion.move(SERVO_SORTER_CH, ANGLE_SORTER_IDLE)
+        motion.release()
 
-try:
-    print("✅ Sorter Test Ready")
-    print(f"   Idle: {IDLE_ANGLE}°, Slap: {SLAP_ANGLE}°")
-    
-    # Reset to 0 immediately on start
-    move_servo(IDLE_ANGLE)
+    n = sum(1 for i in args.items if i in ANGLE_SORTER)
+    if n:
+        print(f"Average {total / n * 1000:.0f} ms per item vs {FIXED_SEQUENCE_S * 1000:.0f} ms with the fixed sequence "
+              f"({motion.skipped} moves skipped)")
 
-    while True:
-        item = input("\nScan Item > ").lower().strip()
-        
-        if item in ["plastic", "can"]:
-            slap()
-        elif item == "q":
-            break
-        else:
-            print("   (Ignored)")
 
-except KeyboardInterrupt:
-    print("\n👋 Exiting...")
-
-finally:
-    pwm.stop()
-    GPIO.cleanup()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+# ==========================================
+# ⚖️ BACKGROUND HX711 SAMPLER
+# ==========================================
+# Reads the load cell continuously into a fixed-size ring of timestamped
+# samples so the scan path never waits on the HX711 (~10 samples/s).
+# `current` always holds the rolling median of the newest samples.
+
+class WeightSampler:
+    def __init__(self, hx, size=32, median_of=5):
+        self.hx = hx
+        self.size = size
+        self.median_of = median_of
+        self.times = [0.0] * size
+        self.values = [0.0] * size
+        self.count = 0                      # samples written since the last tare
+        self.generation = 0                 # tares so far; a read started before one is dropped
+        self.current = 0.0                  # published rolling median (grams)
+        self.hx_lock = threading.Lock()     # tare and sampling must not interleave on the wire
+        self.new_sample = threading.Condition()
+        self.running = False
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def _loop(self):
+        is_ready = getattr(self.hx, "is_ready", None)
+        while self.running:
+            # The driver busy-waits for DOUT, so only call it once a conversion is ready
+            if is_ready and not is_ready():
+                time.sleep(0.005)
+                continue
+            try:
+                with self.hx_lock:
+                    generation = self.generation
+                    value = self.hx.get_weight(1)
+            except Exception:
+                time.sleep(0.1)
+                continue
+            self._push(time.monotonic(), value, generation)
+
+    def _push(self, t, value, generation=None):
+        with self.new_sample:
+            # Read with the offset from before a tare that has happened since
+            if generation is not None and generation != self.generation: return
+            i = self.count % self.size
+            self.times[i], self.values[i] = t, value
+            self.count += 1
+            self.current = _median(self._latest(self.median_of))
+            self.new_sample.notify_all()
+
+    # Newest-last samples, optionally only those taken at/after `since`
+    def _latest(self, n, since=None):
+        n = min(n, self.count, self.size)
+        out = []
+        for k in range(self.count - n, self.count):
+            i = k % self.size
+            if since is None or self.times[i] >= since:
+                out.append(self.values[i])
+        return out
+
+    def samples(self, n=None, since=None):
+        with self.new_sample:
+            return self._latest(self.size if n is None else n, since)
+
+    def median(self, n=None):
+        return _median(self.samples(n or self.median_of))
+
+    def trimmed_mean(self, n=9, trim=0.2):
+        values = sorted(self.samples(n))
+        if not values: return 0.0
+        cut = int(len(values) * trim)
+        kept = values[cut:len(values) - cut] or values
+        return sum(kept) / len(kept)
+
+    # Blocks until `window` consecutive samples taken after `since` agree within
+    # `tolerance` grams. Returns (weight, settled); on timeout the best estimate.
+    def wait_stable(self, since=None, tolerance=0.5, window=3, timeout=1.0):
+        since = time.monotonic() if since is None else since
+        deadline = time.monotonic() + timeout
+        with self.new_sample:
+            while True:
+                recent = self._latest(window, since)
+                if len(recent) == window and max(recent) - min(recent) <= tolerance:
+                    return _median(recent), True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    fallback = self._latest(window, since) or self._latest(self.median_of)
+                    return _median(fallback), False
+                self.new_sample.wait(remaining)
+
+    # Waits up to `timeout` for the first sample since the last tare
+    def wait_first(self, timeout=0.3):
+        with self.new_sample:
+            return self.new_sample.wait_for(lambda: self.count > 0 or not self.running, timeout) and self.count > 0
+
+    def tare(self):
+        with self.hx_lock:
+            self.hx.reset()
+            self.hx.tare()
+            # Still under hx_lock: no read can start with the new offset before the reset
+            with self.new_sample:
+                self.generation += 1
+                self.count = 0
+                self.current = 0.0
+
+
+def _median(values):
+    if not values: return 0.0
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
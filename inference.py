@@ -0,0 +1,244 @@
+import functools
+import importlib
+import os
+import threading
+import numpy as np
+import cv2
+import metrics
+
+# ==========================================
+# 🧠 TFLITE CLASSIFIER
+# ==========================================
+# Works with the fp32 export as well as the dynamic-range and full-int8
+# exports from ai-model.ipynb. Preprocessing writes straight into the
+# interpreter's own input tensor, nothing is allocated per scan.
+
+# Order the app works in (class_names=['can', 'other', 'plastic'] in training);
+# a model trained with another order says so in its registry metadata
+CLASS_LABELS = ["Can", "Other", "Plastic"]
+
+# BGR camera frame -> RGB uint8 at model size. Resizing before the channel
+# swap gives the same pixels as cvtColor-then-resize at a fraction of the cost.
+def preprocess(frame_bgr, size, out=None, scratch=None):
+    w, h = size
+    small = cv2.resize(frame_bgr, (w, h), dst=scratch)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=out)
+
+# The one preprocessing path: live scans, bursts, the inference worker and
+# evaluate.py all go through here. `color` is the channel order the model
+# was trained on; the cast to the input tensor's type happens in set_input().
+def prepare(frame_bgr, size, color="rgb", out=None, scratch=None):
+    if color == "rgb":
+        return preprocess(frame_bgr, size, out=out, scratch=scratch)
+    return cv2.resize(frame_bgr, size, dst=out)
+
+def label_for(probs):
+    return CLASS_LABELS[int(np.argmax(probs))]
+
+
+# Per-frame probabilities of a burst -> one probability vector.
+# "mean" averages them; "vote" takes the label most frames agree on (ties go
+# to the higher mean) and reports the mean probabilities of the frames that
+# voted for it, so the confidence thresholds in fusion.py still apply.
+BURST_FUSIONS = ("mean", "vote")
+
+def fuse_burst(probs, method="mean"):
+    probs = np.asarray(probs, np.float32)
+    if len(probs) == 1: return probs[0]
+    mean = probs.mean(axis=0)
+    if method == "mean": return mean
+    if method != "vote": raise ValueError(f"Unknown burst fusion '{method}' (choose from {', '.join(BURST_FUSIONS)})")
+    votes = np.bincount(probs.argmax(axis=1), minlength=probs.shape[1])
+    tied = np.flatnonzero(votes == votes.max())
+    winner = tied[np.argmax(mean[tied])]
+    return probs[probs.argmax(axis=1) == winner].mean(axis=0)
+
+
+# Standalone runtimes first: they import in well under a second and a few
+# tens of MB, full TensorFlow takes several seconds and hundreds of MB on a
+# Pi. TFLITE_RUNTIME=tensorflow (or another name below) forces one.
+TFLITE_RUNTIMES = {
+    "tflite_runtime": "tflite_runtime.interpreter",
+    "ai_edge_litert": "ai_edge_litert.interpreter",
+    "tensorflow": "tensorflow.lite.python.interpreter",
+}
+TFLITE_RUNTIME = os.getenv("TFLITE_RUNTIME", "auto")
+
+# (name, Interpreter class) of the first runtime that imports; once per process
+@functools.lru_cache(maxsize=None)
+def tflite_runtime():
+    if TFLITE_RUNTIME != "auto" and TFLITE_RUNTIME not in TFLITE_RUNTIMES:
+        raise ValueError(f"Unknown TFLITE_RUNTIME '{TFLITE_RUNTIME}' (choose from auto, {', '.join(TFLITE_RUNTIMES)})")
+    names = list(TFLITE_RUNTIMES) if TFLITE_RUNTIME == "auto" else [TFLITE_RUNTIME]
+    errors = []
+    for name in names:
+        try:
+            return name, importlib.import_module(TFLITE_RUNTIMES[name]).Interpreter
+        except ImportError as e:
+            errors.append(f"{name}: {e}")
+    raise ImportError(f"no TFLite runtime could be imported ({'; '.join(errors)})")
+
+def tf_interpreter(model_path, num_threads=None):
+    _, interpreter = tflite_runtime()
+    return interpreter(model_path=model_path, num_threads=num_threads)
+
+
+class Classifier:
+    # `make_interpreter(model_path, num_threads)` comes from the hardware backend.
+    # `classes` is the model's output order, `color` the channel order it was
+    # trained on and `input_range` the values pixel 0..255 map to.
+    def __init__(self, model_path, num_threads=None, make_interpreter=tf_interpreter,
+                 classes=None, color="rgb", input_range=(0.0, 255.0)):
+        self.model_path = model_path
+        self.interpreter = make_interpreter(model_path, num_threads)
+        self.interpreter.allocate_tensors()
+        module = type(self.interpreter).__module__
+        self.runtime = next((name for name, m in TFLITE_RUNTIMES.items() if m == module), type(self.interpreter).__name__)
+        inp = self.interpreter.get_input_details()[0]
+        out = self.interpreter.get_output_details()[0]
+
+        self.input_index = inp['index']
+        self.output_index = out['index']
+        self.input_dtype = inp['dtype']
+        self.model_h, self.model_w = int(inp['shape'][1]), int(inp['shape'][2])
+        self.in_scale, self.in_zero = inp['quantization']
+        self.out_scale, self.out_zero = out['quantization']
+        self.quantized_input = self.input_dtype != np.float32 and self.in_scale > 0
+        self.quantized_output = out['dtype'] != np.float32 and self.out_scale > 0
+
+        n_out = int(out['shape'][-1])
+        classes = [c.lower() for c in classes] if classes else [c.lower() for c in CLASS_LABELS]
+        if len(classes) != n_out or sorted(classes) != sorted(c.lower() for c in CLASS_LABELS):
+            raise ValueError(f"model has {n_out} outputs, classes {classes} do not match {CLASS_LABELS}")
+        # Model output index for each of CLASS_LABELS; None when already in that order
+        order = [classes.index(c.lower()) for c in CLASS_LABELS]
+        self.class_order = None if order == list(range(n_out)) else order
+        self.color = color
+        self.in_lo, self.in_hi = (float(v) for v in input_range)
+        self.rescaled_input = (self.in_lo, self.in_hi) != (0.0, 255.0)
+
+        size = (self.model_h, self.model_w, 3)
+        self.small = np.empty(size, np.uint8)
+        self.rgb = np.empty(size, np.uint8)
+        self.scaled = np.empty(size, np.float32) if self.quantized_input or self.rescaled_input else None
+        self.batch = 1              # frames the input tensor holds right now
+        self.batchable = True       # False once the model refused a batch dimension
+        self.lock = threading.Lock()
+
+    # Bursts run as one invoke on a [k, h, w, 3] input. The tensor keeps its
+    # size between calls, so a steady burst length costs one re-allocation.
+    def _set_batch(self, k):
+        if k == self.batch: return
+        try:
+            self.interpreter.resize_tensor_input(self.input_index, [k, self.model_h, self.model_w, 3])
+            self.interpreter.allocate_tensors()
+            self.batch = k
+        except Exception as e:
+            print(f"⚠️ {self.model_path} cannot run batches ({e}), bursts run frame by frame")
+            self.interpreter.resize_tensor_input(self.input_index, [1, self.model_h, self.model_w, 3])
+            self.interpreter.allocate_tensors()
+            self.batch, self.batchable = 1, False
+
+    def _preprocess(self, frame_bgr):
+        return prepare(frame_bgr, (self.model_w, self.model_h), self.color, out=self.rgb, scratch=self.small)
+
+    def set_input(self, rgb, row=0):
+        # Fresh view every call: TFLite may move its buffers on allocate_tensors()
+        view = self.interpreter.tensor(self.input_index)()[row]
+        x = rgb
+        if self.rescaled_input:
+            np.multiply(rgb, (self.in_hi - self.in_lo) / 255.0, out=self.scaled)
+            self.scaled += self.in_lo
+            x = self.scaled
+        if not self.quantized_input or (self.in_scale == 1.0 and self.in_zero == 0):
+            np.copyto(view, x, casting="unsafe")
+            return
+        # q = round(x / scale) + zero_point, clipped to the tensor type
+        info = np.iinfo(self.input_dtype)
+        np.multiply(x, 1.0 / self.in_scale, out=self.scaled)
+        np.rint(self.scaled, out=self.scaled)
+        self.scaled += self.in_zero
+        np.clip(self.scaled, info.min, info.max, out=self.scaled)
+        np.copyto(view, self.scaled, casting="unsafe")
+
+    # [rows, classes] in CLASS_LABELS order
+    def get_output(self, rows=1):
+        probs = self.interpreter.get_tensor(self.output_index)[:rows]
+        if self.quantized_output:
+            probs = (probs.astype(np.float32) - self.out_zero) * self.out_scale
+        return probs[:, self.class_order] if self.class_order else probs
+
+    def classify(self, frame_bgr):
+        with self.lock:
+            self._set_batch(1)
+            with metrics.stage("preprocess"):
+                self.set_input(self._preprocess(frame_bgr))
+            with metrics.stage("inference"):
+                self.interpreter.invoke()
+            return self.get_output()[0]
+
+    # Per-frame probabilities [k, classes] for k frames of the same item
+    def classify_burst(self, frames_bgr):
+        if not self.batchable:
+            return np.stack([self.classify(f) for f in frames_bgr])
+        with self.lock:
+            self._set_batch(len(frames_bgr))
+            with metrics.stage("preprocess"):
+                for row, frame in enumerate(frames_bgr):
+                    self.set_input(self._preprocess(frame), row)
+            with metrics.stage("inference"):
+                self.interpreter.invoke()
+            return self.get_output(len(frames_bgr))
+
+    # Frames already through prepare() at model size, [k, h, w, 3] uint8
+    def classify_prepared(self, pixels):
+        with self.lock:
+            if not self.batchable:
+                out = []
+                for p in pixels:
+                    self.set_input(p)
+                    self.interpreter.invoke()
+                    out.append(self.get_output()[0])
+                return np.stack(out)
+            self._set_batch(len(pixels))
+            for row, p in enumerate(pixels):
+                self.set_input(p, row)
+            self.interpreter.invoke()
+            return self.get_output(len(pixels))
+
+
+# A small low-resolution model answers first; the full model only runs when
+# the small one's top probability is below `threshold`.
+class CascadeClassifier:
+    def __init__(self, fast, full, threshold=0.9):
+        self.fast = fast
+        self.full = full
+        self.threshold = threshold
+        self.model_h, self.model_w = full.model_h, full.model_w
+        self.calls = 0
+        self.fallbacks = 0
+        self.last_stage = None
+
+    def classify(self, frame_bgr):
+        self.calls += 1
+        probs = self.fast.classify(frame_bgr)
+        if float(np.max(probs)) >= self.threshold:
+            self.last_stage = "fast"
+            return probs
+        self.fallbacks += 1
+        self.last_stage = "full"
+        return self.full.classify(frame_bgr)
+
+    # The fast model sees the whole burst; its mean answer decides the fallback
+    def classify_burst(self, frames_bgr):
+        self.calls += 1
+        probs = self.fast.classify_burst(frames_bgr)
+        if float(np.max(fuse_burst(probs))) >= self.threshold:
+            self.last_stage = "fast"
+            return probs
+        self.fallbacks += 1
+        self.last_stage = "full"
+        return self.full.classify_burst(frames_bgr)
+
+    def fallback_rate(self):
+        return self.fallbacks / self.calls if self.calls else 0.0
@@ -0,0 +1,264 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+import numpy as np
+import cv2
+import metrics
+
+# ==========================================
+# 🧠 OUT-OF-PROCESS INFERENCE
+# ==========================================
+# INFERENCE_WORKER=1 runs the classifier in a process of its own, so
+# preprocessing and invoke() never hold the GIL the web server, the camera
+# thread and the actuator worker need. Frames are copied once into a ring of
+# shared-memory slots (no pickling); a request is one JSON line naming the
+# slot and frame shape on the worker's stdin, the answer one JSON line on its
+# stdout. The worker is a plain `python inference_worker.py`, not a
+# multiprocessing child, so it never re-imports app.py and its hardware.
+# When it dies it is started again and the request in flight is retried once.
+
+ROOT = Path(__file__).resolve().parent
+START_TIMEOUT_S = 60.0       # TensorFlow import + model load on a Pi 3B
+REQUEST_TIMEOUT_S = 10.0
+RESTART_BACKOFF_S = (1.0, 2.0, 5.0, 10.0)
+
+
+class SharedFrameRing:
+    # The parent creates the block; the worker attaches to it by name
+    def __init__(self, slots, slot_bytes, name=None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * slot_bytes)
+        if not self.owner:
+            # Before 3.13 every attaching process registers the block and its
+            # resource tracker unlinks it on exit, under the parent's feet
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.next = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def view(self, slot, shape):
+        return np.ndarray(shape, np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    # Copies the frame into the next slot and returns the slot number
+    def put(self, frame):
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"frame of {frame.nbytes} bytes does not fit a {self.slot_bytes}-byte slot")
+        slot = self.next
+        self.next = (slot + 1) % self.slots
+        np.copyto(self.view(slot, frame.shape), frame)
+        return slot
+
+    def close(self):
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+
+class WorkerDied(Exception):
+    pass
+
+
+# Drop-in for Classifier / CascadeClassifier in app.py
+class RemoteClassifier:
+    def __init__(self, model_path, num_threads=None, backend="pi", cascade_path="", cascade_threshold=0.9,
+                 frame_size=(640, 480), slots=2, classes=None, color="rgb", input_range=(0.0, 255.0)):
+        self.args = ["--model", model_path, "--backend", backend, "--color", color,
+                     "--input-range", ",".join(str(float(v)) for v in input_range)]
+        if classes: self.args += ["--classes", ",".join(classes)]
+        if num_threads: self.args += ["--threads", str(num_threads)]
+        if cascade_path: self.args += ["--cascade", cascade_path, "--threshold", str(cascade_threshold)]
+        w, h = frame_size
+        self.ring = SharedFrameRing(slots, w * h * 3)
+        self.lock = threading.Lock()         # one request in flight
+        self.proc = None
+        self.replies = {}                     # request id -> reply, filled by the reader thread
+        self.cond = threading.Condition()
+        self.request_id = 0
+        self.closing = False
+        self.last_stage = None
+        self.model_h = self.model_w = None
+
+        # Measurements
+        self.restarts = 0
+        self.handoff_s = 0.0                  # last round trip minus the worker's own time
+
+        try:
+            self._spawn()
+        except Exception:
+            self.ring.close()
+            raise
+
+    def _spawn(self):
+        cmd = [sys.executable, str(ROOT / "inference_worker.py"), "--shm", self.ring.name,
+               "--slots", str(self.ring.slots), "--slot-bytes", str(self.ring.slot_bytes), *self.args]
+        # stderr is inherited so the worker's log lines land in the app's log
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        proc.ready = False
+        with self.cond:
+            self.proc = proc
+        threading.Thread(target=self._read, args=(proc,), daemon=True).start()
+        ready = self._wait_reply(proc, 0, START_TIMEOUT_S)
+        self.model_h, self.model_w = ready["model_h"], ready["model_w"]
+        proc.ready = True
+
+    def _read(self, proc):
+        for line in proc.stdout:
+            try: reply = json.loads(line)
+            except ValueError: continue
+            with self.cond:
+                self.replies[reply.get("id")] = reply
+                self.cond.notify_all()
+        proc.wait()
+        with self.cond:
+            self.cond.notify_all()
+        # A worker that never got ready is handled by whoever started it
+        if proc.ready and not self.closing:
+            print(f"⚠️ Inference worker exited ({proc.returncode}), restarting")
+            threading.Thread(target=self._restart, args=(proc,), daemon=True).start()
+
+    # Back in service before the next scan needs it; later failures back off
+    def _restart(self, dead):
+        for delay in itertools.chain(RESTART_BACKOFF_S, itertools.repeat(RESTART_BACKOFF_S[-1])):
+            with self.lock:
+                if self.closing or self.proc is not dead: return
+                try:
+                    self._spawn()
+                    self.restarts += 1
+                    print(f"✅ Inference worker restarted (pid {self.proc.pid})")
+                    return
+                except Exception as e:
+                    print(f"❌ Inference worker failed to start: {e}")
+            time.sleep(delay)
+
+    def _wait_reply(self, proc, request_id, timeout):
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while request_id not in self.replies:
+                remaining = deadline - time.monotonic()
+                if proc.poll() is not None or remaining <= 0:
+                    proc.kill()
+                    raise WorkerDied(f"no answer from the inference worker (exit {proc.poll()})")
+                self.cond.wait(min(remaining, 0.5))
+            reply = self.replies.pop(request_id)
+        if "error" in reply: raise RuntimeError(reply["error"])
+        return reply
+
+    # All frames of a request share one shape; a burst takes one slot per frame
+    def _request(self, frames_bgr):
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            raise WorkerDied("inference worker is not running")
+        if len(frames_bgr) > self.ring.slots:
+            raise ValueError(f"burst of {len(frames_bgr)} frames, the ring has {self.ring.slots} slots")
+        slots = [self.ring.put(frame) for frame in frames_bgr]
+        self.request_id += 1
+        t0 = time.perf_counter()
+        try:
+            request = {"id": self.request_id, "slots": slots, "shape": frames_bgr[0].shape}
+            proc.stdin.write(json.dumps(request) + "\n")
+            proc.stdin.flush()
+        except OSError as e:
+            raise WorkerDied(str(e))
+        reply = self._wait_reply(proc, self.request_id, REQUEST_TIMEOUT_S)
+        self.handoff_s = time.perf_counter() - t0 - reply["seconds"]
+        metrics.STAGES.observe(reply["seconds"], stage="inference")
+        metrics.STAGES.observe(self.handoff_s, stage="inference_handoff")
+        return reply
+
+    def _fit(self, frame_bgr):
+        if frame_bgr.nbytes <= self.ring.slot_bytes: return frame_bgr
+        # Camera gave more than asked for; the model input is far smaller anyway
+        scale = (self.ring.slot_bytes / frame_bgr.nbytes) ** 0.5
+        h, w = frame_bgr.shape[:2]
+        return cv2.resize(frame_bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+    # Preprocessing happens in the worker and is part of its "inference" time
+    def classify_burst(self, frames_bgr):
+        frames = [self._fit(f) for f in frames_bgr]
+        with self.lock:
+            try:
+                reply = self._request(frames)
+            except WorkerDied as e:
+                # The frames are still good; retry once on a fresh worker
+                print(f"⚠️ {e}, retrying on a new worker")
+                if self.proc.poll() is None: self.proc.kill()
+                self._spawn()
+                self.restarts += 1
+                reply = self._request(frames)
+            self.last_stage = reply.get("stage")
+            return np.asarray(reply["probs"], np.float32)
+
+    def classify(self, frame_bgr):
+        return self.classify_burst([frame_bgr])[0]
+
+    def close(self):
+        self.closing = True
+        if self.proc and self.proc.poll() is None:
+            self.proc.stdin.close()
+            try: self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired: self.proc.kill()
+        self.ring.close()
+
+
+# ==========================================
+# 🔧 WORKER PROCESS
+# ==========================================
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shm", required=True)
+    ap.add_argument("--slots", type=int, required=True)
+    ap.add_argument("--slot-bytes", type=int, required=True)
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--backend", default="pi")
+    ap.add_argument("--threads", type=int)
+    ap.add_argument("--cascade", default="")
+    ap.add_argument("--threshold", type=float, default=0.9)
+    ap.add_argument("--classes", help="Model output order, comma separated")
+    ap.add_argument("--color", default="rgb")
+    ap.add_argument("--input-range", default="0,255")
+    args = ap.parse_args()
+
+    # stdout carries the answers; anything printed goes to the log instead
+    channel, sys.stdout = sys.stdout, sys.stderr
+    def send(reply):
+        channel.write(json.dumps(reply) + "\n")
+        channel.flush()
+
+    from hardware.backend import load_backend
+    from inference import Classifier, CascadeClassifier
+    hw = load_backend(args.backend)
+    classifier = Classifier(args.model, num_threads=args.threads, make_interpreter=hw.interpreter,
+                            classes=args.classes.split(",") if args.classes else None, color=args.color,
+                            input_range=[float(v) for v in args.input_range.split(",")])
+    if args.cascade:
+        fast = Classifier(args.cascade, num_threads=args.threads, make_interpreter=hw.interpreter)
+        classifier = CascadeClassifier(fast, classifier, threshold=args.threshold)
+    ring = SharedFrameRing(args.slots, args.slot_bytes, name=args.shm)
+    print(f"✅ Inference worker ready (pid {os.getpid()}, {args.model})")
+    send({"id": 0, "model_h": classifier.model_h, "model_w": classifier.model_w})
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        t0 = time.perf_counter()
+        try:
+            frames = [ring.view(slot, tuple(request["shape"])) for slot in request["slots"]]
+            probs = classifier.classify_burst(frames) if len(frames) > 1 else classifier.classify(frames[0])[None]
+            send({"id": request["id"], "probs": np.asarray(probs, float).tolist(), "seconds": time.perf_counter() - t0,
+                  "stage": getattr(classifier, "last_stage", None)})
+        except Exception as e:
+            send({"id": request["id"], "error": str(e)})
+    ring.close()
+
+
+if __name__ == "__main__":
+    main()
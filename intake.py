@@ -0,0 +1,118 @@
+import threading
+import time
+import cv2
+import numpy as np
+from fusion import chamber_signature, changed_fraction
+
+# ==========================================
+# 👀 INTAKE PRESENCE DETECTOR
+# ==========================================
+# Watches the live camera at a few Hz on 32x24 grayscale signatures. While
+# the chamber is empty it slowly learns the background. When enough of the
+# view differs from it and then stops changing for a few frames, `on_item`
+# fires once. It re-arms only after the chamber is seen empty again.
+
+EMPTY, MOTION, TRIGGERED = "EMPTY", "MOTION", "TRIGGERED"
+
+
+class IntakeDetector:
+    def __init__(self, ring, on_item, poll_hz=5.0, presence=0.03, still=0.01, still_frames=3, learn_rate=0.05):
+        self.ring = ring
+        self.on_item = on_item
+        self.poll_s = 1.0 / poll_hz
+        self.presence = presence          # share of the view that must differ from the background
+        self.still_changed = still        # max share changing between consecutive frames "at rest"
+        self.still_frames = still_frames
+        self.learn_rate = learn_rate
+
+        self.state = EMPTY
+        self.background = None
+        self.previous = None
+        self.still = 0
+        self.motion_at = None
+        self.last_seq = 0
+        self.enabled = False
+
+        # Measurements
+        self.cpu_s = 0.0
+        self.frames = 0
+        self.started_at = time.monotonic()
+        self.latencies = []     # motion start -> trigger (s)
+
+    def start(self):
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def enable(self, on=True):
+        self.enabled = on
+        self.state, self.previous, self.still = EMPTY, None, 0
+
+    def _loop(self):
+        while True:
+            time.sleep(self.poll_s)
+            if not self.enabled: continue
+            frame = self.ring.acquire_latest()
+            if frame is None or frame.seq == self.last_seq:
+                if frame: frame.release()
+                continue
+            t0 = time.thread_time()
+            with frame:
+                self.last_seq = frame.seq
+                sig = chamber_signature(frame.image)
+            try:
+                fire = self.process(sig, time.monotonic())
+            except Exception as e:
+                print(f"❌ Intake Error: {e}")
+                fire = False
+            self.cpu_s += time.thread_time() - t0
+            if fire:
+                try: self.on_item()
+                except Exception as e: print(f"❌ Auto Scan Error: {e}")
+
+    # One detector step on a signature; returns True when an item has come to rest
+    def process(self, sig, now):
+        self.frames += 1
+        if self.background is None:
+            self.background = sig.astype(np.float32)
+            self.previous = sig
+            return False
+        if self.previous is None:
+            # First frame since enable(): nothing to measure motion against yet
+            self.previous = sig
+            return False
+
+        present = changed_fraction(sig, self.background.astype(np.uint8)) >= self.presence
+        moving = changed_fraction(sig, self.previous) >= self.still_changed
+        self.previous = sig
+        self.still = 0 if moving else self.still + 1
+
+        if self.state == EMPTY:
+            if present:
+                self.state, self.motion_at, self.still = MOTION, now, 0
+            else:
+                # Only an empty chamber is learned, lighting drifts slowly
+                cv2.accumulateWeighted(sig.astype(np.float32), self.background, self.learn_rate)
+        elif self.state == MOTION:
+            if not present:
+                self.state = EMPTY
+            elif self.still >= self.still_frames:
+                self.state = TRIGGERED
+                self.latencies.append(now - self.motion_at)
+                return True
+        elif self.state == TRIGGERED:
+            # Wait for the item to leave (sorted or taken back) before re-arming
+            if not present and self.still >= self.still_frames:
+                self.state = EMPTY
+        return False
+
+    def cpu_fraction(self):
+        wall = time.monotonic() - self.started_at
+        return self.cpu_s / wall if wall > 0 else 0.0
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "frames": self.frames,
+            "cpu_fraction": self.cpu_fraction(),
+            "cpu_ms_per_frame": self.cpu_s * 1000 / self.frames if self.frames else 0.0,
+            "trigger_latency_s": sum(self.latencies) / len(self.latencies) if self.latencies else None,
+        }
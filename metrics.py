@@ -0,0 +1,145 @@
+import bisect
+import os
+import threading
+import time
+
+# ==========================================
+# 📈 HOT-PATH METRICS
+# ==========================================
+# Counters and fixed-bucket histograms kept in plain Python (no extra
+# dependency), rendered in the Prometheus text format on /metrics. A timer is
+# two perf_counter() calls and one bucket lookup. With METRICS=0 everything
+# below turns into no-ops and the route is not registered.
+#
+#   with metrics.stage("inference"): ...
+#   metrics.DECISIONS.inc(result="accepted", label="Can", reason="can + metal")
+
+ENABLED = os.getenv("METRICS", "1") != "0"
+
+# Seconds: 1 ms .. 5 s covers everything from an LED write to a full motor sequence
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry = []
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self.values = {}
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, n=1, **labels):
+        if not ENABLED: return
+        key = _key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + n
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_fmt_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets=STAGE_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.series = {}        # labels -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        if not ENABLED: return
+        i = bisect.bisect_left(self.buckets, value)
+        key = _key(labels)
+        with self.lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [0] * (len(self.buckets) + 2)
+            s[i] += 1
+            s[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels) if ENABLED else _NULL_TIMER
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, s in sorted(self.series.items()):
+                running = 0
+                for bound, n in zip(self.buckets + ("+Inf",), s[:-1]):
+                    running += n
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key, [('le', bound)])} {running}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {s[-1]:.6f}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {running}")
+        return lines
+
+
+# A value read at scrape time, e.g. a counter another module already keeps
+class Gauge:
+    def __init__(self, name, help, read, kind="gauge"):
+        self.name, self.help, self.read, self.kind = name, help, read, kind
+        _registry.append(self)
+
+    def render(self):
+        try: value = self.read()
+        except Exception: return []
+        if value is None: return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {value}"]
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist, labels):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, **self.labels)
+
+
+class _NullTimer:
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- The kiosk's own metrics ---
+STAGES = Histogram("rvm_stage_seconds", "Time spent in each step of a scan")
+SCANS = Histogram("rvm_scan_seconds", "Whole /action/scan handling time")
+DECISIONS = Counter("rvm_decisions_total", "Scan decisions by result, label and reason")
+BACKEND = Counter("rvm_backend_requests_total", "Backend API calls by action and result")
+
+
+def stage(name):
+    return STAGES.time(stage=name)
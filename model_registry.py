@@ -0,0 +1,397 @@
+import argparse
+import json
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+import numpy as np
+import metrics
+from inference import fuse_burst, label_for
+
+# ==========================================
+# 🗂️ MODEL REGISTRY
+# ==========================================
+# Every model version is a directory holding the .tflite file and what the
+# app needs to know to feed it:
+#
+#   model/registry/
+#     registry.json              {"active": "v3", "shadow": "v4", "shadow_rate": 0.25}
+#     v3/model.tflite
+#     v3/meta.json               {"input_size": [224, 224], "classes": ["can", "other", "plastic"],
+#                                 "color": "rgb", "input_range": [0, 255], "notes": "..."}
+#
+# The app watches registry.json. A new active version is loaded and warmed up
+# in the background and swapped in between two scans; until then, and for
+# good if it fails to load, the current model keeps answering. A shadow
+# version runs next to it on a sample of live frames and records how often
+# it agrees with the active model and how long it takes, without touching
+# the decision.
+#
+#   python model_registry.py add v4 ~/ai-model-fp32-v4.tflite --notes "more cans"
+#   python model_registry.py shadow v4 --rate 0.5
+#   python model_registry.py activate v4
+#   python model_registry.py list
+
+CONFIG_FILE = "registry.json"
+MODEL_FILE = "model.tflite"
+META_FILE = "meta.json"
+DEFAULT_META = {"classes": ["can", "other", "plastic"], "color": "rgb", "input_range": [0, 255]}
+
+SHADOW = metrics.Counter("rvm_shadow_comparisons_total", "Shadow model runs by agreement with the active model")
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def versions(self):
+        if not self.root.is_dir(): return []
+        return sorted(p.name for p in self.root.iterdir() if (p / MODEL_FILE).is_file())
+
+    def model_path(self, version):
+        return str(self.root / version / MODEL_FILE)
+
+    def meta(self, version):
+        try:
+            meta = json.loads((self.root / version / META_FILE).read_text())
+        except (OSError, ValueError):
+            meta = {}
+        return {**DEFAULT_META, **meta, "version": version}
+
+    def config(self):
+        try:
+            config = json.loads((self.root / CONFIG_FILE).read_text())
+            return config if isinstance(config, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def config_mtime(self):
+        try: return (self.root / CONFIG_FILE).stat().st_mtime
+        except OSError: return None
+
+    # Same temp-file-then-rename as the calibration store; the app never reads half a file
+    def save_config(self, config):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f"{CONFIG_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(config, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.root / CONFIG_FILE)
+        return config
+
+    def add(self, version, model_file, **meta):
+        folder = self.root / version
+        if folder.exists(): raise FileExistsError(f"version {version} is already in the registry")
+        folder.mkdir(parents=True)
+        shutil.copyfile(model_file, folder / MODEL_FILE)
+        meta = {**DEFAULT_META, **{k: v for k, v in meta.items() if v is not None},
+                "source": os.path.basename(model_file), "added_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        (folder / META_FILE).write_text(json.dumps(meta, indent=2))
+        return meta
+
+
+class LoadedModel:
+    def __init__(self, version, classifier, meta, warmup_ms):
+        self.version = version
+        self.classifier = classifier
+        self.meta = meta
+        self.warmup_ms = warmup_ms
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def info(self):
+        return {"version": self.version, "loaded_at": self.loaded_at, "warmup_ms": round(self.warmup_ms, 1),
+                "runtime": getattr(self.classifier, "runtime", None),
+                "input_size": [self.classifier.model_h, self.classifier.model_w]}
+
+
+# Stands in for the classifier in app.py: classify() always goes to the model
+# active when the call starts, swaps only replace the reference.
+class ModelManager:
+    # `build(model_path, meta)` returns a Classifier-like object; `fallback` is
+    # (model_path, meta) used when the registry has nothing that loads
+    # `burst` is the number of frames per scan, warm-up runs the same batch size
+    def __init__(self, registry, build, fallback=None, frame_size=(640, 480), warmup_runs=3, poll_s=5.0, burst=1):
+        self.registry = registry
+        self.build = build
+        self.fallback = fallback
+        self.frame_size = frame_size
+        self.warmup_runs = warmup_runs
+        self.poll_s = poll_s
+        self.burst = burst
+        self.active = None
+        self.shadow = None
+        self.shadow_rate = 0.0
+        self.loading = {}           # role -> version being loaded
+        self.errors = {}            # version -> why it did not load
+        self.last_stage = None
+        self.load_lock = threading.Lock()
+        self.config_mtime = None
+        self.ready = threading.Event()  # set once a model is active
+        self.boot_error = None
+        self.boot_s = None              # start() until then
+
+        # Shadow runs are queued to their own thread and dropped when it is busy
+        self.shadow_jobs = queue.Queue(maxsize=1)
+        self.shadow_agree = 0
+        self.shadow_runs = 0
+        self.shadow_ms = deque(maxlen=200)
+        self.active_ms = deque(maxlen=200)
+
+    @property
+    def model_h(self): return self.active.classifier.model_h
+
+    @property
+    def model_w(self): return self.active.classifier.model_w
+
+    @property
+    def version(self): return self.active.version
+
+    # Blocking first load at boot; raises when neither the registry nor the
+    # fallback loads. app.py runs it on a thread so the kiosk is served
+    # meanwhile; `ready` is set as soon as a model can take scans. The
+    # registry is watched even when this fails, so activating a version
+    # that loads still brings the machine up without a restart.
+    def start(self):
+        t0 = time.perf_counter()
+        config = self.registry.config()
+        self.config_mtime = self.registry.config_mtime()
+        threading.Thread(target=self._watch, daemon=True).start()
+        threading.Thread(target=self._shadow_worker, daemon=True).start()
+        with self.load_lock:
+            # Nothing is active until `activate` says so; the fallback runs meanwhile
+            version = config.get("active")
+            if version:
+                self.active = self._load(version)
+            if self.active is None and self.fallback:
+                path, meta = self.fallback
+                self.active = self._load(meta.get("version", "env"), path, meta)
+            if self.active is None:
+                self.boot_error = f"no model could be loaded ({'; '.join(self.errors.values()) or 'registry empty'})"
+                raise RuntimeError(self.boot_error)
+            self.boot_s = time.perf_counter() - t0
+            self.ready.set()
+            self._apply_shadow(config)
+        return self
+
+    def state(self):
+        return "READY" if self.ready.is_set() else "ERROR" if self.boot_error else "WARMING_UP"
+
+    def classify(self, frame_bgr):
+        return self.classify_burst([frame_bgr])[0]
+
+    # Per-frame probabilities [k, classes]; the shadow model gets the same frames
+    def classify_burst(self, frames_bgr):
+        model = self.active
+        if model is None:
+            raise RuntimeError(self.boot_error or "model still warming up")
+        t0 = time.perf_counter()
+        if len(frames_bgr) == 1:
+            probs = model.classifier.classify(frames_bgr[0])[None]
+        else:
+            probs = model.classifier.classify_burst(frames_bgr)
+        active_ms = (time.perf_counter() - t0) * 1000
+        self.last_stage = getattr(model.classifier, "last_stage", None)
+        shadow = self.shadow
+        if shadow and random.random() < self.shadow_rate:
+            try: self.shadow_jobs.put_nowait((shadow, [f.copy() for f in frames_bgr], probs, active_ms))
+            except queue.Full: pass
+        return probs
+
+    # Background load + warmup, then swap; the scan path never waits for it
+    def activate(self, version):
+        threading.Thread(target=self._activate, args=(version,), daemon=True).start()
+
+    def status(self):
+        return {
+            "state": self.state(),
+            "boot_s": self.boot_s,
+            "active": self.active.info() if self.active else None,
+            "shadow": dict(self.shadow.info(), **self.shadow_stats()) if self.shadow else None,
+            "loading": dict(self.loading),
+            "errors": dict(self.errors),
+            "versions": self.registry.versions(),
+        }
+
+    def shadow_stats(self):
+        median = lambda v: float(np.median(v)) if v else None
+        return {"rate": self.shadow_rate, "runs": self.shadow_runs,
+                "agreement": self.shadow_agree / self.shadow_runs if self.shadow_runs else None,
+                "active_ms_p50": median(list(self.active_ms)), "shadow_ms_p50": median(list(self.shadow_ms))}
+
+    def _load(self, version, path=None, meta=None, role="active"):
+        meta = meta or self.registry.meta(version)
+        path = path or self.registry.model_path(version)
+        self.loading[role] = version
+        try:
+            classifier = self.build(path, meta)
+            size = meta.get("input_size")
+            if size and list(size) != [classifier.model_h, classifier.model_w]:
+                raise ValueError(f"metadata says {size}, the model takes {classifier.model_h}x{classifier.model_w}")
+            warmup_ms = self._warm_up(classifier)
+            self.errors.pop(version, None)
+            print(f"✅ Model {version} loaded ({path}, warm-up {warmup_ms:.0f} ms)")
+            return LoadedModel(version, classifier, meta, warmup_ms)
+        except Exception as e:
+            self.errors[version] = f"{version}: {e}"
+            print(f"❌ Model {version} did not load: {e}")
+            return None
+        finally:
+            self.loading.pop(role, None)
+
+    # First invokes allocate and page the weights in; a model that cannot
+    # answer a plain frame is not put in front of a user
+    def _warm_up(self, classifier):
+        w, h = self.frame_size
+        frame = np.full((h, w, 3), 64, np.uint8)
+        t0 = time.perf_counter()
+        for _ in range(self.warmup_runs):
+            if self.burst > 1:
+                probs = np.asarray(classifier.classify_burst([frame] * self.burst))
+            else:
+                probs = np.asarray(classifier.classify(frame))
+        if not np.all(np.isfinite(probs)):
+            raise ValueError("model answers NaN on a warm-up frame")
+        return (time.perf_counter() - t0) * 1000 / max(1, self.warmup_runs)
+
+    def _activate(self, version):
+        with self.load_lock:
+            if self.active and self.active.version == version: return
+            if self.shadow and self.shadow.version == version:
+                # Promoted from shadow: already loaded and warm
+                loaded, self.shadow = self.shadow, None
+            else:
+                loaded = self._load(version)
+            if loaded is None: return
+            old, self.active = self.active, loaded
+            print(f"🔁 Active model {old.version if old else '-'} -> {version}")
+            if old: self._retire(old)
+            # First model after a failed boot
+            self.boot_error = None
+            self.ready.set()
+
+    def _apply_shadow(self, config):
+        version = config.get("shadow")
+        self.shadow_rate = float(config.get("shadow_rate", 0.25))
+        if version == (self.shadow.version if self.shadow else None): return
+        old, self.shadow = self.shadow, None
+        if old: self._retire(old)
+        self.shadow_agree = self.shadow_runs = 0
+        self.shadow_ms.clear(); self.active_ms.clear()
+        if version and self.active and version != self.active.version:
+            self.shadow = self._load(version, role="shadow")
+
+    def close(self):
+        for model in (self.shadow, self.active):
+            if model: self._retire(model)
+
+    # A worker-process classifier holds a process and shared memory; it is
+    # closed once the call in flight (if any) has returned
+    def _retire(self, model):
+        close = getattr(model.classifier, "close", None)
+        if close is None: return
+        with model.classifier.lock:
+            close()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_s)
+            mtime = self.registry.config_mtime()
+            if mtime == self.config_mtime: continue
+            self.config_mtime = mtime
+            config = self.registry.config()
+            try:
+                active = config.get("active")
+                if active and (self.active is None or active != self.active.version):
+                    self._activate(active)
+                with self.load_lock:
+                    self._apply_shadow(config)
+            except Exception as e:
+                print(f"❌ Model registry error: {e}")
+
+    def _shadow_worker(self):
+        while True:
+            shadow, frames, active_probs, active_ms = self.shadow_jobs.get()
+            if shadow is not self.shadow: continue
+            try:
+                t0 = time.perf_counter()
+                if len(frames) == 1:
+                    probs = shadow.classifier.classify(frames[0])
+                else:
+                    probs = fuse_burst(shadow.classifier.classify_burst(frames))
+                shadow_ms = (time.perf_counter() - t0) * 1000
+                active_probs = fuse_burst(active_probs)
+            except Exception as e:
+                print(f"⚠️ Shadow model {shadow.version} failed: {e}")
+                continue
+            agree = label_for(probs) == label_for(active_probs)
+            self.shadow_runs += 1
+            self.shadow_agree += agree
+            self.shadow_ms.append(shadow_ms)
+            self.active_ms.append(active_ms)
+            SHADOW.inc(version=shadow.version, result="agree" if agree else "disagree")
+            metrics.STAGES.observe(shadow_ms / 1000, stage="shadow_inference")
+            if not agree:
+                print(f"   [Shadow] {shadow.version} says {label_for(probs)} {max(probs):.2f}, "
+                      f"active says {label_for(active_probs)} {max(active_probs):.2f}")
+
+
+# ==========================================
+# 🔧 REGISTRY CLI
+# ==========================================
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--registry", default=os.getenv("MODEL_REGISTRY", "model/registry"))
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Versions and what is active / shadowed")
+    add = sub.add_parser("add", help="Copy a .tflite file into the registry as a new version")
+    add.add_argument("version")
+    add.add_argument("model_file")
+    add.add_argument("--classes", default="can,other,plastic", help="Output order, comma separated")
+    add.add_argument("--color", choices=("rgb", "bgr"), default="rgb")
+    add.add_argument("--input-range", default="0,255", help="Values pixel 0..255 map to, e.g. -1,1")
+    add.add_argument("--input-size", help="HxW, checked against the model when it loads")
+    add.add_argument("--notes")
+    activate = sub.add_parser("activate", help="Make a version the one that decides")
+    activate.add_argument("version")
+    shadow = sub.add_parser("shadow", help="Run a version next to the active one (no version: stop)")
+    shadow.add_argument("version", nargs="?")
+    shadow.add_argument("--rate", type=float, default=0.25, help="Share of scans the shadow model sees")
+    args = ap.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    config = registry.config()
+    if args.command == "add":
+        meta = registry.add(args.version, args.model_file, classes=args.classes.split(","), color=args.color,
+                            input_range=[float(v) for v in args.input_range.split(",")],
+                            input_size=[int(v) for v in args.input_size.split("x")] if args.input_size else None,
+                            notes=args.notes)
+        print(f"✅ Added {args.version}: {json.dumps(meta)}")
+    elif args.command in ("activate", "shadow") and args.version and args.version not in registry.versions():
+        print(f"❌ No version {args.version} in {args.registry}")
+    elif args.command == "activate":
+        config["active"] = args.version
+        if config.get("shadow") == args.version: config.pop("shadow")
+        registry.save_config(config)
+        print(f"✅ {args.version} will be active within a few seconds (the app loads it in the background)")
+    elif args.command == "shadow":
+        if args.version:
+            config.update(shadow=args.version, shadow_rate=args.rate)
+            print(f"✅ {args.version} shadows {config.get('active', 'the active model')} on {args.rate:.0%} of scans")
+        else:
+            config.pop("shadow", None)
+            print("✅ Shadow mode off")
+        registry.save_config(config)
+    else:
+        for version in registry.versions():
+            role = "active" if version == config.get("active") else "shadow" if version == config.get("shadow") else ""
+            meta = registry.meta(version)
+            print(f"  {version:<12} {role:<7} {meta.get('added_at', ''):<20} {meta.get('notes') or ''}")
+
+
+if __name__ == "__main__":
+    main()
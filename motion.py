@@ -0,0 +1,70 @@
+import time
+
+# ==========================================
+# 🦾 SERVO MOTION PLANNER
+# ==========================================
+# Remembers the last angle commanded on every channel, so a move to where a
+# servo already is costs nothing (two plastics in a row leave the gate where
+# it is). The wait after a move follows the angular distance and the
+# channel's measured speed (hardware/sorter.py) instead of a fixed sleep.
+# A released servo is assumed to stay put, the gear train holds the horn.
+
+DEFAULT_DEG_PER_S = 200.0    # MG996R under load, conservative until calibrated
+
+
+class MotionPlanner:
+    def __init__(self, kit, rates=None, default_rate=DEFAULT_DEG_PER_S, settle_s=0.08, full_range=180.0):
+        self.kit = kit
+        self.rates = {int(ch): float(r) for ch, r in (rates or {}).items()}
+        self.default_rate = default_rate
+        self.settle_s = settle_s        # horn stops oscillating after it arrives
+        self.full_range = full_range    # assumed travel when the position is unknown
+        self.angles = {}                # channel -> last commanded angle
+        self.powered = set()
+
+        # Measurements
+        self.moves = 0
+        self.skipped = 0
+        self.travel_s = 0.0
+
+    def rate(self, channel):
+        return self.rates.get(channel, self.default_rate)
+
+    def travel_time(self, channel, angle):
+        current = self.angles.get(channel)
+        distance = self.full_range if current is None else abs(angle - current)
+        return distance / self.rate(channel) + self.settle_s if distance else 0.0
+
+    # Returns the seconds waited (0.0 when the servo was already there)
+    def move(self, channel, angle, wait=True):
+        return self.move_together({channel: angle}, wait)
+
+    # Starts all moves at once and waits for the slowest one
+    def move_together(self, targets, wait=True):
+        longest = 0.0
+        for channel, angle in targets.items():
+            travel = self.travel_time(channel, angle)
+            if travel == 0.0:
+                self.skipped += 1
+                if channel in self.powered: continue
+            else:
+                self.moves += 1
+            # Same angle on a released servo only re-energizes it to hold
+            self.kit.servo[channel].angle = angle
+            self.angles[channel] = angle
+            self.powered.add(channel)
+            longest = max(longest, travel)
+        if wait and longest:
+            time.sleep(longest)
+        self.travel_s += longest
+        return longest
+
+    # Cuts the PWM so the servos stop buzzing; positions are remembered
+    def release(self, *channels):
+        for channel in channels or list(self.powered):
+            self.kit.servo[channel].angle = None
+            self.powered.discard(channel)
+
+    # Position unknown again (power cycle, someone moved the horn by hand)
+    def forget(self):
+        self.angles.clear()
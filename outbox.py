@@ -0,0 +1,190 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+# ==========================================
+# 📮 TRANSACTION OUTBOX
+# ==========================================
+# START/STOP/ITEM events are journaled to SQLite first and the kiosk moves on.
+# A background sender drains the journal in order over one pooled
+# keep-alive session, retrying with exponential backoff while the backend is
+# unreachable. Batching is on the journal side only (up to `batch_size`
+# events read and marked sent per SQLite transaction): the kiosk API takes
+# one {"action": ...} per POST, so each event is still its own request.
+# Sessions always start with a local "OFF-<ts>" id; once the START reaches
+# the backend the remote id and claim secret are recorded against it, and
+# later events for that session are sent with the remote id.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    local_txn TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    upload INTEGER NOT NULL DEFAULT 1,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    sent REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS events_pending ON events (sent, id);
+CREATE TABLE IF NOT EXISTS txns (
+    local_txn TEXT PRIMARY KEY,
+    remote_txn TEXT,
+    claim_secret TEXT
+);
+"""
+
+# Backend answers that will never succeed on retry; the event is parked, not resent
+PERMANENT_ERRORS = {400, 401, 403, 404, 409, 422}
+
+
+class Outbox:
+    def __init__(self, path, api_url, secret, batch_size=20, timeout=5.0, max_backoff=60.0, keep_days=14):
+        self.api_url = api_url
+        self.secret = secret
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.keep_days = keep_days
+
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.wake = threading.Event()
+        self.failures = 0
+        self.sent_count = 0
+        self.last_error = None
+        self.online = None
+
+    def start(self):
+        self.prune()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    # --- Producer side (kiosk routes): never touches the network ---
+
+    def new_transaction(self):
+        return f"OFF-{int(time.time() * 1000)}"
+
+    def enqueue(self, kind, local_txn, payload, upload=True):
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO events (kind, local_txn, payload, upload, created, sent) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, local_txn, json.dumps(payload), int(upload), time.time(), None if upload else time.time()))
+        if upload: self.wake.set()
+
+    # (remote transaction id, claim secret) once the START went through
+    def resolve(self, local_txn):
+        with self.lock:
+            row = self.db.execute("SELECT remote_txn, claim_secret FROM txns WHERE local_txn = ?", (local_txn,)).fetchone()
+        return row if row else (None, None)
+
+    def pending(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM events WHERE sent IS NULL").fetchone()[0]
+
+    def prune(self):
+        cutoff = time.time() - self.keep_days * 86400
+        with self.lock:
+            self.db.execute("DELETE FROM events WHERE sent IS NOT NULL AND sent < ?", (cutoff,))
+
+    # --- Sender ---
+
+    def _loop(self):
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    "SELECT id, kind, local_txn, payload FROM events WHERE sent IS NULL ORDER BY id LIMIT ?",
+                    (self.batch_size,)).fetchall()
+            if not rows:
+                self.wake.wait(30)
+                self.wake.clear()
+                continue
+
+            done, ok = self._send_batch(rows)
+            if done:
+                with self.lock:
+                    self.db.execute("BEGIN")
+                    self.db.executemany("UPDATE events SET sent = ?, error = ? WHERE id = ?", done)
+                    self.db.execute("COMMIT")
+            if not ok:
+                self._backoff()
+
+    # Sends rows in order, one POST each (the kiosk API has no batch form),
+    # and stops at the first retryable failure so a STOP is never delivered
+    # ahead of its START.
+    def _send_batch(self, rows):
+        done = []
+        for event_id, kind, local_txn, payload in rows:
+            try:
+                status, error = self._send(kind, local_txn, json.loads(payload))
+            except Exception as e:
+                self._failed(event_id, e)
+                return done, False
+            if status >= 500:
+                self._failed(event_id, f"HTTP {status}")
+                return done, False
+            error = error or (f"HTTP {status}" if status in PERMANENT_ERRORS else None)
+            if error: print(f"⚠️ Outbox: {kind} {local_txn} rejected ({error}), parked")
+            done.append((time.time(), error, event_id))
+            self.sent_count += 1
+        self.failures, self.online = 0, True
+        return done, True
+
+    # (HTTP status, error that parks the event or None)
+    def _send(self, kind, local_txn, payload):
+        payload["secret"] = self.secret
+        remote_txn, _ = self.resolve(local_txn)
+        if kind == "START":
+            payload["localTransactionId"] = local_txn
+        elif remote_txn:
+            payload["transactionId"] = remote_txn
+        try:
+            with metrics.stage("backend_http"):
+                res = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+        except Exception:
+            metrics.BACKEND.inc(action=kind, result="error")
+            raise
+        metrics.BACKEND.inc(action=kind, result=res.status_code)
+        if kind == "START" and res.ok:
+            # A 2xx that is not the backend's JSON (captive portal, proxy page) would
+            # fail the same way on every retry and hold up every event behind it
+            try:
+                data = res.json()
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return res.status_code, f"HTTP {res.status_code} without a JSON object"
+            if data.get("transactionId"):
+                with self.lock:
+                    self.db.execute("INSERT OR REPLACE INTO txns VALUES (?, ?, ?)",
+                                    (local_txn, data["transactionId"], data.get("claimSecret")))
+                print(f"📮 Outbox: {local_txn} -> {data['transactionId']}")
+        return res.status_code, None
+
+    def _failed(self, event_id, error):
+        self.failures += 1
+        self.online = False
+        self.last_error = str(error)
+        with self.lock:
+            self.db.execute("UPDATE events SET attempts = attempts + 1, error = ? WHERE id = ?", (self.last_error, event_id))
+
+    def _backoff(self):
+        delay = min(self.max_backoff, 0.5 * 2 ** min(self.failures, 10))
+        delay *= random.uniform(0.8, 1.2)
+        print(f"⚠️ Outbox offline ({self.last_error}), retry in {delay:.1f}s")
+        # A new event does not cut the backoff short, only time does
+        time.sleep(delay)
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+
+# ==========================================
+# 📼 SCAN RECORDER
+# ==========================================
+# Black box for field data: each scan's lit frames, per-frame and fused
+# probabilities, weight, metal latch and decision, kept for retraining and
+# for debugging misclassifications. The scan path only copies the frames and
+# puts them on a bounded queue. A writer thread does the JPEG encoding and
+# the disk writes. When the queue is full the record is dropped, the scan
+# never waits for the SD card.
+#
+# On disk: segments of two append-only files
+#   000042.frames   JPEG frames back to back
+#   000042.jsonl    one compact JSON line per scan with the [offset, length]
+#                   of its frames; "update" lines add fields to an earlier
+#                   scan (the settled weight, measured after sorting)
+# A new segment starts at every boot and once the frames file passes
+# `segment_mb`. Whole segments, oldest first, are deleted to stay under
+# `budget_mb`. A record is only used once its line is complete, and
+# offsets past the end of the frames file are ignored, so a power cut costs
+# at most the last scan.
+#
+#   python recorder.py summary
+#   python recorder.py --root recordings export /data/field --label Can     (image folders for train.py / evaluate.py)
+
+FRAMES_SUFFIX = ".frames"
+LOG_SUFFIX = ".jsonl"
+
+
+class ScanRecorder:
+    def __init__(self, root, budget_mb=256.0, segment_mb=8.0, quality=85, max_width=None, queue_size=16):
+        self.root = Path(root)
+        self.budget_bytes = int(budget_mb * 1e6)
+        self.segment_bytes = int(segment_mb * 1e6)
+        self.quality = quality
+        self.max_width = max_width
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.seq = None
+        self.frames_file = None
+        self.log_file = None
+
+        # Measurements
+        self.recorded = 0
+        self.dropped = 0
+        self.evicted = 0
+        self.errors = 0
+        self.disk_bytes = 0
+
+    def start(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        segments = list_segments(self.root)
+        self.seq = segments[-1] + 1 if segments else 0
+        self.disk_bytes = sum(segment_bytes(self.root, s) for s in segments)
+        self._evict()
+        threading.Thread(target=self._loop, daemon=True).start()
+        return self
+
+    # --- Scan path: copies and a queue put, nothing else ---
+
+    # `frames` are BGR images still owned by the caller, copied here and only
+    # when the queue has room; returns False when the record was dropped
+    def record(self, scan_id, frames, meta):
+        if self.jobs.full():
+            self.dropped += 1
+            return False
+        item = ("scan", scan_id, [f.copy() for f in frames], dict(meta, t=round(time.time(), 3)))
+        return self._put(item)
+
+    # Adds fields to a scan recorded earlier
+    def update(self, scan_id, **fields):
+        return self._put(("update", scan_id, [], fields))
+
+    def _put(self, item):
+        try:
+            self.jobs.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    # --- Writer thread ---
+
+    def _loop(self):
+        while True:
+            kind, scan_id, frames, meta = self.jobs.get()
+            try:
+                self._write(kind, scan_id, frames, meta)
+                if kind == "scan": self.recorded += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Recorder Error: {e}")
+                self._close()
+
+    def _write(self, kind, scan_id, frames, meta):
+        if self.frames_file is None:
+            self._open()
+        spans = []
+        for frame in frames:
+            ok, jpeg = cv2.imencode(".jpg", self._shrink(frame), [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok: continue
+            spans.append([self.frames_file.tell(), len(jpeg)])
+            self.frames_file.write(jpeg.tobytes())
+        line = {"kind": kind, "id": scan_id, **meta}
+        if kind == "scan": line["frames"] = spans
+        data = (json.dumps(line, separators=(",", ":")) + "\n").encode()
+        # Frames first: a line never points at bytes that are not there yet
+        self.frames_file.flush()
+        self.log_file.write(data)
+        self.log_file.flush()
+        self.disk_bytes += sum(n for _, n in spans) + len(data)
+        if self.frames_file.tell() >= self.segment_bytes:
+            self._close()
+            self._evict()
+
+    def _shrink(self, frame):
+        h, w = frame.shape[:2]
+        if not self.max_width or w <= self.max_width: return frame
+        return cv2.resize(frame, (self.max_width, round(h * self.max_width / w)), interpolation=cv2.INTER_AREA)
+
+    def _open(self):
+        name = f"{self.seq:06d}"
+        self.frames_file = open(self.root / f"{name}{FRAMES_SUFFIX}", "ab")
+        self.log_file = open(self.root / f"{name}{LOG_SUFFIX}", "ab")
+
+    def _close(self):
+        for f in (self.frames_file, self.log_file):
+            if f:
+                try: f.close()
+                except OSError: pass
+        if self.frames_file is not None:
+            self.seq += 1
+        self.frames_file = self.log_file = None
+
+    # Oldest closed segments go first; the one being written is never deleted
+    def _evict(self):
+        for seq in list_segments(self.root):
+            if self.disk_bytes <= self.budget_bytes or seq >= self.seq: break
+            size = segment_bytes(self.root, seq)
+            for suffix in (FRAMES_SUFFIX, LOG_SUFFIX):
+                (self.root / f"{seq:06d}{suffix}").unlink(missing_ok=True)
+            self.disk_bytes -= size
+            self.evicted += 1
+
+    def stats(self):
+        return {"recorded": self.recorded, "dropped": self.dropped, "evicted_segments": self.evicted,
+                "errors": self.errors, "disk_mb": self.disk_bytes / 1e6, "queued": self.jobs.qsize()}
+
+
+# ==========================================
+# 📖 READING RECORDINGS
+# ==========================================
+def list_segments(root):
+    return sorted(int(p.stem) for p in Path(root).glob(f"*{LOG_SUFFIX}") if p.stem.isdigit())
+
+
+def segment_bytes(root, seq):
+    total = 0
+    for suffix in (FRAMES_SUFFIX, LOG_SUFFIX):
+        try: total += (Path(root) / f"{seq:06d}{suffix}").stat().st_size
+        except OSError: pass
+    return total
+
+
+# Every complete scan, oldest first, with its updates merged in. Frames are
+# not loaded; record["frames"] holds (frames file, offset, length).
+def read_records(root):
+    records = {}
+    for seq in list_segments(root):
+        frames_path = Path(root) / f"{seq:06d}{FRAMES_SUFFIX}"
+        try: size = frames_path.stat().st_size
+        except OSError: size = 0
+        with open(Path(root) / f"{seq:06d}{LOG_SUFFIX}", "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"): break       # cut off mid-write
+                try: line = json.loads(raw)
+                except ValueError: continue
+                kind, scan_id = line.pop("kind", None), line.get("id")
+                if kind == "update":
+                    if scan_id in records: records[scan_id].update(line)
+                    continue
+                line["frames"] = [(frames_path, off, n) for off, n in line.get("frames", []) if off + n <= size]
+                records[scan_id] = line
+    return list(records.values())
+
+
+def load_frames(record):
+    frames = []
+    for path, offset, length in record["frames"]:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is not None: frames.append(image)
+    return frames
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default=os.getenv("RECORDER_DIR", "recordings"))
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("summary", help="Scans, decisions and disk use")
+    export = sub.add_parser("export", help="Write the frames as <out>/<label>/<scan>-<k>.jpg")
+    export.add_argument("out")
+    export.add_argument("--label", help="Only scans the machine decided as this label")
+    export.add_argument("--since", help="Only scans from this date on (YYYY-MM-DD)")
+    args = ap.parse_args()
+
+    records = read_records(args.root)
+    if args.command == "summary":
+        segments = list_segments(args.root)
+        disk = sum(segment_bytes(args.root, s) for s in segments) / 1e6
+        print(f"{len(records)} scans in {len(segments)} segments, {disk:.1f} MB")
+        if records:
+            first, last = (time.strftime("%Y-%m-%d %H:%M", time.localtime(r["t"])) for r in (records[0], records[-1]))
+            print(f"From {first} to {last}")
+        counts = {}
+        for r in records:
+            key = (r.get("label") or "-", r.get("path", "-"))
+            counts[key] = counts.get(key, 0) + 1
+        for (label, path), n in sorted(counts.items()):
+            print(f"  {label:<8} {path:<11} {n:6d}")
+        return
+
+    since = time.mktime(time.strptime(args.since, "%Y-%m-%d")) if args.since else 0
+    written = 0
+    for r in records:
+        if r["t"] < since or not r["frames"] or (args.label and r.get("label") != args.label): continue
+        folder = Path(args.out) / (r.get("label") or "none").lower()
+        folder.mkdir(parents=True, exist_ok=True)
+        name = "".join(c if c.isalnum() or c in "-_" else "_" for c in str(r["id"]))     # scan ids come from clients
+        for k, (path, offset, length) in enumerate(r["frames"]):
+            with open(path, "rb") as f:
+                f.seek(offset)
+                (folder / f"{name}-{k}.jpg").write_bytes(f.read(length))
+            written += 1
+    print(f"💾 {written} frames written to {args.out} (labels are the machine's decisions, review before training)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+import numpy as np
+from fusion import DecisionEngine
+from evaluate import open_classifiers, resolve_model
+from inference import BURST_FUSIONS, fuse_burst, prepare
+from recorder import load_frames, read_records
+
+# ==========================================
+# 🔁 SCAN REPLAY
+# ==========================================
+# Runs scans the recorder kept (recorder.py) through the machine's decision
+# path again, with the recorded readings standing in for the sensors: the
+# scale reads the recorded weight, the metal latch is the recorded one and
+# the camera returns the recorded burst. Two configurations are replayed side
+# by side and every scan where they decide differently is listed.
+#
+# A configuration starts from what each scan was recorded with (thresholds,
+# burst fusion, the model's probabilities) and overrides some of it:
+#   can_min_prob=0.35,plastic_min_prob=0.6,max_weight=60,empty_weight=1   DecisionEngine thresholds
+#   fusion=vote                     burst fusion (mean | vote)
+#   frames=1                        only the first N frames of each burst
+#   model=model/new.tflite          run this model (or registry version) on the frames,
+#                                   through inference.prepare() like the machine does
+# The empty config is the machine as it was, so A should match the recorded
+# decisions exactly; that is checked and reported.
+#
+# Not replayable: the unlit-frame empty check (a scan that was captured is
+# taken as "the view changed"), and scans the machine decided before the
+# capture (overweight / empty) when a config would now send them to the model.
+#
+#   python replay.py --b plastic_min_prob=0.6
+#   python replay.py recordings/ --a model=v4 --b model=v5 --since 2026-10-01 --out v5.json
+#   HW_BACKEND=sim python replay.py /tmp/rec --b fusion=vote,frames=1
+
+THRESHOLDS = ("can_min_prob", "plastic_min_prob", "max_weight", "empty_weight")
+CONFIG_KEYS = THRESHOLDS + ("fusion", "frames", "model")
+
+
+def parse_config(spec):
+    config = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, sep, value = part.partition("=")
+        key = key.strip()
+        if not sep or key not in CONFIG_KEYS:
+            raise argparse.ArgumentTypeError(f"'{part}' is not key=value with a key from {', '.join(CONFIG_KEYS)}")
+        try:
+            config[key] = float(value) if key in THRESHOLDS else int(value) if key == "frames" else value.strip()
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad value in '{part}'")
+    if config.get("fusion", BURST_FUSIONS[0]) not in BURST_FUSIONS:
+        raise argparse.ArgumentTypeError(f"fusion must be one of {', '.join(BURST_FUSIONS)}")
+    return config
+
+
+def describe(config):
+    return ",".join(f"{k}={v}" for k, v in config.items()) or "as recorded"
+
+
+# Pool worker: a scan's recorded frames -> model pixels for each (size, color)
+# asked for, or None when its frames are gone
+def load(job):
+    record, targets = job
+    images = load_frames(record)
+    if not images: return None
+    return [np.stack([prepare(image, size, color) for image in images]) for size, color in targets]
+
+
+class Replay:
+    """One configuration: a decision engine whose sensors are the recording."""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.engine = DecisionEngine()
+        self.defaults = {k: getattr(self.engine, k) for k in THRESHOLDS}
+        self.decisions = []
+
+    # `per_frame` is [k, classes] from the recording or from this config's
+    # model, None when the scan has nothing to run the rules on
+    def decide(self, record, per_frame):
+        settings = {**self.defaults, **record.get("thresholds", {}), **self.config}
+        for key in THRESHOLDS:
+            setattr(self.engine, key, settings[key])
+        decision = self.engine.precheck(record["weight"])
+        captured = bool(record["frames"]) or record.get("probs") is not None
+        if decision is not None and decision.path == "empty" and captured:
+            decision = None     # the machine's view check saw an item
+        if decision is None and per_frame is not None:
+            frames = settings.get("frames") or len(per_frame)
+            probs = fuse_burst(per_frame[:frames], settings.get("fusion") or record.get("fusion") or BURST_FUSIONS[0])
+            decision = self.engine.decide(probs, record.get("metal"))
+        self.decisions.append(decision)
+        return decision
+
+
+def outcome(decision):
+    if decision is None: return {"label": None, "path": "unreplayable", "reason": "decided before the capture"}
+    return {"label": decision.label, "path": decision.path, "reason": decision.reason}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("root", nargs="?", default=os.getenv("RECORDER_DIR", "recordings"), help="Recorder folder")
+    ap.add_argument("--a", type=parse_config, default={}, help="Baseline config, key=value,... (default: as recorded)")
+    ap.add_argument("--b", type=parse_config, default={}, help="Config to compare, key=value,...")
+    ap.add_argument("--since", help="Only scans from this date on (YYYY-MM-DD)")
+    ap.add_argument("--limit", type=int, help="Only the last N scans")
+    ap.add_argument("--registry", default=os.getenv("MODEL_REGISTRY", "model/registry"))
+    ap.add_argument("--batch", type=int, default=8, help="Scans per invoke when a model runs")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Decode processes")
+    ap.add_argument("--threads", type=int, default=int(os.getenv("AI_NUM_THREADS", "4")))
+    ap.add_argument("--show", type=int, default=20, help="Differing scans to list")
+    ap.add_argument("--out", help="Write results (with every differing scan) as JSON here")
+    args = ap.parse_args()
+
+    t_read = time.perf_counter()
+    records = read_records(args.root)
+    if args.since:
+        since = time.mktime(time.strptime(args.since, "%Y-%m-%d"))
+        records = [r for r in records if r["t"] >= since]
+    if args.limit:
+        records = records[-args.limit:]
+    if not records:
+        sys.exit(f"❌ No recorded scans in {args.root}")
+    read_s = time.perf_counter() - t_read
+    replays = [Replay("A", args.a), Replay("B", args.b)]
+
+    models = {r.config["model"]: resolve_model(r.config["model"], args.registry) for r in replays if "model" in r.config}
+    pool, classifiers = open_classifiers(models, args.workers, args.threads) if models else (None, {})
+    targets = [((c.model_w, c.model_h), c.color) for c in classifiers.values()]
+    print(f"Replaying {len(records)} scans from {args.root}")
+    for r in replays:
+        print(f"  {r.name}: {describe(r.config)}")
+
+    infer_s = 0.0
+    def run_models(chunk, pixels):
+        nonlocal infer_s
+        out = [{} for _ in chunk]
+        for m, (name, classifier) in enumerate(classifiers.items()):
+            rows = [i for i, p in enumerate(pixels) if p is not None]
+            if not rows: continue
+            t0 = time.perf_counter()
+            probs = classifier.classify_prepared(np.concatenate([pixels[i][m] for i in rows]))
+            infer_s += time.perf_counter() - t0
+            start = 0
+            for i in rows:
+                k = len(pixels[i][m])
+                out[i][name] = probs[start:start + k]
+                start += k
+        return out
+
+    t_start = time.perf_counter()
+    if pool:
+        prepared = pool.imap(load, ((r, targets) for r in records), chunksize=4)
+    step = args.batch if pool else len(records)
+    for start in range(0, len(records), step):
+        chunk = records[start:start + step]
+        model_probs = run_models(chunk, [next(prepared) for _ in chunk]) if pool else [{} for _ in chunk]
+        for record, computed in zip(chunk, model_probs):
+            recorded = np.asarray(record["probs"], np.float32) if record.get("probs") is not None else None
+            for r in replays:
+                name = r.config.get("model")
+                r.decide(record, computed.get(name) if name else recorded)
+    elapsed = time.perf_counter() - t_start
+    if pool: pool.close()
+
+    a, b = replays
+    label = lambda d: "unreplayable" if d is None else d.label or "-"
+    baseline = sum(1 for rec, d in zip(records, a.decisions) if d is not None and (d.label, d.path) != (rec.get("label"), rec.get("path")))
+    diffs = [i for i, (da, db) in enumerate(zip(a.decisions, b.decisions)) if label(da) != label(db)]
+
+    n = len(records)
+    print(f"\n{n} scans in {elapsed:.2f} s = {n / elapsed:,.0f} scans/s"
+          + (f" (interpreter {infer_s:.1f} s)" if classifiers else "") + f", reading the recording {read_s:.2f} s")
+    print(f"\n  {'':<3}{'Can':>8}{'Plastic':>8}{'Other':>8}{'empty':>8}{'unrepl.':>8}")
+    for r in replays:
+        counts = Counter(label(d) for d in r.decisions)
+        print(f"  {r.name:<3}" + "".join(f"{counts[k]:>8}" for k in ("Can", "Plastic", "Other", "-", "unreplayable")))
+    print(f"\nA vs the machine: {baseline} of {n} scans decided differently"
+          + ("" if a.config else " (should be 0: A is the machine as recorded)"))
+    print(f"A vs B: {len(diffs)} of {n} scans decided differently ({len(diffs) / n:.1%})")
+    if diffs:
+        changes = Counter((label(a.decisions[i]), label(b.decisions[i])) for i in diffs)
+        print(f"\n  {'A':<13}{'B':<13}{'scans':>6}")
+        for (la, lb), count in changes.most_common():
+            print(f"  {la:<13}{lb:<13}{count:>6}")
+        print(f"\n  {'scan':<22}{'weight':>7} {'metal':<6} {'A':<36} B")
+        for i in diffs[:args.show]:
+            rec = records[i]
+            da, db = (f"{label(d)} ({outcome(d)['reason']})" for d in (a.decisions[i], b.decisions[i]))
+            print(f"  {str(rec['id'])[:21]:<22}{rec['weight']:7.1f} {str(rec.get('metal')):<6} {da:<36} {db}")
+        if len(diffs) > args.show:
+            print(f"  ... {len(diffs) - args.show} more" + (f" in {args.out}" if args.out else " (--out to keep them all)"))
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({
+            "root": args.root, "scans": n, "seconds": elapsed, "scans_per_s": n / elapsed, "inference_s": infer_s,
+            "configs": {r.name: r.config for r in replays}, "a_vs_machine": baseline,
+            "counts": {r.name: Counter(label(d) for d in r.decisions) for r in replays},
+            "diffs": [{"id": records[i]["id"], "t": records[i]["t"], "weight": records[i]["weight"],
+                       "metal": records[i].get("metal"), "a": outcome(a.decisions[i]), "b": outcome(b.decisions[i])}
+                      for i in diffs],
+        }, indent=2))
+        print(f"💾 Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ==========================================
+# 🎫 SCAN JOBS
+# ==========================================
+# A scan request becomes a job: the POST answers with a job id right away
+# and the kiosk picks the result up later (long-poll or the SSE stream)
+# instead of holding a request open for the whole capture + inference.
+# One scheduler thread runs the jobs one at a time, so it alone drives the
+# lights, camera and scale; the motors stay with the actuator worker
+# (scan_pipeline.py).
+#
+# The client names its scan: a retried POST with the same scan id gets the
+# same job back instead of scanning the item again. A tap that arrives while
+# another scan is queued or running joins it, the chamber holds one item.
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ScanJob:
+    def __init__(self, job_id, source):
+        self.id = job_id
+        self.source = source            # "tap" or "auto"
+        self.status = QUEUED
+        self.result = {}
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def to_dict(self):
+        return {"job_id": self.id, "status": self.status, **self.result}
+
+
+class ScanScheduler:
+    def __init__(self, run, keep=256):
+        self.run = run                  # job -> result dict, None when the scan failed
+        self.keep = keep                # finished jobs still answerable by id
+        self.jobs = OrderedDict()       # scan id -> job (several ids may share a job)
+        self.pending = None             # the job queued or running, at most one
+        self.cond = threading.Condition()
+
+        # Measurements
+        self.submitted = 0
+        self.joined = 0
+
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    # Returns (job, created); created is False for a retry or a tap that joined
+    def submit(self, scan_id=None, source="tap"):
+        with self.cond:
+            job = self.jobs.get(scan_id) if scan_id else None
+            if job is None and self.pending is not None:
+                job = self.pending
+                if scan_id: self._remember(scan_id, job)
+            if job is not None:
+                self.joined += 1
+                return job, False
+            job = ScanJob(scan_id or uuid.uuid4().hex, source)
+            self._remember(job.id, job)
+            self.pending = job
+            self.submitted += 1
+            self.cond.notify()
+            return job, True
+
+    def get(self, scan_id):
+        with self.cond:
+            return self.jobs.get(scan_id)
+
+    def busy(self):
+        return self.pending is not None
+
+    def _remember(self, scan_id, job):
+        self.jobs[scan_id] = job
+        while len(self.jobs) > self.keep:
+            self.jobs.popitem(last=False)
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending is not None)
+                job = self.pending
+                job.status = RUNNING
+            result = None
+            try:
+                result = self.run(job)
+            except Exception as e:
+                print(f"❌ Scan Error: {e}")
+            with self.cond:
+                job.result = {"success": True, **result} if result else {"success": False, "error": "Scan Failed"}
+                job.status = DONE if result else FAILED
+                job.finished_at = time.monotonic()
+                self.pending = None
+            job.done.set()
@@ -0,0 +1,96 @@
+import threading
+import queue
+import time
+from collections import deque
+
+# ==========================================
+# 🏭 PIPELINED SCAN ENGINE
+# ==========================================
+# The physical part of a scan (gate -> slap -> park) runs on its own worker
+# thread. The kiosk gets its answer as soon as the decision is made and the
+# chute is free again as soon as the slapper is back at rest; parking runs
+# after that, while the next item is dropped in. The item is weighed before
+# it is handed over: once the chute is free the next one may already be on
+# the scale.
+
+class ActuatorJob:
+    def __init__(self, label, weight, on_done=None):
+        self.label = label
+        self.weight = weight
+        self.on_done = on_done
+        self.submitted_at = time.monotonic()
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class ScanPipeline:
+    def __init__(self, clear_chute, park, pipelined=True, chute_timeout=5.0):
+        self.clear_chute = clear_chute      # label -> returns once the slapper is back at rest
+        self.park = park                    # label -> gate back to idle, servos relaxed
+        self.pipelined = pipelined
+        self.chute_timeout = chute_timeout
+
+        self.jobs = queue.Queue()
+        self.chute_clear = threading.Event()
+        self.chute_clear.set()
+        self.rested_at = 0.0                # monotonic time the slapper was last back at rest
+        self.finished = deque(maxlen=50)
+
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def wait_chute_clear(self, timeout=None):
+        return self.chute_clear.wait(self.chute_timeout if timeout is None else timeout)
+
+    def submit(self, label, weight, on_done=None):
+        job = ActuatorJob(label, weight, on_done)
+        # The chute is busy from the moment the item is handed over
+        self.chute_clear.clear()
+        self.jobs.put(job)
+        if not self.pipelined:
+            job.wait()
+        return job
+
+    # Runs `fn` on the actuator thread once the items queued before it are sorted
+    def after_jobs(self, fn):
+        self.jobs.put(fn)
+
+    def items_per_minute(self):
+        if len(self.finished) < 2: return 0.0
+        span = self.finished[-1] - self.finished[0]
+        return (len(self.finished) - 1) * 60.0 / span if span > 0 else 0.0
+
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if callable(job):
+                try: job()
+                except Exception as e: print(f"❌ Actuator Error: {e}")
+                continue
+            try:
+                self._run(job)
+            except Exception as e:
+                print(f"❌ Actuator Error: {e}")
+            finally:
+                job.finished_at = time.monotonic()
+                self.finished.append(job.finished_at)
+                if not self.chute_clear.is_set(): self._release_chute()
+                job.done.set()
+
+            # Park only when nothing is waiting, the next item moves the gate anyway
+            if self.pipelined and self.jobs.empty():
+                try: self.park(job.label)
+                except Exception as e: print(f"⚠️ Park Error: {e}")
+
+    def _release_chute(self):
+        self.rested_at = time.monotonic()
+        self.chute_clear.set()
+
+    def _run(self, job):
+        self.clear_chute(job.label)
+        self._release_chute()
+        if not self.pipelined:
+            self.park(job.label)
+        if job.on_done: job.on_done(job)
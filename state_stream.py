@@ -0,0 +1,51 @@
+import json
+import threading
+
+# ==========================================
+# 📡 STATE PUSH (SERVER-SENT EVENTS)
+# ==========================================
+# Every change to the kiosk state is published here with a version number.
+# An SSE client first gets the full snapshot, then only the keys that
+# changed since the last event it saw. Idle connections get a comment line
+# every `heartbeat` seconds so proxies and the browser keep them open.
+
+class StateStream:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.version = 0
+        self.snapshot = {}
+        self.clients = 0
+
+    def publish(self, state):
+        new = dict(state)
+        with self.cond:
+            if new == self.snapshot: return
+            self.version += 1
+            self.snapshot = new
+            self.cond.notify_all()
+
+    def current(self):
+        with self.cond:
+            return self.version, self.snapshot
+
+    # Blocks until the version moves past `version` or the timeout expires
+    def wait(self, version, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.snapshot
+
+    def sse(self, heartbeat=15.0):
+        with self.cond: self.clients += 1
+        try:
+            version, snap = self.current()
+            yield f"id: {version}\nevent: snapshot\ndata: {json.dumps(snap)}\n\n"
+            while True:
+                new_version, new = self.wait(version, heartbeat)
+                if new_version == version:
+                    yield ": ping\n\n"
+                    continue
+                changes = {k: v for k, v in new.items() if snap.get(k) != v}
+                yield f"id: {new_version}\nevent: delta\ndata: {json.dumps(changes)}\n\n"
+                version, snap = new_version, new
+        finally:
+            with self.cond: self.clients -= 1
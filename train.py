@@ -0,0 +1,326 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from evaluate import list_images, load
+
+# ==========================================
+# 🏋️ TRAINING
+# ==========================================
+# ai-model.ipynb as a script: MobileNetV2, head-only phase, then fine-tuning,
+# then the .tflite exports, all in one run. The notebook decodes and resizes
+# every JPEG again on every epoch. Here each split is decoded once into uint8
+# .npy shards, which later epochs and runs read memory-mapped. The cache is
+# keyed by image size, so the 224x224 model and the 96x96 cascade model each
+# get their own.
+#
+#   <data>/augmented_trainset/{can,other,plastic}, <data>/val/..., <data>/test/...
+#   <cache>/224x224/train/{index.json, labels.npy, shard-000.npy, ...}
+#
+# Images are found and decoded with evaluate.py's list_images() and load(),
+# so training and evaluation see the same files. Pixels go through
+# inference.prepare(), the same resize and RGB swap the machine applies to
+# camera frames.
+#
+#   python train.py /data/3types-trash --out model/
+#   python train.py /data/3types-trash --preset tiny --out model/
+#   python train.py /data/3types-trash --no-cache      (the notebook's input pipeline, for comparison)
+
+CLASSES = ["can", "other", "plastic"]
+SPLITS = {"train": "augmented_trainset", "val": "val", "test": "test"}
+SHARD_IMAGES = 1024     # images per .npy shard (~150 MB at 224x224)
+
+# Same settings as the notebook
+PRESETS = {
+    "full": {"size": (224, 224), "alpha": 1.0, "dropout": 0.5, "tag": "v2", "variants": ("fp32", "dr", "int8"),
+             "head": {"lr": 1e-4, "epochs": 10, "patience": 3},
+             "fine": {"lr": 1e-5, "epochs": 10, "patience": 7, "layers": 50, "reduce_lr": True}},
+    # First stage of the cascade: whole (small) backbone fine-tuned briefly
+    "tiny": {"size": (96, 96), "alpha": 0.35, "dropout": 0.3, "tag": "v1", "variants": ("tiny",),
+             "head": {"lr": 1e-3, "epochs": 10, "patience": 3},
+             "fine": {"lr": 1e-5, "epochs": 5, "patience": 2, "layers": None, "reduce_lr": False}},
+}
+
+
+# ==========================================
+# 🗄️ DATASET CACHE
+# ==========================================
+class ShardedSplit:
+    # One split at one size: `labels` and the shards, memory-mapped read-only
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.index = json.loads((self.folder / "index.json").read_text())
+        self.labels = np.load(self.folder / "labels.npy")
+        self.shards = [np.load(self.folder / name, mmap_mode="r") for name in self.index["shards"]]
+        self.starts = np.cumsum([0] + [len(s) for s in self.shards])
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Images for sorted global indices, read shard by shard
+    def take(self, indices):
+        out = np.empty((len(indices),) + self.shards[0].shape[1:], np.uint8)
+        shard_of = np.searchsorted(self.starts, indices, side="right") - 1
+        for s in np.unique(shard_of):
+            rows = np.flatnonzero(shard_of == s)
+            out[rows] = self.shards[s][indices[rows] - self.starts[s]]
+        return out
+
+
+# Files, sizes and mtimes the cache was built from; any change rebuilds it
+def fingerprint(items):
+    return [[path, label, os.path.getsize(path), int(os.path.getmtime(path))] for path, label in items]
+
+
+def build_split(source, folder, size, workers, seed=0):
+    items = list_images(source)
+    if not items:
+        raise FileNotFoundError(f"No images under {source}/{{{','.join(CLASSES)}}}")
+    # Stored in a fixed shuffled order, so every shard mixes the classes
+    items = [items[i] for i in np.random.default_rng(seed).permutation(len(items))]
+    files = fingerprint(items)
+    folder = Path(folder)
+    index_path = folder / "index.json"
+    if index_path.exists():
+        index = json.loads(index_path.read_text())
+        if index.get("files") == files and index.get("size") == list(size):
+            return ShardedSplit(folder), 0.0
+    print(f"🗄️ Caching {len(items)} images from {source} at {size[0]}x{size[1]}")
+    folder.mkdir(parents=True, exist_ok=True)
+    index_path.unlink(missing_ok=True)
+
+    t0 = time.perf_counter()
+    labels, shards, failed, pending = [], [], [], []
+    def flush():
+        shards.append(f"shard-{len(shards):03d}.npy")
+        np.save(folder / shards[-1], np.stack(pending))
+        pending.clear()
+    jobs = ((path, size, "rgb") for path, _ in items)
+    with multiprocessing.Pool(workers) as pool:
+        for (path, label), pixels in zip(items, pool.imap(load, jobs, chunksize=8)):
+            if pixels is None:
+                failed.append(path)
+                continue
+            pending.append(pixels)
+            labels.append(label)
+            if len(pending) == SHARD_IMAGES: flush()
+    if pending: flush()
+    np.save(folder / "labels.npy", np.array(labels, np.int32))
+    # index.json last: a cache without it is never used
+    index_path.write_text(json.dumps({"size": list(size), "classes": CLASSES, "shards": shards,
+                                      "unreadable": failed, "files": files}))
+    seconds = time.perf_counter() - t0
+    print(f"   {len(labels)} images in {seconds:.1f} s" + (f", {len(failed)} unreadable" if failed else ""))
+    return ShardedSplit(folder), seconds
+
+
+def build_cache(data, cache, size, workers):
+    splits, seconds = {}, {}
+    for split, name in SPLITS.items():
+        splits[split], seconds[split] = build_split(Path(data) / name, Path(cache) / f"{size[0]}x{size[1]}" / split, size, workers)
+    return splits, seconds
+
+
+# Batches from the shards, read by a background thread `prefetch` batches
+# ahead of training. Each batch is gathered in sorted order so the memmap
+# reads move forward through the files.
+class BatchStream:
+    def __init__(self, split, batch_size, shuffle=False, prefetch=4, seed=0):
+        self.split = split
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return -(-len(self.split) // self.batch_size)
+
+    def __iter__(self):
+        order = self.rng.permutation(len(self.split)) if self.shuffle else np.arange(len(self.split))
+        batches = queue.Queue(self.prefetch)
+        stop = threading.Event()
+        # Gives up once the consumer has gone away mid-epoch
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        def fill():
+            for i in range(0, len(order), self.batch_size):
+                indices = np.sort(order[i:i + self.batch_size])
+                if not put((self.split.take(indices), self.split.labels[indices])): return
+            put(None)
+        threading.Thread(target=fill, daemon=True).start()
+        try:
+            while (item := batches.get()) is not None:
+                yield item
+        finally:
+            stop.set()
+
+    def dataset(self):
+        import tensorflow as tf
+        h, w = self.split.shards[0].shape[1:3]
+        ds = tf.data.Dataset.from_generator(
+            lambda: iter(self),
+            output_signature=(tf.TensorSpec((None, h, w, 3), tf.uint8), tf.TensorSpec((None,), tf.int32)))
+        ds = ds.apply(tf.data.experimental.assert_cardinality(len(self)))
+        return ds.map(lambda x, y: (tf.cast(x, tf.float32), y)).prefetch(1)
+
+
+# The notebook's pipeline: every file decoded and resized again each epoch
+def directory_datasets(data, size, batch_size):
+    from tensorflow import keras
+    return {split: keras.utils.image_dataset_from_directory(
+                str(Path(data) / name), image_size=size[::-1], batch_size=batch_size,
+                class_names=CLASSES, shuffle=split == "train")
+            for split, name in SPLITS.items()}
+
+
+# ==========================================
+# 🧠 MODEL
+# ==========================================
+def build_model(preset, weights="imagenet"):
+    from tensorflow import keras
+    from tensorflow.keras import layers
+    shape = tuple(preset["size"][::-1]) + (3,)
+    base = keras.applications.MobileNetV2(input_shape=shape, alpha=preset["alpha"], include_top=False, weights=weights)
+    base.trainable = False
+    inputs = keras.Input(shape=shape)
+    x = keras.applications.mobilenet_v2.preprocess_input(inputs)
+    # training=False keeps BatchNorm in inference mode, also when fine-tuning
+    x = base(x, training=False)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(preset["dropout"])(x)
+    outputs = layers.Dense(len(CLASSES), activation="softmax")(x)
+    return keras.Model(inputs, outputs), base
+
+
+def epoch_timer():
+    from tensorflow import keras
+    class EpochTimer(keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.seconds = []
+        def on_epoch_begin(self, epoch, logs=None):
+            self.t0 = time.perf_counter()
+        def on_epoch_end(self, epoch, logs=None):
+            self.seconds.append(time.perf_counter() - self.t0)
+    return EpochTimer()
+
+
+def fit_phase(model, phase, train, val, epochs=None):
+    from tensorflow import keras
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=phase["lr"]),
+                  loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    timer = epoch_timer()
+    callbacks = [keras.callbacks.EarlyStopping(monitor="val_loss", patience=phase["patience"], restore_best_weights=True), timer]
+    if phase.get("reduce_lr"):
+        callbacks.append(keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=2, min_lr=1e-6))
+    history = model.fit(train, validation_data=val, epochs=epochs or phase["epochs"], callbacks=callbacks, verbose=2)
+    return {"epoch_seconds": timer.seconds, "history": {k: [float(v) for v in vs] for k, vs in history.history.items()}}
+
+
+def unfreeze(base, layers):
+    base.trainable = True
+    if layers is None: return
+    for layer in base.layers[:len(base.layers) - layers]:
+        layer.trainable = False
+
+
+# ==========================================
+# 📦 TFLITE EXPORT
+# ==========================================
+# fp32 = original export, dr = dynamic-range weights, int8 = full integer
+# with uint8 input calibrated on raw 0-255 training pixels, tiny = dr export
+# of the cascade's first stage.
+def export(model, variant, path, calibration):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if variant != "fp32":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "int8":
+        def representative_dataset():
+            for image in calibration:
+                yield [np.asarray(image, np.float32)[None]]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    Path(path).write_bytes(converter.convert())
+    print(f"💾 Saved {path}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("data", help="Folder with augmented_trainset/, val/ and test/")
+    ap.add_argument("--preset", choices=tuple(PRESETS), default="full")
+    ap.add_argument("--out", default="model", help="Where the .keras and .tflite files go")
+    ap.add_argument("--cache", default=os.getenv("TRAIN_CACHE", "model/cache"), help="Dataset cache folder")
+    ap.add_argument("--no-cache", action="store_true", help="Decode from the image folders every epoch like the notebook")
+    ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Decode processes for the cache")
+    ap.add_argument("--variants", help="Comma separated exports (default: the preset's)")
+    ap.add_argument("--tag", help="Version in the file names (default: the preset's)")
+    ap.add_argument("--head-epochs", type=int)
+    ap.add_argument("--fine-epochs", type=int)
+    ap.add_argument("--weights", default="imagenet", help="Backbone weights: imagenet, a .h5 file, or none")
+    ap.add_argument("--calibration-images", type=int, default=128, help="Training images for the int8 calibration")
+    args = ap.parse_args()
+
+    preset = PRESETS[args.preset]
+    size = preset["size"]
+    tag = args.tag or preset["tag"]
+    variants = args.variants.split(",") if args.variants else preset["variants"]
+    report = {"preset": args.preset, "size": list(size), "batch": args.batch, "cache": not args.no_cache}
+
+    # Decode processes are forked before TensorFlow starts its thread pools
+    if args.no_cache:
+        datasets = directory_datasets(args.data, size, args.batch)
+        calibration = (image for images, _ in datasets["train"].take(-(-args.calibration_images // args.batch)) for image in images)
+    else:
+        splits, report["cache_build_seconds"] = build_cache(args.data, args.cache, size, args.workers)
+        datasets = {split: BatchStream(s, args.batch, shuffle=split == "train").dataset() for split, s in splits.items()}
+        train = splits["train"]
+        calibration = train.take(np.arange(min(args.calibration_images, len(train))))
+
+    model, base = build_model(preset, None if args.weights == "none" else args.weights)
+    print(f"Phase 1: head only, {size[0]}x{size[1]}")
+    report["head"] = fit_phase(model, preset["head"], datasets["train"], datasets["val"], args.head_epochs)
+    unfreeze(base, preset["fine"]["layers"])
+    print(f"Phase 2: fine-tuning {preset['fine']['layers'] or 'all'} backbone layers")
+    report["fine"] = fit_phase(model, preset["fine"], datasets["train"], datasets["val"], args.fine_epochs)
+    loss, accuracy = model.evaluate(datasets["test"], verbose=0)
+    report["test_accuracy"] = float(accuracy)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    model.save(out / f"ai-model-{args.preset}-{tag}.keras")
+    report["exports"] = []
+    for variant in variants:
+        path = out / f"ai-model-{variant}-{tag}.tflite"
+        export(model, variant, path, calibration)
+        report["exports"].append(str(path))
+    report["when"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    (out / f"train-{args.preset}-{tag}.json").write_text(json.dumps(report, indent=2))
+
+    epochs = report["head"]["epoch_seconds"] + report["fine"]["epoch_seconds"]
+    cache = ""
+    if not args.no_cache:
+        built = sum(report["cache_build_seconds"].values())
+        cache = f" (+{built:.0f} s building the cache)" if built else " (cache reused)"
+    print(f"\nTest accuracy {accuracy:.1%}")
+    print(f"Epochs: head {np.mean(report['head']['epoch_seconds']):.1f} s, fine-tuning "
+          f"{np.mean(report['fine']['epoch_seconds']):.1f} s on average, {sum(epochs):.0f} s for {len(epochs)} epochs{cache}")
+    print(f"Register one with: python model_registry.py add <version> {report['exports'][0]} --input-size {size[1]}x{size[0]}")
+
+
+if __name__ == "__main__":
+    main()